@@ -0,0 +1 @@
+"""Offline benchmarks for rng-helper (run with `python -m benchmarks.<name>`)."""
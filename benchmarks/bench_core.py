@@ -0,0 +1,198 @@
+"""命令核心微基准：改造前 Slash / 文本处理函数中的逐命令逻辑 vs `_core.CommandCore`。
+
+基线函数复制自改造前 `CoC` 的处理函数体（只去掉发送，返回要发送的文本），
+两边使用同一份内存属性存储；只测命令本身的解析、查找与格式化，不含 Discord 发送。
+基线的骰子同样从频道随机数流抽取并写入掷骰日志（后来加入的 `_streams`，两边开销相同），只比较命令核心本身。
+
+用法（在仓库根目录）：python -m benchmarks.bench_core [--number N]
+"""
+
+import re
+import time
+import asyncio
+import inspect
+import argparse
+
+from cogs import _check, _core, _dice, _locks, _store, _streams
+
+CHANNEL = 1
+
+
+class User:
+    def __init__(self, user_id: int, name: str) -> None:
+        self.id = user_id
+        self.name = name
+        self.mention = f"<@{user_id}>"
+
+
+class Legacy:
+    """改造前的实现：每次命令都重新标准化属性名、重新解析参数，/add 逐个属性写回。"""
+
+    def __init__(self, store: _store.AttrStore, locks: _locks.KeyedLocks, streams: _streams.StreamService) -> None:
+        self._store = store
+        self._locks = locks
+        self._streams = streams
+
+    def _normalize_attr_name(self, name: str) -> tuple[str, str]:
+        compact = " ".join((name or "").strip().split())
+        return compact.lower(), compact
+
+    def _get_display_name(self, channel_id: int, user: User) -> str:
+        is_kp = self._store.get_kp(channel_id) == user.id
+        name_meta = self._store.user_attrs(channel_id, user.id).get(self._normalize_attr_name("NAME")[0])
+        custom_name = str(name_meta.value).strip() if name_meta is not None else ""
+        if custom_name:
+            return f"KP({custom_name})" if is_kp else custom_name
+        if is_kp:
+            return "KP"
+        return getattr(user, "name", "user")
+
+    def _parse_set_items(self, items: str) -> list[tuple[str, int]]:
+        if not items or not items.strip():
+            return []
+        parts = re.split(r"[，,]+", items)
+        pairs: list[tuple[str, int]] = []
+        for raw in parts:
+            seg = raw.strip()
+            if not seg:
+                continue
+            m = re.match(r"^(.+?)\s*(-?\d+)\s*$", seg)
+            if not m:
+                raise ValueError(f"Invalid segment: '{seg}'.")
+            pairs.append((m.group(1), int(m.group(2))))
+        return pairs
+
+    def check(self, user: User, arg: str) -> str:
+        m = re.match(r"^\s*(\d+)\s*$", arg or "")
+        if m:
+            target = int(m.group(1))
+            roll = self._streams.die(CHANNEL, user.id, f"check {target}", 100)
+            return f"{roll}/{target} -> {_check.outcome_text(target, roll)}"
+        attrs = self._store.user_attrs(CHANNEL, user.id)
+        key, _label_req = self._normalize_attr_name(arg)
+        meta = attrs.get(key)
+        if meta is None:
+            return "Attribute not found. Use /set or .set to define it."
+        label = meta.label
+        target = max(1, min(100, meta.value))
+        roll = self._streams.die(CHANNEL, user.id, f"check {label}", 100)
+        outcome = _check.outcome_text(target, roll)
+        display_name = self._get_display_name(CHANNEL, user)
+        return f"[{label}] check of {display_name}:\n{roll}/{target} -> {outcome}"
+
+    def growth(self, user: User, arg: str) -> str:
+        attrs = self._store.user_attrs(CHANNEL, user.id)
+        key, _label_req = self._normalize_attr_name(arg)
+        meta = attrs.get(key)
+        label = meta.label
+        target = max(1, min(100, meta.value))
+        with self._streams.draw(CHANNEL, user.id, f"growth {label}") as rng:
+            roll = rng.die(100)
+            outcome = _check.outcome_text(target, roll)
+            growth = 0 if outcome in {"critical success", "extreme success", "hard success", "success"} else rng.die(10)
+        display_name = self._get_display_name(CHANNEL, user)
+        if not growth:
+            return f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth failed."
+        return f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth value: 1d10 -> {growth}"
+
+    def set(self, user: User, items: str) -> str:
+        pairs = self._parse_set_items(items)
+        self._store.set_attrs(CHANNEL, user.id, [(*self._normalize_attr_name(n), int(v)) for n, v in pairs], cmd="set", actor_id=user.id)
+        summary = ", ".join([f"{self._normalize_attr_name(n)[1]}={int(v)}" for n, v in pairs])
+        return f"Set: {summary}"
+
+    async def add(self, user: User, items: str) -> str:
+        pairs = self._parse_set_items(items)
+        summary_items: list[str] = []
+        async with self._locks(CHANNEL, user.id):
+            store = self._store.user_attrs(CHANNEL, user.id)
+            for name, delta in pairs:
+                key, label = self._normalize_attr_name(name)
+                meta = store.get(key)
+                curr_val = meta.value if meta is not None and isinstance(meta.value, int) else 0
+                new_val = curr_val + int(delta)
+                self._store.set_attrs(CHANNEL, user.id, [(key, label, int(new_val))], cmd="add", actor_id=user.id)
+                summary_items.append(f"{label}{'+' if int(delta) >= 0 else ''}{int(delta)} => {int(new_val)}")
+        return f"Add: {', '.join(summary_items)}"
+
+    async def sc(self, user: User, loss: str) -> str:
+        parts = loss.split("/", 1)
+        succ_expr, fail_expr = parts[0].strip(), parts[1].strip()
+        async with self._locks(CHANNEL, user.id):
+            attrs = self._store.user_attrs(CHANNEL, user.id)
+            san_meta = attrs.get(self._normalize_attr_name("Sanity")[0])
+            san_val = san_meta.value
+            target = max(1, min(100, san_val))
+            with self._streams.draw(CHANNEL, user.id, f"sc {succ_expr}/{fail_expr}") as rng:
+                roll = rng.die(100)
+                is_success = roll <= target
+                chosen_expr = succ_expr if is_success else fail_expr
+                loss_total, details = _dice.roll_expression(chosen_expr, rng)
+            new_san = max(0, san_val - max(0, loss_total))
+            san_key, san_label = self._normalize_attr_name(san_meta.label)
+            self._store.set_attrs(CHANNEL, user.id, [(san_key, san_label, int(new_san))], cmd="sc", actor_id=user.id)
+        display_name = self._get_display_name(CHANNEL, user)
+        outcome = "success" if is_success else "failure"
+        extra = f" | {'; '.join(details)}" if details else ""
+        return (
+            f"Sanity Check of {display_name}:\n"
+            f"SC {roll}/{target} [{san_label}] -> {outcome} | loss: {chosen_expr} -> {loss_total}{extra} | Sanity: {san_val} -> {new_san}"
+        )
+
+
+async def _time(func, number: int, repeat: int = 5) -> float:
+    """返回每次调用的微秒数（repeat 轮取最快）；返回协程的调用在同一事件循环中顺序 await。"""
+    is_async = inspect.isawaitable(probe := func())
+    if is_async:
+        await probe
+    rounds = max(1, number // repeat)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            if is_async:
+                await func()
+            else:
+                func()
+        best = min(best, time.perf_counter() - start)
+    return best / rounds * 1e6
+
+
+async def main_async(number: int) -> None:
+    store = _store.AttrStore()
+    locks = _locks.KeyedLocks()
+    streams = _streams.StreamService("bench")
+    legacy = Legacy(store, locks, streams)
+    core = _core.CommandCore(store, locks, streams)
+    user = User(42, "alice")
+    store.set_attrs(
+        CHANNEL, user.id,
+        [("str", "STR", 60), ("dex", "DEX", 50), ("hp", "HP", 12), ("sanity", "Sanity", 10_000_000),
+         ("spot hidden", "Spot Hidden", 55), ("name", "NAME", "Alice")],
+    )
+    cases = [
+        ("check 50", lambda: legacy.check(user, "50"), lambda: core.check(CHANNEL, [user], "50")),
+        ("check Spot Hidden", lambda: legacy.check(user, "Spot Hidden"), lambda: core.check(CHANNEL, [user], "Spot Hidden")),
+        ("growth Spot Hidden", lambda: legacy.growth(user, "Spot Hidden"), lambda: core.growth(CHANNEL, [user], "Spot Hidden")),
+        ("set 3 items", lambda: legacy.set(user, "STR 60, DEX 50, Move Rate 8"),
+         lambda: core.set_attrs(CHANNEL, [user], "STR 60, DEX 50, Move Rate 8", actor_id=user.id)),
+        ("add 3 items", lambda: legacy.add(user, "HP -1, HP 1, Luck 0"),
+         lambda: core.add_attrs(CHANNEL, [user], "HP -1, HP 1, Luck 0", actor_id=user.id)),
+        ("sc 1d3/1d10", lambda: legacy.sc(user, "1d3/1d10"), lambda: core.sanity_check(CHANNEL, user, "1d3/1d10")),
+    ]
+    print(f"{'command':<20} {'legacy us':>10} {'core us':>10} {'speedup':>8}")
+    for label, old, new in cases:
+        legacy_us = await _time(old, number)
+        core_us = await _time(new, number)
+        print(f"{label:<20} {legacy_us:10.2f} {core_us:10.2f} {legacy_us / core_us:7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""骰子表达式微基准：编译缓存 vs 原递归下降解析器。
+
+用法（在仓库根目录）：python -m benchmarks.bench_dice [--number N]
+"""
+
+import argparse
+import random
+import timeit
+
+from cogs import _dice
+
+EXPRESSIONS = ["1d100", "1d3", "1d10", "3d6*5", "(2d6+6)*5", "3d6*5+1d4-2"]
+
+
+def legacy_roll_expression(expr: str) -> tuple[int, list[str]]:
+    """基线实现：每次调用都重新构建闭包并解析（复制自改造前的 CoC._roll_expression）。"""
+    s = (expr or "").replace(" ", "")
+    if not s:
+        raise ValueError("Empty expression")
+
+    idx = 0
+    details: list[str] = []
+
+    def peek() -> str:
+        return s[idx] if idx < len(s) else ""
+
+    def consume(ch: str) -> bool:
+        nonlocal idx
+        if idx < len(s) and s[idx] == ch:
+            idx += 1
+            return True
+        return False
+
+    def parse_int() -> int:
+        nonlocal idx
+        start = idx
+        if idx < len(s) and s[idx] in "+-":
+            idx += 1
+        while idx < len(s) and s[idx].isdigit():
+            idx += 1
+        if start == idx or s[start:idx] in {"+", "-"}:
+            raise ValueError("Expected integer")
+        return int(s[start:idx])
+
+    def parse_factor() -> int:
+        nonlocal idx
+        # unary +/-
+        if consume('+'):
+            return parse_factor()
+        if consume('-'):
+            return -parse_factor()
+        # parentheses
+        if consume('('):
+            val = parse_expr()
+            if not consume(')'):
+                raise ValueError("Missing closing parenthesis")
+            return val
+        # dice or integer
+        # pattern: [N]dM or integer
+        save = idx
+        # optional N
+        n_sign = 1
+        if peek() in '+-':
+            n_sign = 1 if consume('+') else (-1 if consume('-') else 1)
+        n_val = 0
+        has_n = False
+        while idx < len(s) and s[idx].isdigit():
+            has_n = True
+            n_val = n_val * 10 + int(s[idx])
+            idx += 1
+        if n_sign == -1:
+            n_val = -n_val
+        if idx < len(s) and s[idx].lower() == 'd':
+            idx += 1
+            # sides required
+            if idx >= len(s) or (s[idx] in '+-*'):
+                raise ValueError("Missing sides after 'd'")
+            # parse sides (no unary signs here)
+            if not s[idx].isdigit():
+                raise ValueError("Invalid sides")
+            sides = 0
+            while idx < len(s) and s[idx].isdigit():
+                sides = sides * 10 + int(s[idx])
+                idx += 1
+            count = n_val if has_n else 1
+            if count <= 0:
+                raise ValueError("Dice count must be positive")
+            if not (1 <= count <= 100 and 2 <= sides <= 1000):
+                raise ValueError("Out of range dice: require 1<=N<=100 and 2<=M<=1000")
+            rolls = [random.randint(1, sides) for _ in range(count)]
+            details.append(f"{count}d{sides}=[{', '.join(map(str, rolls))}]")
+            return sum(rolls)
+        # fallback: integer
+        idx = save
+        val = parse_int()
+        return val
+
+    def parse_term() -> int:
+        val = parse_factor()
+        while True:
+            if consume('*'):
+                rhs = parse_factor()
+                val = val * rhs
+            else:
+                break
+        return val
+
+    def parse_expr() -> int:
+        val = parse_term()
+        while True:
+            if consume('+'):
+                val += parse_term()
+            elif consume('-'):
+                val -= parse_term()
+            else:
+                break
+        return val
+
+    value = parse_expr()
+    if idx != len(s):
+        raise ValueError("Unexpected trailing characters")
+    return value, details
+
+
+def _bench(label: str, func, expr: str, number: int) -> float:
+    seconds = timeit.timeit(lambda: func(expr), number=number)
+    per_call_us = seconds / number * 1e6
+    print(f"{label:<10} {expr:<14} {per_call_us:8.2f} us/call")
+    return per_call_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    _dice.clear_cache()
+    for expr in EXPRESSIONS:
+        legacy = _bench("legacy", legacy_roll_expression, expr, args.number)
+        cached = _bench("compiled", _dice.roll_expression, expr, args.number)
+        print(f"{'':<10} {'speedup':<14} {legacy / cached:8.2f}x")
+    stats = _dice.cache_stats()
+    print(f"cache: hits={stats['hits']} misses={stats['misses']} size={stats['size']}/{stats['maxsize']}")
+
+
+if __name__ == "__main__":
+    main()
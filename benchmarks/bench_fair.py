@@ -0,0 +1,85 @@
+"""公平暗骰基准：熵池补充耗时与密码学随机数的 rolls/sec。
+
+- refill：不同块大小下一次 `os.urandom` 生成整块的耗时与吞吐
+- rolls/sec：逐次 `secrets.randbelow` vs 熵池 die(100) / roll(3, 6)（含换块）；同步补充与后台预取两种情形
+- commit：一次完整的公平暗骰（掷骰 + 承诺 sha256 + 登记）的耗时
+
+用法（在仓库根目录）：python -m benchmarks.bench_fair [--number N]
+"""
+
+import os
+import time
+import asyncio
+import secrets
+import argparse
+import timeit
+
+from cogs import _core, _fair, _locks, _store, _streams
+
+CHANNEL = 1
+
+
+class User:
+    def __init__(self, user_id: int, name: str) -> None:
+        self.id = user_id
+        self.name = name
+
+
+def _per_call(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+async def _prefetched(pool: _fair.EntropyPool, number: int) -> float:
+    """在事件循环中掷骰：每处理一批让出一次，使后台预取的备用块有机会就绪。"""
+    start = time.perf_counter()
+    for done in range(number):
+        pool.die(100)
+        if done % 256 == 0:
+            await asyncio.sleep(0)
+    return (time.perf_counter() - start) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.number
+
+    print(f"{'refill bytes':<14} {'us':>9} {'MB/s':>8}")
+    for size in (1024, 4096, 16384, 65536, 262144):
+        seconds = _per_call(lambda: os.urandom(size), max(10, 2_000_000 // size))
+        print(f"{size:<14} {seconds * 1e6:9.1f} {size / seconds / 1e6:8.1f}")
+
+    print()
+    print(f"{'roll':<32} {'rolls/sec':>12}")
+    small, pool = _fair.EntropyPool(1024), _fair.EntropyPool(16384)
+    rows = [
+        ("secrets.randbelow(100)+1", lambda: secrets.randbelow(100) + 1),
+        ("pool.die(100), 1 KiB blocks", lambda: small.die(100)),
+        ("pool.die(100), 16 KiB blocks", lambda: pool.die(100)),
+    ]
+    for label, func in rows:
+        print(f"{label:<32} {1 / _per_call(func, n):12,.0f}")
+    print(f"{'pool.roll(3, 6)':<32} {1 / _per_call(lambda: pool.roll(3, 6), n // 3):12,.0f}")
+
+    async def run_prefetched() -> tuple[float, _fair.EntropyPool]:
+        pool = _fair.EntropyPool(16384)
+        seconds = await _prefetched(pool, n)
+        return seconds, pool
+
+    seconds, loop_pool = asyncio.run(run_prefetched())
+    print(
+        f"{'pool.die(100), event loop':<32} {1 / seconds:12,.0f}  "
+        f"(refills {loop_pool.refills}, synchronous {loop_pool.sync_refills})"
+    )
+
+    print()
+    core = _core.CommandCore(_store.AttrStore(), _locks.KeyedLocks(), _streams.StreamService("bench"), _fair.FairDice(max_pending=n))
+    user = User(42, "alice")
+    for fair in (False, True):
+        seconds = _per_call(lambda: core.secret_roll(CHANNEL, user, "1d100", fair=fair), max(1, n // 20))
+        print(f"{'secret 1d100' + (' fair' if fair else ''):<32} {seconds * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
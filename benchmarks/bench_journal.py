@@ -0,0 +1,105 @@
+"""事件日志基准：写入大量事件后，比较“快照 + 尾部重放”与“全量重放”（从不写快照）的恢复耗时。
+
+同时报告磁盘占用（其中保留的归档日志单独列出）、恢复后常驻内存的频道数与一次 /history 查询的耗时，
+并校验两种恢复读出的每个频道状态一致。
+
+用法（在仓库根目录）：python -m benchmarks.bench_journal [--events N] [--snapshot-every K] [--history G]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from cogs._journal import JournalBackend
+from cogs._store import OP_DEL, OP_KP, OP_SET, Event
+
+LABELS = ["STR", "CON", "DEX", "POW", "HP", "MP", "Sanity", "Luck", "Spot Hidden", "Dodge"]
+BATCH = 256
+
+
+def _events(count: int, channels: int, users: int):
+    rnd = random.Random(0)
+    now = time.time()
+    for i in range(count):
+        channel_id = rnd.randrange(channels)
+        user_id = rnd.randrange(users)
+        r = rnd.random()
+        if r < 0.9:
+            label = rnd.choice(LABELS)
+            ev = Event(OP_SET, channel_id, user_id, ((label.lower(), label, rnd.randint(1, 99)),), "add", user_id)
+        elif r < 0.99:
+            ev = Event(OP_DEL, channel_id, user_id, (rnd.choice(LABELS).lower(),), "remove", user_id)
+        else:
+            ev = Event(OP_KP, channel_id, user_id, (), "kp", user_id)
+        yield ev._replace(ts=now + i * 0.001)
+
+
+def _write(directory: str, count: int, snapshot_every: int, history: int, channels: int, users: int) -> float:
+    backend = JournalBackend(directory, snapshot_every=snapshot_every, history=history)
+    start = time.perf_counter()
+    batch: list[Event] = []
+    for ev in _events(count, channels, users):
+        batch.append(ev)
+        if len(batch) >= BATCH:
+            backend.write(batch)
+            batch = []
+    if batch:
+        backend.write(batch)
+    elapsed = time.perf_counter() - start
+    backend.close()
+    return elapsed
+
+
+def _recover(directory: str) -> tuple[float, JournalBackend]:
+    start = time.perf_counter()
+    backend = JournalBackend(directory, snapshot_every=0)
+    return time.perf_counter() - start, backend
+
+
+def _disk_mb(directory: str, suffix: str = "") -> float:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(suffix)) / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--snapshot-every", type=int, default=100_000)
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--history", type=int, default=20, help="保留的归档日志代数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as snap_dir, tempfile.TemporaryDirectory() as full_dir:
+        for directory, every, name in ((snap_dir, args.snapshot_every, f"snapshot every {args.snapshot_every}"),
+                                       (full_dir, 0, "no snapshots")):
+            elapsed = _write(directory, args.events, every, args.history, args.channels, args.users)
+            print(f"write ({name}): {args.events} events in {elapsed:.2f}s ({args.events / elapsed:,.0f} ev/s), "
+                  f"on disk {_disk_mb(directory):.1f} MB ({_disk_mb(directory, '.archive.jsonl'):.1f} MB archived)")
+
+        seconds, snap = _recover(snap_dir)
+        print(f"recover (snapshot + tail): {seconds * 1000:.1f} ms, replayed {snap._since_snapshot} events, "
+              f"{len(snap._changed)} channels in memory, {len(snap._tail)} with pending records")
+        seconds, full = _recover(full_dir)
+        print(f"recover (full replay): {seconds * 1000:.1f} ms, replayed {full._since_snapshot} events, "
+              f"{len(full._changed)} channels in memory, {len(full._tail)} with pending records")
+
+        for channel_id in range(args.channels):
+            assert _plain(snap.load_channel(channel_id)) == _plain(full.load_channel(channel_id)), channel_id
+        print("state check: snapshot + tail matches full replay for every channel")
+
+        start = time.perf_counter()
+        events = snap.history(args.channels - 1, 20)
+        print(f"history (20 latest changes of one channel): {(time.perf_counter() - start) * 1000:.1f} ms, {len(events)} events")
+        snap.close()
+        full.close()
+
+
+def _plain(loaded) -> tuple:
+    users, kp = loaded
+    return {u: {k: (a.label, a.value) for k, a in attrs.items()} for u, attrs in users.items()}, kp
+
+
+if __name__ == "__main__":
+    main()
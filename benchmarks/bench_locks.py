@@ -0,0 +1,78 @@
+"""角色卡锁基准：无竞争加锁延迟 + 经 `CommandCore` 的并发 `add HP -1` / SC 吞吐与最终值校验。
+
+压力部分同时发起 N 次 `add_attrs("HP -1")` 与 N/4 次 `sc_roll`（损失固定为 1），
+最终值必须精确等于初值减去操作数；经 Cog 与 SC 按钮的同类校验见 tests/test_locks.py。
+用法（在仓库根目录）：python -m benchmarks.bench_locks [--ops N] [--users U]
+"""
+
+import argparse
+import asyncio
+import time
+
+from cogs._core import CommandCore
+from cogs._fair import FairDice
+from cogs._locks import KeyedLocks
+from cogs._store import AttrStore
+from cogs._streams import StreamService
+
+CHANNEL_ID = 1
+START_HP = 1_000_000
+
+
+class User:
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+        self.name = f"user{user_id}"
+
+
+async def _stress(ops: int, users: int) -> tuple[float, CommandCore]:
+    core = CommandCore(AttrStore(), KeyedLocks(), StreamService("bench"), FairDice())
+    sheet = [("hp", "HP", START_HP), ("sanity", "Sanity", START_HP)]
+    targets = [User(user_id) for user_id in range(users)]
+    for user in targets:
+        core.store.set_attrs(CHANNEL_ID, user.id, sheet)
+    adds = [core.add_attrs(CHANNEL_ID, [targets[i % users]], "HP -1", actor_id=i % users) for i in range(ops)]
+    clicks = [core.sc_roll(CHANNEL_ID, targets[i % users], "1", "1") for i in range(ops // 4)]
+    start = time.perf_counter()
+    replies = await asyncio.gather(*adds, *clicks)
+    elapsed = time.perf_counter() - start
+    assert not any(reply.error for reply in replies)
+    return elapsed, core
+
+
+def _expected(start: int, ops: int, users: int) -> list[int]:
+    return [start - ops // users - (1 if u < ops % users else 0) for u in range(users)]
+
+
+async def _uncontended(number: int) -> float:
+    locks = KeyedLocks()
+    start = time.perf_counter()
+    for i in range(number):
+        async with locks(CHANNEL_ID, i & 1023):
+            pass
+    return (time.perf_counter() - start) / number * 1e9
+
+
+async def _main(args: argparse.Namespace) -> None:
+    print(f"uncontended acquire+release: {await _uncontended(args.number):.0f} ns")
+
+    elapsed, core = await _stress(args.ops, args.users)
+    hp = [core.store.user_attrs(CHANNEL_ID, u)["hp"].value for u in range(args.users)]
+    san = [core.store.user_attrs(CHANNEL_ID, u)["sanity"].value for u in range(args.users)]
+    assert hp == _expected(START_HP, args.ops, args.users), f"final HP mismatch: {hp[:5]}"
+    assert san == _expected(START_HP, args.ops // 4, args.users), f"final Sanity mismatch: {san[:5]}"
+    assert len(core.locks) == 0, "lock registry should be empty after all holders exit"
+    total = args.ops + args.ops // 4
+    print(f"core add + sc: {total} ops in {elapsed * 1000:.1f} ms, final values OK, {core.locks.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200_000)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
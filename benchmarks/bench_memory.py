@@ -0,0 +1,70 @@
+"""属性存储内存基准：{"label", "value"} 字典 vs __slots__ 的 Attr 记录。
+
+按相同结构（channel -> user -> key）载入若干合成角色卡，用 tracemalloc 统计占用。
+用法（在仓库根目录）：python -m benchmarks.bench_memory [--sheets N]
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+
+from cogs._store import Attr
+
+LABELS = [
+    "STR", "CON", "DEX", "APP", "POW", "SIZ", "INT", "EDU", "LUCK",
+    "HP", "MP", "Sanity", "Spot Hidden", "Listen", "Library Use", "Dodge",
+]
+USERS_PER_CHANNEL = 5
+
+
+def _synthetic_rows(sheets: int):
+    rnd = random.Random(0)
+    for sheet in range(sheets):
+        channel_id, user_id = divmod(sheet, USERS_PER_CHANNEL)
+        for label in LABELS:
+            # 模拟从存储读取：每行的 label 都是独立的字符串对象
+            yield channel_id, user_id, "".join(label).lower(), "".join(label), rnd.randint(1, 99)
+        yield channel_id, user_id, "name", "NAME", f"Investigator {sheet}"
+
+
+def _load_dicts(sheets: int) -> dict:
+    data: dict = {}
+    for channel_id, user_id, key, label, value in _synthetic_rows(sheets):
+        data.setdefault(channel_id, {}).setdefault(user_id, {})[key] = {"label": label, "value": value}
+    return data
+
+
+def _load_records(sheets: int) -> dict:
+    data: dict = {}
+    for channel_id, user_id, key, label, value in _synthetic_rows(sheets):
+        data.setdefault(channel_id, {}).setdefault(user_id, {})[key] = Attr(label, value)
+    return data
+
+
+def _measure(loader, sheets: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    data = loader(sheets)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sheets", type=int, default=100_000)
+    args = parser.parse_args()
+
+    attrs_total = args.sheets * (len(LABELS) + 1)
+    before = _measure(_load_dicts, args.sheets)
+    after = _measure(_load_records, args.sheets)
+    print(f"sheets={args.sheets} attrs={attrs_total}")
+    print(f"dict   : {before / 2**20:8.1f} MiB ({before / attrs_total:6.1f} B/attr)")
+    print(f"Attr   : {after / 2**20:8.1f} MiB ({after / attrs_total:6.1f} B/attr)")
+    print(f"saving : {(1 - after / before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""命令指标开销基准：每条命令记录一次（begin + finish）的耗时，以及一次抓取（render）的耗时。
+
+用法（在仓库根目录）：python -m benchmarks.bench_metrics [--number N] [--commands C]
+"""
+
+import argparse
+import random
+import time
+
+from cogs._metrics import Registry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200_000)
+    parser.add_argument("--commands", type=int, default=30)
+    args = parser.parse_args()
+
+    registry = Registry()
+    names = [f"cmd{i}" for i in range(args.commands)]
+    picks = [(random.choice(("slash", "text")), random.choice(names), random.random() < 0.5) for _ in range(args.number)]
+
+    start = time.perf_counter()
+    for kind, name, deferred in picks:
+        t0 = registry.begin(kind)
+        registry.finish(kind, name, t0, defer=0.05 if deferred else None)
+    per_command = (time.perf_counter() - start) / args.number
+    print(f"record: {per_command * 1e6:.2f} us/command (begin + finish)")
+
+    runs = 50
+    start = time.perf_counter()
+    for _ in range(runs):
+        text = registry.render()
+    per_render = (time.perf_counter() - start) / runs
+    print(f"render: {per_render * 1000:.2f} ms/scrape ({len(text.splitlines())} lines, {len(text)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""出站队列基准：同一频道的突发结果直接发送 vs 经 `_outbox` 合并与节流。
+
+用模拟频道代替 Discord：每次发送有固定网络延迟，并按 Discord 频道限速（任意 5 秒内最多 5 条）
+模拟 429：超限的发送等待 retry_after 后重试。报告发送的消息数、触发 429 的次数与每条结果的送达延迟。
+用法（在仓库根目录）：python -m benchmarks.bench_outbox [--payloads N] [--spread S] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+
+from cogs._outbox import Outbox
+
+RATE_LIMIT = 5
+RATE_PERIOD = 5.0
+
+
+class FakeChannel:
+    def __init__(self, latency: float) -> None:
+        self.id = 1
+        self.latency = latency
+        self.sent: list[str] = []
+        self.limited = 0
+        self._recent: deque[float] = deque()
+
+    async def send(self, content: str) -> str:
+        while True:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= RATE_PERIOD:
+                self._recent.popleft()
+            if len(self._recent) < RATE_LIMIT:
+                break
+            # 与 discord.py 一样收到 429 后等待 retry_after 再重试
+            self.limited += 1
+            await asyncio.sleep(self._recent[0] + RATE_PERIOD - now)
+        self._recent.append(now)
+        assert len(content) <= 2000, len(content)
+        await asyncio.sleep(self.latency)
+        self.sent.append(content)
+        return content
+
+
+async def _burst(send, payloads: list[str], spread: float) -> list[float]:
+    """在 spread 秒内随机时刻发出各条结果，返回每条的送达延迟。"""
+    delays: list[float] = []
+
+    async def one(text: str, at: float) -> None:
+        await asyncio.sleep(at)
+        start = time.monotonic()
+        await send(text)
+        delays.append(time.monotonic() - start)
+
+    await asyncio.gather(*(one(p, random.uniform(0, spread)) for p in payloads))
+    return delays
+
+
+def _report(label: str, channel: FakeChannel, delays: list[float]) -> None:
+    delays.sort()
+    p95 = delays[int(len(delays) * 0.95) - 1]
+    print(
+        f"{label:>7}: {len(channel.sent):4d} messages | {channel.limited:4d} rate-limited"
+        f" | delay avg {sum(delays) / len(delays) * 1000:7.1f}ms p95 {p95 * 1000:7.1f}ms"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    random.seed(0)
+    payloads = [f"[Roll] 1d100+{i}: {random.randint(1, 100)}" for i in range(args.payloads)]
+    latency = args.latency / 1000
+
+    direct = FakeChannel(latency)
+    _report("direct", direct, await _burst(direct.send, payloads, args.spread))
+
+    queued = FakeChannel(latency)
+    outbox = Outbox()
+    _report("outbox", queued, await _burst(lambda text: outbox.send(queued, text), payloads, args.spread))
+    print("  stats:", {k: round(v, 1) if isinstance(v, float) else v for k, v in outbox.stats().items()})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payloads", type=int, default=30)
+    parser.add_argument("--spread", type=float, default=2.0, help="结果到达的时间跨度（秒）")
+    parser.add_argument("--latency", type=float, default=60.0, help="单次发送的网络延迟（毫秒）")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""参数解析微基准：改造前的内联正则 vs `_core` 中预编译的解析函数。
+
+每个解析器给出三列：legacy（复制自改造前的实现，每次调用经 `re` 模块缓存查找或重新编译）、
+precompiled（预编译正则，不经 lru_cache）、cached（实际调用路径，含 lru_cache 命中）。
+mention 清理另测“每次不同用户”的情形：旧实现为每个用户 id 生成新的正则，超出 `re` 缓存后每次都要编译。
+
+用法（在仓库根目录）：python -m benchmarks.bench_parsers [--number N]
+"""
+
+import re
+import argparse
+import itertools
+import timeit
+
+from cogs import _core
+
+_ids = itertools.count(10**17)
+
+
+# ---------------- Legacy (copied from the handlers before precompilation) ----------------
+def legacy_strip_mentions(arg: str, user_ids: list[int]) -> str:
+    cleaned = arg
+    for user_id in user_ids:
+        cleaned = re.sub(rf'<@!?{user_id}>', '', cleaned)
+    return cleaned
+
+
+def legacy_parse_target(arg: str) -> int | str:
+    m = re.match(r"^\s*(\d+)\s*$", arg or "")
+    return int(m.group(1)) if m else arg
+
+
+def legacy_parse_items(items: str) -> list[tuple[str, int]]:
+    parts = re.split(r"[，,]+", items)
+    pairs: list[tuple[str, int]] = []
+    for raw in parts:
+        seg = raw.strip()
+        if not seg:
+            continue
+        m = re.match(r"^(.+?)\s*(-?\d+)\s*$", seg)
+        if not m:
+            raise ValueError(seg)
+        pairs.append((m.group(1), int(m.group(2))))
+    return pairs
+
+
+def legacy_parse_names(items: str) -> list[str]:
+    return [name.strip() for name in re.split(r"[，,]+", items) if name.strip()]
+
+
+def legacy_parse_at_least(expr: str) -> tuple[str, int | None]:
+    m = re.match(r"^(.*?)\s*>=\s*(-?\d+)\s*$", expr)
+    if m:
+        return m.group(1).strip(), int(m.group(2))
+    return expr, None
+
+
+def legacy_parse_count_expr(arg: str) -> tuple[int, str] | None:
+    m = re.match(r"^\s*(\d+)\s+(.+?)\s*$", arg or "")
+    return (int(m.group(1)), m.group(2)) if m else None
+
+
+def _uncached(func):
+    return getattr(func, "__wrapped__", func)
+
+
+def _us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.number
+
+    alice, bob = 123456789012345678, 876543210987654321
+    mention_arg = f"<@{alice}> <@!{bob}> Spot Hidden"
+    cases = [
+        ("target '65'", legacy_parse_target, _core.parse_target, "65"),
+        ("target 'Spot Hidden'", legacy_parse_target, _core.parse_target, "Spot Hidden"),
+        ("items x3", legacy_parse_items, _core.parse_items, "STR 60, Dex 50, Move Rate 8"),
+        ("items x8", legacy_parse_items, _core.parse_items,
+         "STR 60, CON 50, DEX 55, APP 45, POW 70, SIZ 65, INT 80, EDU 75"),
+        ("names x3", legacy_parse_names, _core.parse_names, "HP, MP, Spot Hidden"),
+        ("loss '1d3/1d10'", lambda s: s.split("/", 1), _core.parse_loss, "1d3/1d10"),
+        ("prob '3d6 >= 12'", legacy_parse_at_least, _core.parse_at_least, "3d6 >= 12"),
+        ("rollmany '12 1d100'", legacy_parse_count_expr, _core.parse_count_expr, "12 1d100"),
+    ]
+
+    print(f"{'parser':<24} {'legacy us':>10} {'precompiled':>12} {'cached':>8}")
+    for label, legacy, new, arg in cases:
+        legacy_us = _us(lambda: legacy(arg), n)
+        raw_us = _us(lambda: _uncached(new)(arg), n)
+        cached_us = _us(lambda: new(arg), n)
+        print(f"{label:<24} {legacy_us:10.2f} {raw_us:12.2f} {cached_us:8.2f}")
+
+    print()
+    print(f"{'mention strip':<24} {'legacy us':>10} {'single-pass':>12}")
+    legacy_us = _us(lambda: legacy_strip_mentions(mention_arg, [alice, bob]), n)
+    new_us = _us(lambda: _core.strip_mentions(mention_arg, {alice, bob}), n)
+    print(f"{'2 mentions, same users':<24} {legacy_us:10.2f} {new_us:12.2f}")
+
+    # 每次调用都是新用户：旧实现每次都要为新的 id 编译正则
+    def legacy_fresh() -> None:
+        uid = next(_ids)
+        legacy_strip_mentions(f"<@{uid}> Spot Hidden", [uid])
+
+    def new_fresh() -> None:
+        uid = next(_ids)
+        _core.strip_mentions(f"<@{uid}> Spot Hidden", {uid})
+
+    fresh_n = max(1, n // 10)
+    print(f"{'1 mention, new user':<24} {_us(legacy_fresh, fresh_n):10.2f} {_us(new_fresh, fresh_n):12.2f}")
+    no_mention = "Spot Hidden 60"
+    print(f"{'no mention':<24} {_us(lambda: legacy_strip_mentions(no_mention, [alice]), n):10.2f} "
+          f"{_us(lambda: _core.strip_mentions(no_mention, {alice}), n):12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""/prob 分布计算基准：首次计算（未命中缓存）与缓存命中的耗时。
+
+用法（在仓库根目录）：python -m benchmarks.bench_prob
+"""
+
+import time
+
+from cogs import _prob
+
+EXPRESSIONS = ["1d100", "3d6*5", "(2d6+6)*5", "1d3+1d10-2", "10d10*1d6", "100d1000"]
+
+
+def main() -> None:
+    backend = "numpy" if _prob._np is not None else "python"
+    print(f"backend: {backend}")
+    for expr in EXPRESSIONS:
+        start = time.perf_counter()
+        dist = _prob.distribution(expr)
+        cold_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        _prob.distribution(expr)
+        warm_us = (time.perf_counter() - start) * 1e6
+        print(f"{expr:<12} support={len(dist.probs):>6} cold={cold_ms:9.2f} ms warm={warm_us:7.2f} us")
+    stats = _prob.cache_stats()
+    print(f"cache: hits={stats['hits']} misses={stats['misses']} size={stats['size']}/{stats['maxsize']} cells={stats['cells']}/{stats['max_cells']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""掷骰后端基准：逐个 randint vs 批量后端，覆盖 count x sides 网格。
+
+用法（在仓库根目录）：python -m benchmarks.bench_rng [--number N]
+"""
+
+import argparse
+import random
+import timeit
+
+from cogs import _rng
+
+COUNTS = [1, 10, 100, 1000, 10000]
+SIDES = [6, 100, 1000]
+
+
+def _randint_loop(count: int, sides: int) -> list[int]:
+    return [random.randint(1, sides) for _ in range(count)]
+
+
+def _per_die_ns(func, count: int, sides: int, number: int) -> float:
+    seconds = timeit.timeit(lambda: func(count, sides), number=number)
+    return seconds / number / count * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    candidates = [("randint", _randint_loop)]
+    for name in _rng.available_backends():
+        candidates.append((name, _rng.make_backend(name).roll))
+
+    header = f"{'count':>6} {'sides':>5} " + " ".join(f"{name:>10}" for name, _ in candidates)
+    print(header + "   (ns/die)")
+    for count in COUNTS:
+        # 大批量时减少重复次数，保持总耗时可控
+        number = max(5, args.number * 100 // max(100, count))
+        for sides in SIDES:
+            cells = [f"{_per_die_ns(func, count, sides, number):10.1f}" for _name, func in candidates]
+            print(f"{count:>6} {sides:>5} " + " ".join(cells))
+
+    bits_number = args.number * 10
+    for n in (10, 1000):
+        seconds = timeit.timeit(lambda: _rng.coin_bits(n), number=bits_number)
+        print(f"coin_bits({n}): {seconds / bits_number * 1e6:.2f} us/call ({_rng.get_backend().name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""批量掷骰基准：N 次 `roll_expression` vs 一次 `evaluate_many`；stream 列为 /rollmany 实际走的频道子流路径。
+
+用法（在仓库根目录）：python -m benchmarks.bench_rollmany [--trials N] [--number K]
+"""
+
+import argparse
+import timeit
+
+from cogs import _batch, _dice, _rng, _streams
+
+EXPRESSIONS = ["1d100", "3d6*5", "(2d6+6)*5", "3d6*5+1d4-2", "10d10"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    n = args.trials
+    print(f"trials={n} backend={_rng.get_backend().name}")
+    print(f"{'expr':<14} {'loop':>10} {'batched':>10} {'speedup':>8} {'stream':>10} {'render':>10}   (ms per request)")
+    for expr in EXPRESSIONS:
+        program = _dice.compile_expression(expr)
+        loop = timeit.timeit(lambda: [_dice.roll_expression(expr)[0] for _ in range(n)], number=args.number)
+        batched = timeit.timeit(lambda: _dice.evaluate_many(program, n), number=args.number)
+        stream = timeit.timeit(lambda: _dice.evaluate_many(program, n, _streams.Stream(1)), number=args.number)
+        totals = _dice.evaluate_many(program, n)
+        render = timeit.timeit(lambda: _batch.format_result(expr, totals), number=args.number)
+        loop, batched, stream, render = (t / args.number * 1000 for t in (loop, batched, stream, render))
+        print(f"{expr:<14} {loop:10.2f} {batched:10.2f} {loop / batched:7.1f}x {stream:10.2f} {render:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""冷启动导入基准：正常加载 vs 懒加载（COGS_LAZY=1）启动时需要导入的模块。
+
+在子进程中用 `python -X importtime` 分别执行两种模式启动阶段的导入，
+统计总导入耗时、进程墙钟时间与最重的模块（取多次运行的最小值）。需要安装 discord.py。
+用法（在仓库根目录）：python -m benchmarks.bench_startup [--runs N] [--top K]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 两种模式在 setup_hook 阶段实际导入的内容
+EAGER = "import discord.ext.commands, cogs._extensions\nfor m in cogs._extensions.discover(): __import__(m)"
+LAZY = (
+    "import discord.ext.commands, cogs._extensions, cogs._manifest\n"
+    "lazy = cogs._extensions._info('cogs').lazy\n"
+    "for m in cogs._extensions.discover():\n"
+    "    if m not in lazy or cogs._manifest.read_manifest(m) is None: __import__(m)"
+)
+
+
+def _run(code: str) -> tuple[float, dict[str, int]]:
+    """返回 (进程墙钟秒数, {模块: 累计导入微秒})。"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+    modules: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        # 名称前的缩进表示嵌套层级（首个空格为分隔符）
+        modules[name[1:].rstrip()] = int(cumulative)
+    return elapsed, modules
+
+
+def _measure(code: str, runs: int) -> tuple[float, int, dict[str, int]]:
+    best_wall, best_total, best_modules = float("inf"), 0, {}
+    for _ in range(runs):
+        wall, modules = _run(code)
+        # 顶层导入（无缩进）的累计耗时之和即总导入耗时
+        total = sum(us for name, us in modules.items() if not name.startswith(" "))
+        if wall < best_wall:
+            best_wall, best_total, best_modules = wall, total, modules
+    return best_wall, best_total, best_modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    # 先预热一次，确保清单缓存与 .pyc 已生成
+    try:
+        _run(LAZY)
+    except RuntimeError as exc:
+        print(f"cannot run benchmark: {exc}")
+        return
+
+    results = {}
+    for label, code in (("eager", EAGER), ("lazy", LAZY)):
+        wall, total, modules = _measure(code, args.runs)
+        results[label] = total
+        print(f"{label:>5}: imports {total / 1000:7.1f}ms | process {wall * 1000:7.1f}ms | {len(modules)} modules")
+        heaviest = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[: args.top]
+        for name, us in heaviest:
+            print(f"        {us / 1000:7.1f}ms  {name.strip()}")
+    saved = results["eager"] - results["lazy"]
+    print(f"saved: {saved / 1000:.1f}ms ({saved / max(1, results['eager']):.0%} of import time)")
+
+
+if __name__ == "__main__":
+    main()
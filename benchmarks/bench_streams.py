@@ -0,0 +1,74 @@
+"""频道随机数流基准：全局 `random.randint` vs 块预生成的频道流，以及按位置重放的耗时。
+
+- d100 / 3d6 / 100d6：每次抽取的微秒数；stream 为直接从流抽取，recorded 为经 `Recorder`（含掷骰日志写入）的实际命令路径，
+  d100 额外给出 `die()` 的直接抽取与整条命令（draw + die + 日志）的耗时，以及单骰命令走 `StreamService.die` 快捷路径的耗时
+- replay：在不同流位置重放一次 d100（需重新生成该位置之前的全部块）
+- 同时校验同一种子两次生成的序列一致、重放结果与记录一致
+
+用法（在仓库根目录）：python -m benchmarks.bench_streams [--number N]
+"""
+
+import random
+import argparse
+import timeit
+
+from cogs import _streams
+
+CHANNEL = 1
+
+
+def _us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def _recorded(streams: _streams.StreamService, count: int, sides: int):
+    def run() -> None:
+        with streams.draw(CHANNEL, 42, "bench") as rng:
+            rng.roll(count, sides)
+    return run
+
+
+def _recorded_die(streams: _streams.StreamService):
+    def run() -> None:
+        with streams.draw(CHANNEL, 42, "bench") as rng:
+            rng.die(100)
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.number
+
+    streams = _streams.StreamService("bench", log_size=200)
+    stream = _streams.Stream(12345)
+    print(f"{'draw':<10} {'randint us':>11} {'stream us':>10} {'recorded us':>12}")
+    for count, sides in ((1, 100), (3, 6), (100, 6)):
+        legacy_us = _us(lambda: [random.randint(1, sides) for _ in range(count)], n)
+        stream_us = _us(lambda: stream.roll(count, sides), n)
+        recorded_us = _us(_recorded(streams, count, sides), n)
+        print(f"{f'{count}d{sides}':<10} {legacy_us:11.2f} {stream_us:10.2f} {recorded_us:12.2f}")
+    print(f"{'d100 die()':<10} {_us(lambda: random.randint(1, 100), n):11.2f} {_us(lambda: stream.die(100), n):10.2f} {_us(_recorded_die(streams), n):12.2f}")
+    print(f"{'d100 fast':<10} {'':>11} {'':>10} {_us(lambda: streams.die(CHANNEL, 42, 'bench', 100), n):12.2f}")
+
+    # 同一种子的两条流逐块一致
+    a, b = _streams.Stream(7), _streams.Stream(7)
+    assert a.roll(5000, 100) == b.roll(5000, 100), "streams with the same seed diverged"
+
+    print()
+    print(f"{'replay at position':<20} {'ms':>8} {'result':>8}")
+    replay_streams = _streams.StreamService("bench")
+    for target in (0, 10_000, 100_000, 1_000_000):
+        channel = replay_streams._channel(CHANNEL)
+        channel.stream.seek(max(target, channel.stream.position))
+        with replay_streams.draw(CHANNEL, 42, "d100") as rng:
+            rng.die(100)
+        record = replay_streams.recent(CHANNEL, 1)[0]
+        seconds = min(timeit.repeat(lambda: replay_streams.replay(CHANNEL, record), number=1, repeat=3))
+        verdict = "match" if replay_streams.replay(CHANNEL, record) == record else "MISMATCH"
+        print(f"{record.position:<20} {seconds * 1000:8.2f} {verdict:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""离线负载生成器：不连接 Discord，直接驱动真实的 Cog。
+
+构建 `RngHelperBot` 并加载 `cogs/` 下的全部扩展（属性存储仅在内存中，不启动指标 HTTP 服务），
+用替身 Interaction / Context（`fakes`）调用命令处理函数，按流量组合（`mixes`）并发回放，
+报告吞吐量（commands/sec）与处理耗时的 p50 / p99。需要安装 discord.py。
+
+用法（在仓库根目录）：python -m benchmarks.loadgen [--mix roll|sheet|sc|all] [--concurrency C] [--requests N]
+"""
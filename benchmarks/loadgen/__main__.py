@@ -0,0 +1,165 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import argparse
+import traceback
+from collections import Counter
+
+from . import __doc__ as DOC
+from .fakes import FakeChannel, FakeContext, FakeInteraction, FakeUser, Sink
+from .mixes import MIXES
+
+# 每个角色卡预置的属性
+SHEET = [
+    ("str", "STR", 60), ("dex", "DEX", 50), ("hp", "HP", 12), ("sanity", "Sanity", 99),
+    ("spot hidden", "Spot Hidden", 55), ("luck", "Luck", 50),
+]
+
+
+class Harness:
+    """持有 bot、替身频道 / 用户与命令索引，供流量组合调用。"""
+
+    def __init__(self, bot, channels: int, users: int, latency: float) -> None:
+        self.bot = bot
+        self.sink = Sink(latency)
+        self.channels = [FakeChannel(self.sink) for _ in range(channels)]
+        self.users = {c.id: [FakeUser(self.sink) for _ in range(users)] for c in self.channels}
+        self.kps = {c.id: FakeUser(self.sink, name=f"kp{c.id}") for c in self.channels}
+        self.views: dict[int, object] = {}
+        self._slash = {cmd.name: cmd for cmd in bot.tree.get_commands()}
+        self._text = {cmd.name: cmd for cmd in bot.commands}
+
+    async def prepare(self) -> None:
+        """预置角色卡与 KP，并由各频道 KP 发起一次 SC 以取得按钮。"""
+        store = self.bot._coc_store
+        for channel in self.channels:
+            for user in self.users[channel.id]:
+                store.set_attrs(channel.id, user.id, SHEET, cmd="loadgen")
+                store.set_attrs(channel.id, user.id, [("name", "NAME", user.name)], cmd="loadgen")
+            kp = self.kps[channel.id]
+            store.set_kp(channel.id, kp.id, cmd="loadgen")
+            await self.call_slash("sc", channel, kp, loss="1d3/1d10")
+            self.views[channel.id] = self.sink.last_view
+
+    async def call_slash(self, name: str, channel, user, **kwargs) -> None:
+        cmd = self._slash[name]
+        await cmd.callback(cmd.binding, FakeInteraction(self.bot, user, channel, self.sink), **kwargs)
+
+    async def call_text(self, name: str, channel, user, **kwargs) -> None:
+        cmd = self._text[name]
+        await cmd.callback(cmd.cog, FakeContext(self.bot, user, channel, self.sink), **kwargs)
+
+    async def click_sc(self, channel, user) -> None:
+        view = self.views[channel.id]
+        await view.sc_button.callback(FakeInteraction(self.bot, user, channel, self.sink))
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+async def _build_bot():
+    # 离线运行：属性只存内存、不启动指标端口、不懒加载
+    os.environ["COC_DB_PATH"] = ""
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["COGS_LAZY"] = "0"
+    from bot import RngHelperBot
+    from cogs import _extensions
+
+    logging.getLogger().setLevel(logging.WARNING)
+    bot = RngHelperBot()
+    results = await _extensions.load_all(bot, "cogs")
+    failed = [r for r in results if r.error is not None]
+    if failed:
+        raise RuntimeError(", ".join(f"{r.name}: {r.error}" for r in failed))
+    return bot
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    if not args.outbox:
+        os.environ["COC_OUTBOX"] = "0"
+    bot = await _build_bot()
+    harness = Harness(bot, args.channels, args.users, args.latency / 1000)
+    await harness.prepare()
+
+    rng = random.Random(args.seed)
+    mix = MIXES[args.mix]
+    names = [name for name, _w, _op in mix]
+    weights = [w for _name, w, _op in mix]
+    ops = {name: op for name, _w, op in mix}
+
+    def plan(n: int) -> list[tuple[str, object, object]]:
+        picks = []
+        for name in rng.choices(names, weights, k=n):
+            channel = rng.choice(harness.channels)
+            picks.append((name, channel, rng.choice(harness.users[channel.id])))
+        return picks
+
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: Counter[str] = Counter()
+    first_error: list[str] = []
+
+    async def run(picks: list, record: bool) -> None:
+        it = iter(picks)
+
+        async def worker() -> None:
+            for name, channel, user in it:
+                start = time.perf_counter()
+                try:
+                    await ops[name](harness, channel, user)
+                except Exception:
+                    errors[name] += 1
+                    if not first_error:
+                        first_error.append(traceback.format_exc())
+                    continue
+                if record:
+                    latencies[name].append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    await run(plan(args.warmup), record=False)
+    start = time.perf_counter()
+    await run(plan(args.requests), record=True)
+    elapsed = time.perf_counter() - start
+
+    done = sum(len(v) for v in latencies.values())
+    print(
+        f"mix={args.mix} concurrency={args.concurrency} channels={args.channels} users={args.users} "
+        f"latency={args.latency:g}ms outbox={'on' if args.outbox else 'off'}"
+    )
+    print(f"{done} commands in {elapsed:.2f}s -> {done / elapsed:,.0f} commands/sec, {harness.sink.messages} messages sent")
+    print(f"{'command':<22} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    overall: list[float] = []
+    for name in names:
+        values = sorted(latencies[name])
+        overall.extend(values)
+        print(f"{name:<22} {len(values):>7} {_percentile(values, 0.5) * 1000:8.3f} {_percentile(values, 0.99) * 1000:8.3f} {errors[name]:>7}")
+    overall.sort()
+    print(f"{'(all)':<22} {len(overall):>7} {_percentile(overall, 0.5) * 1000:8.3f} {_percentile(overall, 0.99) * 1000:8.3f} {sum(errors.values()):>7}")
+    if first_error:
+        print("first error:\n" + first_error[0])
+
+    for ext in list(bot.extensions):
+        await bot.unload_extension(ext)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=DOC, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="all")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20, help="角色卡数 / 频道")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟每次发送 / defer 的网络延迟（毫秒）")
+    parser.add_argument("--outbox", action="store_true", help="文本命令经出站队列发送（含令牌桶节流）")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
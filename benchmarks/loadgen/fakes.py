@@ -0,0 +1,110 @@
+"""替身对象：只实现 Cog 实际用到的 Interaction / Context / 用户 / 频道属性与方法。
+
+所有发送都进入内存中的计数器（可选模拟网络延迟），最后一次附带的 view 会被保留，
+供 SC 按钮风暴场景取出 `SCButton` 反复点击。
+"""
+
+import asyncio
+import itertools
+
+_ids = itertools.count(10_000)
+
+
+class Sink:
+    """收集所有“发出”的消息；latency 秒模拟一次 HTTP 往返。"""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.messages = 0
+        self.last_view = None
+
+    async def deliver(self, content=None, *, view=None, **_kwargs) -> "FakeMessage":
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        if view is not None:
+            self.last_view = view
+        return FakeMessage(content)
+
+
+class FakeMessage:
+    def __init__(self, content: str | None = None, mentions: list | None = None) -> None:
+        self.id = next(_ids)
+        self.content = content or ""
+        self.mentions = mentions or []
+
+
+class FakeUser:
+    def __init__(self, sink: Sink, user_id: int | None = None, name: str | None = None) -> None:
+        self.id = user_id if user_id is not None else next(_ids)
+        self.name = name or f"user{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class FakeChannel:
+    def __init__(self, sink: Sink, channel_id: int | None = None) -> None:
+        self.id = channel_id if channel_id is not None else next(_ids)
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, sink: Sink) -> None:
+        self._sink = sink
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **_kwargs) -> None:
+        if self._sink.latency:
+            await asyncio.sleep(self._sink.latency)
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs) -> None:
+        self._done = True
+        await self._sink.deliver(content, **kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, sink: Sink) -> None:
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class FakeInteraction:
+    def __init__(self, client, user: FakeUser, channel: FakeChannel, sink: Sink) -> None:
+        self.id = next(_ids)
+        self.client = client
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = None
+        self.guild_id = None
+        self.command = None
+        self.extras: dict = {}
+        self.response = FakeResponse(sink)
+        self.followup = FakeFollowup(sink)
+
+
+class FakeContext:
+    def __init__(self, bot, author: FakeUser, channel: FakeChannel, sink: Sink, content: str = "") -> None:
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.guild = None
+        self.message = FakeMessage(content)
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        return await self._sink.deliver(content, **kwargs)
@@ -0,0 +1,62 @@
+"""流量组合：每个组合是若干 (名称, 权重, 操作) ；操作签名为 `async def op(harness, channel, user)`。
+
+- roll：掷骰为主（/roll、.r、/check 数字、/prob、/rollmany、/flip，少量 /help）
+- sheet：角色卡读写为主（/set、/add、/stats、.check 属性、/groupcheck、/growth）
+- sc：SC 按钮风暴——每个频道的 KP 发起一次 /sc，之后玩家反复点击同一个按钮
+- all：以上全部
+"""
+
+from typing import Awaitable, Callable
+
+Op = Callable[..., Awaitable[None]]
+
+
+def _slash(name: str, **kwargs) -> Op:
+    async def op(h, channel, user) -> None:
+        await h.call_slash(name, channel, user, **kwargs)
+    return op
+
+
+def _text(name: str, **kwargs) -> Op:
+    async def op(h, channel, user) -> None:
+        await h.call_text(name, channel, user, **kwargs)
+    return op
+
+
+async def _click_sc(h, channel, user) -> None:
+    await h.click_sc(channel, user)
+
+
+ROLL = [
+    ("/roll 1d100", 40, _slash("roll", expr="1d100")),
+    (".r (2d6+6)*5", 20, _text("roll", expr="(2d6+6)*5")),
+    ("/check 50", 15, _slash("check", arg="50")),
+    ("/prob 3d6", 5, _slash("prob", expr="3d6")),
+    ("/rollmany 12 1d100", 10, _slash("rollmany", count=12, expr="1d100")),
+    ("/flip 10", 10, _slash("flip", coins=10)),
+    # /ping 依赖网关心跳延迟，离线时为 NaN，故只回放 /help
+    ("/help", 3, _slash("help")),
+]
+
+SHEET = [
+    ("/set", 10, _slash("set", items="STR 60, DEX 50, Spot Hidden 55, HP 12")),
+    ("/add HP -1", 20, _slash("add", items="HP -1")),
+    ("/stats", 15, _slash("stats")),
+    (".check Spot Hidden", 20, _text("check", arg="Spot Hidden")),
+    ("/check DEX", 10, _slash("check", arg="DEX")),
+    ("/groupcheck", 10, _slash("groupcheck", attr="Spot Hidden")),
+    ("/growth", 10, _slash("growth", arg="Spot Hidden")),
+    (".remove Luck", 5, _text("remove", items="Luck")),
+]
+
+SC = [
+    ("SC button", 90, _click_sc),
+    ("/sc 1d3/1d10", 10, _slash("sc", loss="1d3/1d10")),
+]
+
+MIXES: dict[str, list[tuple[str, int, Op]]] = {
+    "roll": ROLL,
+    "sheet": SHEET,
+    "sc": SC,
+    "all": ROLL + SHEET + SC,
+}
@@ -1,11 +1,14 @@
 import os
+import time
 import logging
 import discord
-from typing import Iterable
 
 # 推荐使用 discord.ext.commands 来创建命令
 from discord.ext import commands
 
+from cogs import _extensions
+from cogs._utils import SYNC_STATS, sync_app_commands
+
 
 # ------------------------------
 # Logging (English-only per user rule)
@@ -31,61 +34,23 @@ class RngHelperBot(commands.Bot):
 
     async def setup_hook(self) -> None:
         """启动前：加载 Cogs 并同步应用命令。"""
+        start = time.perf_counter()
         await self._load_all_extensions("cogs")
+        loaded = time.perf_counter()
 
-        # 优先同步到单一测试服，加速开发；否则进行全局同步
-        guild_id_str = os.getenv("DISCORD_GUILD_ID")
-        if guild_id_str:
-            try:
-                guild_id = int(guild_id_str)
-            except ValueError:
-                logger.warning("DISCORD_GUILD_ID is not a valid integer. Falling back to global sync.")
-                guild_id = None
-        else:
-            guild_id = None
-
-        try:
-            if guild_id:
-                guild_obj = discord.Object(id=guild_id)
-                self.tree.copy_global_to(guild=guild_obj)
-                synced = await self.tree.sync(guild=guild_obj)
-                logger.info("Synced %d app commands to guild %s", len(synced), guild_id)
-            else:
-                # 首次启动进行一次全局同步，后续变更由管理命令/热重载触发
-                synced = await self.tree.sync()
-                logger.info("Globally synced %d app commands", len(synced))
-        except Exception as exc:
-            logger.exception("App command sync failed: %s", exc)
+        # 优先同步到单一测试服（DISCORD_GUILD_ID），否则全局同步；命令树未变化时跳过
+        scope, count = await sync_app_commands(self)
+        logger.info(
+            "Startup: extensions %.2fs, app command sync %.2fs (%s, %d commands, sync calls: %d, skipped: %d)",
+            loaded - start, time.perf_counter() - loaded, scope, count,
+            SYNC_STATS["calls"], SYNC_STATS["skipped"],
+        )
 
     async def _load_all_extensions(self, base_package: str) -> None:
-        """Recursively discover and load all extensions from a base package.
-
-        An extension is any .py file that does not start with an underscore.
-        """
-        for ext in self._iter_extension_module_paths(base_package):
-            try:
-                await self.load_extension(ext)
-                logger.info("Loaded extension: %s", ext)
-            except Exception as exc:
-                logger.exception("Failed to load extension %s: %s", ext, exc)
-
-    @staticmethod
-    def _iter_extension_module_paths(base_package: str) -> Iterable[str]:
-        """扫描包下所有可加载的扩展模块路径。"""
-        base_dir = os.path.join(os.path.dirname(__file__), base_package.replace(".", os.sep))
-        if not os.path.isdir(base_dir):
-            return []
-        module_paths = []
-        for root, _dirs, files in os.walk(base_dir):
-            for filename in files:
-                if not filename.endswith(".py"):
-                    continue
-                if filename.startswith("_"):
-                    continue
-                relative = os.path.relpath(os.path.join(root, filename[:-3]), base_dir)
-                dotted = relative.replace(os.sep, ".")
-                module_paths.append(f"{base_package}.{dotted}")
-        return module_paths
+        """发现并加载包下所有扩展（不以下划线开头的 .py 文件），互不依赖的扩展并发加载。"""
+        start = time.perf_counter()
+        results = await _extensions.load_all(self, base_package)
+        logger.info("%s", _extensions.format_report(results, time.perf_counter() - start))
 
 
 bot = RngHelperBot()
@@ -0,0 +1,92 @@
+"""批量掷骰（/rollmany、.rm）：同一表达式独立求值 N 次，输出结果表与统计。
+
+表达式只编译一次，经 `_dice.evaluate_many` 按列批量求值（骰子取自调用方给出的频道子流，见 `_streams.StreamService.fork`）；回复包含结果表（超出篇幅时截断）、
+最小 / 最大 / 均值 / 标准差与直方图，保证在单条消息的长度上限内。
+N 较大时计算较重，调用方应放到线程中执行（见 `CommandCore.roll_many`）。
+"""
+
+from collections import Counter
+from typing import Any
+
+from . import _dice
+from ._utils import env_number
+
+# 单次批量掷骰的次数上限（默认 10000，可由环境变量 DICE_ROLLMANY_MAX 调整）
+MAX_TRIALS = max(1, env_number("DICE_ROLLMANY_MAX", 10000, int))
+# 单次批量掷骰的骰子总数上限（次数 x 每次骰子数）
+MAX_TOTAL_DICE = 2_000_000
+
+# 结果表的字符预算与每行宽度；直方图的柱数与柱长
+TABLE_BUDGET = 900
+TABLE_WIDTH = 64
+HIST_BINS = 10
+HIST_BAR = 24
+
+
+def compile_batch(expr: str, trials: int) -> _dice.Program:
+    """校验次数与骰子总数并编译表达式；超限或语法错误时抛出 ValueError。"""
+    if not (1 <= trials <= MAX_TRIALS):
+        raise ValueError(f"Out of range: require 1 <= count <= {MAX_TRIALS}.")
+    program = _dice.compile_expression(expr)
+    dice_total = _dice.dice_per_trial(program) * trials
+    if dice_total > MAX_TOTAL_DICE:
+        raise ValueError(f"Too many dice: {dice_total} > {MAX_TOTAL_DICE}. Reduce count or dice.")
+    return program
+
+
+def roll_totals(expr: str, trials: int, rng: Any = None) -> list[int]:
+    """编译表达式并求值 trials 次；rng 见 `_dice.evaluate_many`。"""
+    return _dice.evaluate_many(compile_batch(expr, trials), trials, rng)
+
+
+def _table(totals: list[int]) -> list[str]:
+    cells = [f"#{i}: {v}" for i, v in enumerate(totals, 1)]
+    width = max(map(len, cells)) + 2
+    per_row = max(1, TABLE_WIDTH // width)
+    rows: list[str] = []
+    used = 0
+    for start in range(0, len(cells), per_row):
+        row = "".join(c.ljust(width) for c in cells[start:start + per_row]).rstrip()
+        if used + len(row) + 1 > TABLE_BUDGET:
+            rows.append(f"... ({len(cells) - start} more)")
+            break
+        rows.append(row)
+        used += len(row) + 1
+    return rows
+
+
+def _histogram(totals: list[int], low: int, high: int) -> list[str]:
+    span = high - low + 1
+    # 取值种类不多时每个值一柱，否则等宽分箱
+    step = 1 if span <= HIST_BINS else -(-span // HIST_BINS)
+    counts = Counter((v - low) // step for v in totals)
+    bins: list[tuple[str, int]] = []
+    for i in range(-(-span // step)):
+        start = low + i * step
+        end = min(high, start + step - 1)
+        bins.append((str(start) if start == end else f"{start}-{end}", counts.get(i, 0)))
+    peak = max(n for _label, n in bins)
+    label_width = max(len(label) for label, _n in bins)
+    return [
+        f"{label:>{label_width}} {'█' * round(n / peak * HIST_BAR):<{HIST_BAR}} {n}"
+        for label, n in bins
+    ]
+
+
+def format_result(expr: str, totals: list[int]) -> str:
+    """格式化为一条回复：标题、结果表、统计行与直方图。"""
+    n = len(totals)
+    low, high = min(totals), max(totals)
+    mean = sum(totals) / n
+    sd = (sum((v - mean) ** 2 for v in totals) / n) ** 0.5
+    body = "\n".join([*_table(totals), "", *_histogram(totals, low, high)])
+    return (
+        f"Roll many: {expr} x{n}\n"
+        f"min {low} | max {high} | mean {mean:.2f} | sd {sd:.2f}\n"
+        f"```\n{body}\n```"
+    )
+
+
+def roll_many(expr: str, trials: int, rng: Any = None) -> str:
+    """求值并格式化；供 `asyncio.to_thread` 调用。"""
+    return format_result(expr, roll_totals(expr, trials, rng))
@@ -0,0 +1,92 @@
+"""CoC d100 判定结果表与成功概率。
+
+导入时一次性构建 (target 1..100, roll 1..100) -> 结果等级 的查找表，
+判定变为 O(1) 查表；同时预计算每个 target 的各等级概率。
+"""
+
+# 结果等级：数值越大结果越好（便于排序）
+CRITICAL_FAILURE = 0
+FAILURE = 1
+SUCCESS = 2
+HARD_SUCCESS = 3
+EXTREME_SUCCESS = 4
+CRITICAL_SUCCESS = 5
+
+OUTCOME_TEXT = (
+    "critical failure",
+    "failure",
+    "success",
+    "hard success",
+    "extreme success",
+    "critical success",
+)
+
+_STRIDE = 101
+
+
+def _classify(target: int, roll: int) -> int:
+    """判定规则（与原 `CoC._coc_check` 分支一致）：
+
+    - critical success：roll 在 1~5 且 roll <= target
+    - extreme success：roll <= floor(target/5)
+    - hard success：roll <= floor(target/2)
+    - success：roll <= target
+    - critical failure：roll 在 96~100 且 roll > target
+    - failure：其它情况
+    """
+    if roll <= target:
+        if 1 <= roll <= 5:
+            return CRITICAL_SUCCESS
+        if roll <= target // 5:
+            return EXTREME_SUCCESS
+        if roll <= target // 2:
+            return HARD_SUCCESS
+        return SUCCESS
+    if 96 <= roll <= 100:
+        return CRITICAL_FAILURE
+    return FAILURE
+
+
+def _build_table() -> bytes:
+    table = bytearray(_STRIDE * _STRIDE)
+    for target in range(1, 101):
+        for roll in range(1, 101):
+            table[target * _STRIDE + roll] = _classify(target, roll)
+    return bytes(table)
+
+
+def _build_probabilities(table: bytes) -> tuple[tuple[float, ...], ...]:
+    probs: list[tuple[float, ...]] = [()]
+    for target in range(1, 101):
+        counts = [0] * len(OUTCOME_TEXT)
+        row = table[target * _STRIDE + 1:target * _STRIDE + 101]
+        for level in row:
+            counts[level] += 1
+        probs.append(tuple(c / 100 for c in counts))
+    return tuple(probs)
+
+
+# OUTCOME_TABLE[target * 101 + roll] -> 结果等级
+OUTCOME_TABLE = _build_table()
+# PROBABILITIES[target][level] -> 该等级的概率（target 取 1..100）
+PROBABILITIES = _build_probabilities(OUTCOME_TABLE)
+
+
+def outcome_level(target: int, roll: int) -> int:
+    """查表得到结果等级；target 与 roll 均须在 1..100 内。"""
+    return OUTCOME_TABLE[target * _STRIDE + roll]
+
+
+def outcome_text(target: int, roll: int) -> str:
+    return OUTCOME_TEXT[OUTCOME_TABLE[target * _STRIDE + roll]]
+
+
+def format_odds(target: int) -> str:
+    """格式化某个 target 的各等级概率。"""
+    p = PROBABILITIES[target]
+    success = p[SUCCESS] + p[HARD_SUCCESS] + p[EXTREME_SUCCESS] + p[CRITICAL_SUCCESS]
+    return (
+        f"Success {success:.0%} (critical {p[CRITICAL_SUCCESS]:.0%}, extreme {p[EXTREME_SUCCESS]:.0%}, "
+        f"hard {p[HARD_SUCCESS]:.0%}, regular {p[SUCCESS]:.0%}) | "
+        f"failure {p[FAILURE]:.0%} | critical failure {p[CRITICAL_FAILURE]:.0%}"
+    )
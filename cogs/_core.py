@@ -0,0 +1,723 @@
+"""与入口无关的命令核心：Slash 与文本命令共用的参数解析、属性查找与结果格式化。
+
+`CoC` 中的 `*_slash` / `*_text` 只是薄适配层：取参数、defer、把 `Reply` 发出去。
+- 核心方法返回 `Reply`；用户错误（参数无效、属性不存在等）在核心内以 ValueError 抛出并转为 `error=True` 的结果，
+  由适配层决定展示方式（Slash 仅自己可见，文本命令直接回复）
+- 参数解析按原始字符串缓存（lru_cache），重复的 `.check Spot Hidden`、`/add HP -1` 只解析一次
+- 文本命令可 @ 多个目标：`per_user=True` 时逐个目标输出带名字的结果，单个目标的错误写入结果而不中断其它目标
+"""
+
+import re
+import asyncio
+import inspect
+import logging
+import functools
+from functools import lru_cache
+from typing import Any, Callable, Container, NamedTuple, Sequence
+
+from texts.coc7_texts import TEMP_INSANITY_D10
+from . import _batch, _check, _dice, _fair, _locks, _store, _streams
+
+logger = logging.getLogger(__name__)
+
+# /groupcheck 表格中名称列的最大宽度
+GROUP_NAME_WIDTH = 20
+
+SECRET_TEASER = "Shadows stir... A secret roll has been cast beyond the veil."
+
+COC7_ATTRS = ("STR", "CON", "DEX", "APP", "POW", "SIZ", "INT", "EDU", "LUCK")
+_COC7_EXPRS = {"SIZ": "(2d6+6)*5", "INT": "(2d6+6)*5", "EDU": "(2d6+6)*5"}
+
+# /history 单次最多显示的变更条数
+HISTORY_MAX = 50
+
+
+class Reply(NamedTuple):
+    """一次命令的结果。sc 非空时为 KP 发起的 SC：(成功表达式, 失败表达式)，适配层需附带 SC 按钮。
+
+    teaser 只用于暗骰：text 私聊给掷骰者，teaser 发到频道。
+    """
+
+    text: str
+    error: bool = False
+    sc: tuple[str, str] | None = None
+    teaser: str | None = None
+
+
+def _replies(func: Callable) -> Callable:
+    """把核心方法返回的字符串包装为 `Reply`，ValueError 转为错误结果。"""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs) -> Reply:
+            try:
+                result = await func(*args, **kwargs)
+            except ValueError as exc:
+                return Reply(str(exc), error=True)
+            return result if isinstance(result, Reply) else Reply(result)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Reply:
+        try:
+            result = func(*args, **kwargs)
+        except ValueError as exc:
+            return Reply(str(exc), error=True)
+        return result if isinstance(result, Reply) else Reply(result)
+    return wrapper
+
+
+# ---------------- Parsing (cached) ----------------
+# 所有参数解析用到的正则在导入时编译一次
+_NUMBER = re.compile(r"^\s*(\d+)\s*$")
+_ITEM_SEP = re.compile(r"[，,]+")
+# 允许名称与数值之间无空格：如 "STR60" 或 "Move Rate60"
+_SEGMENT = re.compile(r"^(.+?)\s*(-?\d+)\s*$")
+# `.prob <expr> >= k`
+_AT_LEAST = re.compile(r"^(.*?)\s*>=\s*(-?\d+)\s*$")
+# `.rollmany <count> <expr>`
+_COUNT_EXPR = re.compile(r"^\s*(\d+)\s+(.+?)\s*$")
+
+
+@lru_cache(maxsize=4096)
+def normalize_attr_name(name: str) -> tuple[str, str]:
+    """标准化属性名作为键：去两端空白、压缩内部空白为单个空格并转小写。
+
+    返回 (key, label)，label 为展示用。
+    """
+    compact = " ".join((name or "").strip().split())
+    return compact.lower(), compact
+
+
+NAME_KEY = normalize_attr_name("NAME")[0]
+SANITY_KEY = normalize_attr_name("Sanity")[0]
+
+
+def strip_mentions(text: str, user_ids: Container[int]) -> str:
+    """单次扫描去掉 text 中属于 user_ids 的 `<@id>` / `<@!id>` 标记。
+
+    其它形如 `<@...>` 的片段（角色 `<@&id>`、不在 user_ids 中的用户）原样保留；
+    不含任何待删除标记时直接返回原字符串，不产生新对象。
+    """
+    start = text.find("<@")
+    if start < 0:
+        return text
+    pieces: list[str] = []
+    pos = 0
+    while start >= 0:
+        i = start + 2
+        if text.startswith("!", i):
+            i += 1
+        j = text.find(">", i)
+        digits = text[i:j] if j > i else ""
+        # 只接受 ASCII 数字 id（str.isdigit 也会接受其它文字的数字）
+        if digits.isascii() and digits.isdigit() and int(digits) in user_ids:
+            pieces.append(text[pos:start])
+            pos = j + 1
+            start = text.find("<@", pos)
+        else:
+            start = text.find("<@", start + 2)
+    if not pieces:
+        return text
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+@lru_cache(maxsize=1024)
+def parse_target(arg: str) -> int | tuple[str, str]:
+    """/check、/growth、/odds 的参数：纯数字为目标值（须在 1~100 内），否则为属性名 (key, label)。"""
+    m = _NUMBER.match(arg)
+    if m:
+        target = int(m.group(1))
+        if not (1 <= target <= 100):
+            raise ValueError("Out of range: require 1 <= target <= 100.")
+        return target
+    return normalize_attr_name(arg)
+
+
+@lru_cache(maxsize=1024)
+def parse_items(items: str) -> tuple[tuple[str, str, int], ...]:
+    """解析批量设置字符串：以逗号分隔的若干组 `名称 数值`，返回 ((key, label, value), ...)。
+    示例："STR 60, Dex 50, Move Rate 8"
+    """
+    pairs: list[tuple[str, str, int]] = []
+    for raw in _ITEM_SEP.split(items or ""):
+        seg = raw.strip()
+        if not seg:
+            continue
+        m = _SEGMENT.match(seg)
+        if not m:
+            raise ValueError(f"Invalid segment: '{seg}'. Use 'Name Value' pairs, separated by commas.")
+        value = int(m.group(2))
+        if not (_store.VALUE_MIN <= value <= _store.VALUE_MAX):
+            raise ValueError(f"Value out of range in '{seg}'.")
+        pairs.append((*normalize_attr_name(m.group(1)), value))
+    return tuple(pairs)
+
+
+@lru_cache(maxsize=1024)
+def parse_names(items: str) -> tuple[tuple[str, str], ...]:
+    """逗号分隔的属性名列表（/remove），返回 ((key, label), ...)。"""
+    return tuple(normalize_attr_name(name) for name in _ITEM_SEP.split(items or "") if name.strip())
+
+
+@lru_cache(maxsize=256)
+def parse_loss(loss: str) -> tuple[str, str]:
+    """SC 损失 'succ_expr/fail_expr'，返回 (成功表达式, 失败表达式)。"""
+    parts = loss.split("/", 1)
+    if len(parts) != 2:
+        raise ValueError("Invalid format. Use 'succ_expr/fail_expr'.")
+    succ_expr, fail_expr = parts[0].strip(), parts[1].strip()
+    if not succ_expr or not fail_expr:
+        raise ValueError("Invalid format. Both parts required: 'succ_expr/fail_expr'.")
+    return succ_expr, fail_expr
+
+
+def parse_at_least(expr: str) -> tuple[str, int | None]:
+    """`.prob` 的参数：可选的 `>= k` 后缀，返回 (表达式, k 或 None)。"""
+    m = _AT_LEAST.match(expr)
+    if m:
+        return m.group(1).strip(), int(m.group(2))
+    return expr, None
+
+
+def parse_count_expr(arg: str) -> tuple[int, str] | None:
+    """`.rollmany` 的参数 `<count> <expr>`；格式不符时返回 None。"""
+    m = _COUNT_EXPR.match(arg)
+    if not m:
+        return None
+    return int(m.group(1)), m.group(2)
+
+
+# ---------------- Formatting ----------------
+def roll_check(target: int, rng: _streams.Recorder) -> tuple[int, int]:
+    """执行一次 CoC 判定并返回 (roll, 结果等级)；等级由 `_check` 的预建查找表 O(1) 得到，target 须在 1~100 内。"""
+    roll = rng.die(100)
+    return roll, _check.outcome_level(target, roll)
+
+
+def sheet_name(attrs: _store.AttrsView) -> str:
+    """角色卡中 .nn 设置的 NAME；未设置时返回空串。"""
+    name_meta = attrs.get(NAME_KEY)
+    return str(name_meta.value).strip() if name_meta is not None else ""
+
+
+def attr_target(attrs: _store.AttrsView, key: str) -> tuple[str, int]:
+    """读取判定用属性，返回 (label, 截断到 1~100 的目标值)。"""
+    meta = attrs.get(key)
+    if meta is None:
+        raise ValueError("Attribute not found. Use /set or .set to define it.")
+    if not isinstance(meta.value, int):
+        raise ValueError("Attribute value is invalid.")
+    return meta.label, max(1, min(100, meta.value))
+
+
+def format_stats_block(attrs: _store.AttrsView | dict, columns: int = 3) -> str:
+    """将任意属性以多列代码块形式输出（列宽自适应）。"""
+    if not attrs:
+        return "``````"
+    # 保留插入顺序，使用存储的 label 展示
+    entries = [f"{meta.label}: {meta.value}" for meta in attrs.values()]
+    col_width = max(3, max(len(e) for e in entries))
+    cols = max(1, columns)
+    rows = (len(entries) + cols - 1) // cols
+    lines: list[str] = []
+    for r in range(rows):
+        parts: list[str] = []
+        for c in range(cols):
+            idx = r + c * rows
+            if idx >= len(entries):
+                continue
+            cell = entries[idx]
+            if c < cols - 1:
+                parts.append(cell.ljust(col_width + 2))
+            else:
+                parts.append(cell)
+        lines.append("".join(parts).rstrip())
+    body = "\n".join(lines)
+    return f"```\n{body}\n```"
+
+
+def generate_coc7_attributes(rng: Any = None) -> dict[str, int]:
+    """按 CoC7 标准生成基础属性（含 LUCK）；rng 省略时使用 `_rng` 全局后端。"""
+    return {name: _dice.roll_expression(_COC7_EXPRS.get(name, "3d6*5"), rng)[0] for name in COC7_ATTRS}
+
+
+def format_coc7_block(rolled: dict[str, int]) -> str:
+    """格式化 CoC7 属性为对齐的代码块文本，并附带总和（含/不含 LUCK）。"""
+    items = [(k, rolled.get(k, 0)) for k in COC7_ATTRS]
+    value_width = max(3, max((len(str(v)) for _k, v in items), default=3))
+    lines = [f"{k:<4} {v:>{value_width}}" for k, v in items]
+    total_wo_luck = sum(v for k, v in items if k != "LUCK")
+    total_with_luck = total_wo_luck + rolled.get("LUCK", 0)
+    lines.append("-" * max(12, 6 + value_width))
+    lines.append(f"SUM (w/o LUCK): {total_wo_luck}")
+    lines.append(f"SUM (with LUCK): {total_with_luck}")
+    body = "\n".join(lines)
+    return f"```\n{body}\n```"
+
+
+def _roll_text(expr: str, rng: _streams.Recorder) -> tuple[int, str]:
+    total, details = _dice.roll_expression(expr, rng)
+    return total, f" | {'; '.join(details)}" if details else ""
+
+
+class CommandCore:
+    """命令核心：持有属性存储、角色卡锁与频道随机数流，供 Slash / 文本适配层与 SC 按钮共用。
+
+    users 参数为目标用户序列（只需 `id`，显示名降级时用到 `display_name` / `name`）；Slash 入口只传入调用者本人。
+    所有骰子从所在频道的流中抽取，每个目标的一次判定记为一条掷骰日志（见 `_streams`）；公平暗骰例外，取自 `_fair` 熵池。
+    """
+
+    def __init__(
+        self,
+        store: _store.AttrStore,
+        locks: _locks.KeyedLocks,
+        streams: _streams.StreamService,
+        fair: _fair.FairDice | None = None,
+    ) -> None:
+        self.store = store
+        self.locks = locks
+        self.streams = streams
+        self.fair = fair or _fair.FairDice()
+
+    # ---------------- Lookups ----------------
+    def is_kp(self, channel_id: int, user_id: int) -> bool:
+        return self.store.get_kp(channel_id) == user_id
+
+    def display_name(
+        self, channel_id: int, user: Any, attrs: _store.AttrsView | None = None, is_kp: bool | None = None
+    ) -> str:
+        """统一获取用户显示名：优先使用 .nn 设置的 NAME，否则使用 Discord 显示名。
+
+        对于 KP，显示为 "KP" 或 "KP(名字)"。调用方已取得该用户的属性 / 是否 KP 时传入 attrs / is_kp，避免重复查找。
+        """
+        if is_kp is None:
+            is_kp = self.is_kp(channel_id, user.id)
+        if attrs is None:
+            attrs = self.store.user_attrs(channel_id, user.id)
+        custom_name = sheet_name(attrs)
+        if custom_name:
+            return f"KP({custom_name})" if is_kp else custom_name
+        if is_kp:
+            return "KP"
+        # 降级：服务器成员（有 guild）使用服务器内显示名，否则使用用户名
+        if getattr(user, "guild", None) is not None:
+            return user.display_name
+        return getattr(user, "name", "user")
+
+    def _each(self, channel_id: int, users: Sequence[Any], one: Callable[[Any], str], sep: str) -> str:
+        """多目标（文本命令）：逐个执行 one，单个目标的错误以 "名字: 错误" 写入结果。"""
+        parts: list[str] = []
+        for user in users:
+            try:
+                parts.append(one(user))
+            except ValueError as exc:
+                parts.append(f"{self.display_name(channel_id, user)}: {exc}")
+        return sep.join(parts)
+
+    # ---------------- Dice ----------------
+    @_replies
+    def roll(self, channel_id: int, user: Any, expr: str) -> str:
+        with self.streams.draw(channel_id, user.id, f"roll {expr}") as rng:
+            total, extra = _roll_text(expr, rng)
+        return f"Roll: {expr} -> {total}{extra}"
+
+    @_replies
+    def secret_roll(self, channel_id: int, user: Any, expr: str, *, fair: bool = False) -> Reply:
+        """暗骰：text 私聊给掷骰者，teaser 发到频道。
+
+        fair=True 时从熵池掷骰，teaser 中公开结果的 sha256 承诺与 nonce，之后用 /reveal 揭示。
+        """
+        if not fair:
+            with self.streams.draw(channel_id, user.id, f"secret {expr}") as rng:
+                total, extra = _roll_text(expr, rng)
+            return Reply(f"Secret Roll: {expr} -> {total}{extra}", teaser=SECRET_TEASER)
+        total, extra = _roll_text(expr, self.fair.pool)
+        commit = self.fair.commit(channel_id, user.id, self.display_name(channel_id, user), f"Secret Roll: {expr} -> {total}{extra}")
+        return Reply(
+            f"{commit.text}\nCommitment `{commit.nonce}`: sha256 `{commit.digest}`. Use /reveal {commit.nonce} to reveal it.",
+            teaser=(
+                f"Shadows stir... A fair secret roll has been sealed.\n"
+                f"Commitment `{commit.nonce}`: sha256 `{commit.digest}`"
+            ),
+        )
+
+    @_replies
+    def reveal(self, channel_id: int, user: Any, nonce: str) -> str:
+        """揭示公平暗骰：仅掷骰者或本频道 KP 可以揭示，且须在掷骰的频道中。"""
+        nonce = nonce.strip().lower()
+        commit = self.fair.get(nonce)
+        if commit is None or commit.channel_id != channel_id:
+            raise ValueError(f"No pending fair roll '{nonce}' in this channel.")
+        if user.id != commit.user_id and not self.is_kp(channel_id, user.id):
+            raise ValueError("Only the roller or the KP can reveal this roll.")
+        self.fair.pop(nonce)
+        # 不在这里给出“已验证”：由 bot 自己重算并比对自己保存的摘要证明不了什么，
+        # 核对只能由玩家对公开的原文求 sha256，再与掷骰时频道提示中的承诺比较
+        return (
+            f"Reveal `{commit.nonce}` (rolled by {commit.roller} <t:{int(commit.at)}:R>):\n"
+            f"{commit.text}\n"
+            f"Preimage: `{commit.preimage}`\n"
+            f"To verify, compute sha256 of the preimage yourself and compare it with the commitment "
+            f"posted in the original roll message."
+        )
+
+    @_replies
+    async def roll_many(self, channel_id: int, user: Any, count: int, expr: str) -> str:
+        """批量掷骰：先校验参数，再从频道流抽取子流种子（一条掷骰日志），整批骰子在线程中由子流生成。"""
+        _batch.compile_batch(expr, count)
+        rng = self.streams.fork(channel_id, user.id, f"rollmany {count} {expr}")
+        # 次数可达上千、骰子可达上百万，放到线程中避免阻塞事件循环
+        return await asyncio.to_thread(_batch.roll_many, expr, count, rng)
+
+    @_replies
+    def temporary_insanity(self, channel_id: int, user: Any) -> str:
+        with self.streams.draw(channel_id, user.id, "ti") as rng:
+            value = rng.die(10)
+            duration = rng.die(10)
+        data = TEMP_INSANITY_D10.get(value)
+        if not data:
+            logger.error("TI mapping missing for value=%s", value)
+            return f"TI: {value}"
+        name = str(data.get("name", "Unknown")).strip()
+        desc = str(data.get("desc", "")).strip().format(duration=duration)
+        return f"TI: {value} - {name}\n{desc}"
+
+    # ---------------- Checks ----------------
+    def _attr_check(self, channel_id: int, user: Any, key: str) -> str:
+        attrs, kp = self.store.user_sheet(channel_id, user.id)
+        label, target = attr_target(attrs, key)
+        roll = self.streams.die(channel_id, user.id, f"check {label}", 100)
+        name = self.display_name(channel_id, user, attrs, kp == user.id)
+        return f"[{label}] check of {name}:\n{roll}/{target} -> {_check.outcome_text(target, roll)}"
+
+    @_replies
+    def check(self, channel_id: int, users: Sequence[Any], arg: str, *, per_user: bool = False) -> str:
+        target = parse_target(arg)
+        if isinstance(target, int):
+            if not per_user:
+                roll = self.streams.die(channel_id, users[0].id, f"check {target}", 100)
+                return f"{roll}/{target} -> {_check.outcome_text(target, roll)}"
+            lines = []
+            for user in users:
+                roll = self.streams.die(channel_id, user.id, f"check {target}", 100)
+                lines.append(f"{self.display_name(channel_id, user)}: {roll}/{target} -> {_check.outcome_text(target, roll)}")
+            return "\n".join(lines)
+        key = target[0]
+        if not per_user:
+            return self._attr_check(channel_id, users[0], key)
+        return self._each(channel_id, users, lambda user: self._attr_check(channel_id, user, key), "\n\n")
+
+    def _attr_growth(self, channel_id: int, user: Any, key: str) -> str:
+        attrs, kp = self.store.user_sheet(channel_id, user.id)
+        label, target = attr_target(attrs, key)
+        with self.streams.draw(channel_id, user.id, f"growth {label}") as rng:
+            roll = rng.die(100)
+            level = _check.outcome_level(target, roll)
+            # 检定成功则不成长；失败时成长 1d10
+            growth = rng.die(10) if level < _check.SUCCESS else 0
+        name = self.display_name(channel_id, user, attrs, kp == user.id)
+        if not growth:
+            return f"[{label}] growth of {name}:\n{roll}/{target} -> {_check.OUTCOME_TEXT[level]}\nGrowth failed."
+        return f"[{label}] growth of {name}:\n{roll}/{target} -> {_check.OUTCOME_TEXT[level]}\nGrowth value: 1d10 -> {growth}"
+
+    @_replies
+    def growth(self, channel_id: int, users: Sequence[Any], arg: str, *, per_user: bool = False) -> str:
+        target = parse_target(arg)
+        if isinstance(target, int):
+            if not per_user:
+                with self.streams.draw(channel_id, users[0].id, f"growth {target}") as rng:
+                    roll, level = roll_check(target, rng)
+                    growth = rng.die(10) if level < _check.SUCCESS else 0
+                head = f"Growth Check: {roll}/{target} -> {_check.OUTCOME_TEXT[level]}"
+                if not growth:
+                    return f"{head}\nGrowth failed (check success)."
+                return f"{head}\nGrowth value: 1d10 -> {growth}"
+            lines = []
+            for user in users:
+                with self.streams.draw(channel_id, user.id, f"growth {target}") as rng:
+                    roll, level = roll_check(target, rng)
+                    growth = rng.die(10) if level < _check.SUCCESS else 0
+                name = self.display_name(channel_id, user)
+                if not growth:
+                    lines.append(f"{name}: Growth Check {roll}/{target} -> Failed")
+                else:
+                    lines.append(f"{name}: Growth Check {roll}/{target} -> Passed | Growth value: 1d10 -> {growth}")
+            return "\n".join(lines)
+        key = target[0]
+        if not per_user:
+            return self._attr_growth(channel_id, users[0], key)
+        return self._each(channel_id, users, lambda user: self._attr_growth(channel_id, user, key), "\n\n")
+
+    @_replies
+    def odds(self, channel_id: int, user: Any, arg: str) -> str:
+        target = parse_target(arg)
+        if isinstance(target, int):
+            return f"Odds for {target}: {_check.format_odds(target)}"
+        label, value = attr_target(self.store.user_attrs(channel_id, user.id), target[0])
+        return f"Odds for [{label}] {value}: {_check.format_odds(value)}"
+
+    @_replies
+    def group_check(self, channel_id: int, guild: Any, arg: str, *, actor_id: int) -> str:
+        """对频道内所有角色卡（KP 除外）执行同一属性的判定，返回按结果等级排序的对齐表格。
+
+        一次遍历频道存储解析属性与显示名，骰子一次批量抽取。
+        """
+        key, label = normalize_attr_name(arg)
+        kp = self.store.get_kp(channel_id)
+        players: list[tuple[str, int]] = []
+        missing = 0
+        for user_id, attrs in self.store.channel_users(channel_id).items():
+            if user_id == kp:
+                continue
+            meta = attrs.get(key)
+            if meta is None or not isinstance(meta.value, int):
+                missing += 1
+                continue
+            label = meta.label
+            name = sheet_name(attrs)
+            if not name:
+                member = guild.get_member(user_id) if guild is not None else None
+                name = member.display_name if member is not None else f"user {user_id}"
+            players.append((name, max(1, min(100, meta.value))))
+        if not players:
+            raise ValueError(f"No investigator in this channel has attribute '{label}'. Use .set to define it.")
+
+        rows = []
+        with self.streams.draw(channel_id, actor_id, f"groupcheck {label}") as rng:
+            rolls = rng.roll(len(players), 100)
+        for (name, target), roll in zip(players, rolls):
+            rows.append((_check.outcome_level(target, roll), roll, name, target))
+        # 结果等级从好到坏；同等级内点数小者在前
+        rows.sort(key=lambda r: (-r[0], r[1], r[2]))
+
+        width = GROUP_NAME_WIDTH
+        names = [n.replace("`", "'") for _lv, _roll, n, _t in rows]
+        names = [n if len(n) <= width else n[: width - 1] + "…" for n in names]
+        width = max(len("Name"), *map(len, names))
+        lines = [f"{'Name':<{width}}  Roll/Target  Outcome"]
+        counts = [0] * len(_check.OUTCOME_TEXT)
+        for (level, roll, _name, target), name in zip(rows, names):
+            counts[level] += 1
+            lines.append(f"{name:<{width}}  {f'{roll}/{target}':>11}  {_check.OUTCOME_TEXT[level]}")
+        summary = " | ".join(
+            f"{_check.OUTCOME_TEXT[level]} {counts[level]}"
+            for level in range(len(counts) - 1, -1, -1)
+            if counts[level]
+        )
+        header = f"[{label}] group check: {len(rows)} investigator(s)"
+        if missing:
+            header += f", {missing} without this attribute"
+        body = "\n".join(lines)
+        return f"{header}\n```\n{body}\n```\n{summary}"
+
+    # ---------------- Sanity Check ----------------
+    @_replies
+    async def sanity_check(self, channel_id: int, user: Any, loss: str) -> Reply:
+        """KP 执行时只发起检定（返回带 sc 的结果，由适配层附带按钮），否则对自己判定。"""
+        succ_expr, fail_expr = parse_loss(loss)
+        if self.is_kp(channel_id, user.id):
+            return Reply(
+                f"**KP initiates SC check:** `{succ_expr}/{fail_expr}`\nClick the button below to perform the check:",
+                sc=(succ_expr, fail_expr),
+            )
+        return await self._sc_roll(channel_id, user, succ_expr, fail_expr)
+
+    @_replies
+    async def sc_roll(self, channel_id: int, user: Any, succ_expr: str, fail_expr: str) -> str:
+        """SC 按钮：对点击者执行同一 SC。"""
+        return await self._sc_roll(channel_id, user, succ_expr, fail_expr)
+
+    async def _sc_roll(self, channel_id: int, user: Any, succ_expr: str, fail_expr: str) -> str:
+        """对 user 的 Sanity 执行一次 SC 并回写；读取到回写期间持有该角色卡的锁（临界区内若加入 await，并发点击仍不会相互覆盖）。"""
+        async with self.locks(channel_id, user.id):
+            attrs, kp = self.store.user_sheet(channel_id, user.id)
+            san_meta = attrs.get(SANITY_KEY)
+            if san_meta is None:
+                raise ValueError("Attribute 'Sanity' not found. Use /set or .set to define it.")
+            if not isinstance(san_meta.value, int):
+                raise ValueError("Attribute 'Sanity' value is invalid.")
+            san_val = san_meta.value
+            target = max(1, min(100, san_val))
+
+            with self.streams.draw(channel_id, user.id, f"sc {succ_expr}/{fail_expr}") as rng:
+                roll = rng.die(100)
+                is_success = roll <= target
+                chosen_expr = succ_expr if is_success else fail_expr
+                loss_total, extra = _roll_text(chosen_expr, rng)
+
+            new_san = max(0, san_val - max(0, loss_total))
+            san_key, san_label = normalize_attr_name(san_meta.label)
+            self.store.set_attrs(channel_id, user.id, [(san_key, san_label, new_san)], cmd="sc", actor_id=user.id)
+
+        outcome = "success" if is_success else "failure"
+        ti_note = "\n[Temporary Insanity] One-time Sanity loss >= 5. Use /ti or .ti." if loss_total >= 5 else ""
+        return (
+            f"Sanity Check of {self.display_name(channel_id, user, attrs, kp == user.id)}:\n"
+            f"SC {roll}/{target} [{san_label}] -> {outcome} | loss: {chosen_expr} -> {loss_total}{extra} | Sanity: {san_val} -> {new_san}{ti_note}"
+        )
+
+    # ---------------- Attributes ----------------
+    def _stats(self, channel_id: int, user: Any) -> str:
+        attrs, kp = self.store.user_sheet(channel_id, user.id)
+        if not attrs:
+            raise ValueError("No attributes set.")
+        # 正文中不包含 NAME
+        pretty = format_stats_block({k: v for k, v in attrs.items() if k != NAME_KEY})
+        return f"Stats of {self.display_name(channel_id, user, attrs, kp == user.id)}\n{pretty}"
+
+    @_replies
+    def stats(self, channel_id: int, users: Sequence[Any], *, per_user: bool = False) -> str:
+        if not per_user:
+            return self._stats(channel_id, users[0])
+        return self._each(channel_id, users, lambda user: self._stats(channel_id, user), "\n\n")
+
+    @_replies
+    def set_attrs(self, channel_id: int, users: Sequence[Any], items: str, *, actor_id: int, per_user: bool = False) -> str:
+        pairs = parse_items(items)
+        if not pairs:
+            raise ValueError("Nothing to set.")
+        summary = ", ".join(f"{label}={value}" for _key, label, value in pairs)
+        lines: list[str] = []
+        for user in users:
+            self.store.set_attrs(channel_id, user.id, pairs, cmd="set", actor_id=actor_id)
+            if per_user:
+                lines.append(f"{self.display_name(channel_id, user)}: Set {summary}")
+        return "\n".join(lines) if per_user else f"Set: {summary}"
+
+    @_replies
+    async def add_attrs(self, channel_id: int, users: Sequence[Any], items: str, *, actor_id: int, per_user: bool = False) -> str:
+        pairs = parse_items(items)
+        if not pairs:
+            raise ValueError("Nothing to add.")
+        lines: list[str] = []
+        for user in users:
+            summary: list[str] = []
+            async with self.locks(channel_id, user.id):
+                attrs = self.store.user_attrs(channel_id, user.id)
+                # 同一属性出现多次时依次累加；所有变更一次写回
+                updates: dict[str, tuple[str, int]] = {}
+                for key, label, delta in pairs:
+                    if key in updates:
+                        curr_val = updates[key][1]
+                    else:
+                        meta = attrs.get(key)
+                        # 非数值（如 NAME）或不存在时按 0 处理
+                        curr_val = meta.value if meta is not None and isinstance(meta.value, int) else 0
+                    new_val = curr_val + delta
+                    if not (_store.VALUE_MIN <= new_val <= _store.VALUE_MAX):
+                        raise ValueError(f"{label} would go out of range.")
+                    updates[key] = (label, new_val)
+                    summary.append(f"{label}{'+' if delta >= 0 else ''}{delta} => {new_val}")
+                self.store.set_attrs(
+                    channel_id, user.id, [(k, label, v) for k, (label, v) in updates.items()], cmd="add", actor_id=actor_id
+                )
+            text = ", ".join(summary)
+            lines.append(f"{self.display_name(channel_id, user)}: Add {text}" if per_user else f"Add: {text}")
+        return "\n".join(lines)
+
+    @_replies
+    def remove_attrs(self, channel_id: int, user: Any, items: str) -> str:
+        names = parse_names(items)
+        if not names:
+            raise ValueError("No attributes specified.")
+        if not self.store.user_attrs(channel_id, user.id):
+            raise ValueError("No attributes set.")
+        removed: list[str] = []
+        not_found: list[str] = []
+        for key, label in names:
+            # 不允许删除 NAME 属性，使用 /nn 或 .nn 来管理
+            if key == NAME_KEY:
+                not_found.append(f"{label} (use /nn or .nn to change name)")
+            elif self.store.remove_attrs(channel_id, user.id, [key], cmd="remove", actor_id=user.id):
+                removed.append(label)
+            else:
+                not_found.append(label)
+        messages = []
+        if removed:
+            messages.append(f"Removed: {', '.join(removed)}")
+        if not_found:
+            messages.append(f"Not found: {', '.join(not_found)}")
+        return "\n".join(messages) or "No attributes were removed."
+
+    @_replies
+    def reset(self, channel_id: int, user: Any) -> str:
+        ok = self.store.reset_user(channel_id, user.id, cmd="reset", actor_id=user.id)
+        # 如果是 KP 执行 reset，清空 KP 位
+        if self.is_kp(channel_id, user.id):
+            self.store.set_kp(channel_id, None, cmd="reset", actor_id=user.id)
+            return "Reset done. KP position cleared."
+        return "Reset done." if ok else "No attributes to reset."
+
+    @_replies
+    def generate_sheet(self, channel_id: int, user: Any) -> str:
+        with self.streams.draw(channel_id, user.id, "cs") as rng:
+            rolled = generate_coc7_attributes(rng)
+        self.store.set_attrs(
+            channel_id, user.id, [(*normalize_attr_name(n), v) for n, v in rolled.items()], cmd="cs", actor_id=user.id
+        )
+        return format_coc7_block(rolled)
+
+    @_replies
+    def set_name(self, channel_id: int, user: Any, name: str) -> str:
+        key, label = normalize_attr_name("NAME")
+        if name.lower() == "clear":
+            if self.store.remove_attrs(channel_id, user.id, [key], cmd="nn", actor_id=user.id):
+                return "Name cleared."
+            return "No name to clear."
+        self.store.set_attrs(channel_id, user.id, [(key, label, name)], cmd="nn", actor_id=user.id)
+        return f"Name set to: {name}"
+
+    @_replies
+    def register_kp(self, channel_id: int, user: Any) -> str:
+        current_kp_id = self.store.get_kp(channel_id)
+        if current_kp_id == user.id:
+            raise ValueError("You are already the KP of this channel.")
+        if current_kp_id is not None:
+            raise ValueError("Error: This channel already has a KP. Only one KP per channel is allowed.")
+        self.store.set_kp(channel_id, user.id, cmd="kp", actor_id=user.id)
+        return f"{user.mention} is now the KP of this channel."
+
+    # ---------------- Audit trail ----------------
+    def _name_of(self, channel_id: int, user_id: int | None) -> str:
+        if user_id is None:
+            return "?"
+        return sheet_name(self.store.user_attrs(channel_id, user_id)) or f"<@{user_id}>"
+
+    def _describe_event(self, channel_id: int, ev: _store.Event) -> str:
+        if ev.op == _store.OP_SET:
+            change = ", ".join(f"{label}={value}" for _key, label, value in ev.payload)
+        elif ev.op == _store.OP_DEL:
+            change = "removed " + ", ".join(ev.payload)
+        elif ev.op == _store.OP_RESET:
+            change = "reset sheet"
+        else:
+            change = f"KP -> {self._name_of(channel_id, ev.user_id)}" if ev.user_id is not None else "KP cleared"
+        target = "" if ev.op == _store.OP_KP else f" {self._name_of(channel_id, ev.user_id)}:"
+        return f"<t:{int(ev.ts)}:f> {ev.cmd or ev.op} by {self._name_of(channel_id, ev.actor_id)} ->{target} {change}"
+
+    @_replies
+    async def history(self, channel_id: int, user: Any, arg: str = "", *, targets: Sequence[Any] = (), limit: int = 20) -> str:
+        """KP 查看本频道的属性变更记录（谁在何时改了哪个属性），新的在前；可按玩家与属性名筛选。"""
+        if not self.is_kp(channel_id, user.id):
+            raise ValueError("Only the KP of this channel can view the change history.")
+        limit = max(1, min(HISTORY_MAX, limit))
+        user_ids = {target.id for target in targets}
+        key = normalize_attr_name(arg)[0] if arg.strip() else None
+
+        def match(ev: _store.Event) -> bool:
+            if user_ids and ev.user_id not in user_ids:
+                return False
+            if key is None or ev.op == _store.OP_RESET:
+                return True
+            if ev.op == _store.OP_SET:
+                return any(item[0] == key for item in ev.payload)
+            return ev.op == _store.OP_DEL and key in ev.payload
+
+        events = await self.store.history(channel_id, limit, match)
+        if events is None:
+            raise ValueError("Change history is only kept with COC_STORE_BACKEND=journal.")
+        if not events:
+            return "No matching changes recorded."
+        lines = [self._describe_event(channel_id, ev) for ev in events]
+        return f"Last {len(lines)} change(s), newest first:\n" + "\n".join(lines)
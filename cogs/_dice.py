@@ -0,0 +1,235 @@
+"""骰子表达式编译与求值。
+
+将 "(2d6+6)*5"、"1d3" 等表达式编译为一次性的后缀操作序列（op list），
+并按规范化文本缓存；之后同一表达式只需求值，无需再次解析。
+"""
+
+import operator
+from functools import lru_cache
+from typing import Any
+
+from . import _rng
+from ._utils import env_number
+
+# 操作码（后缀序列中的元素为 (op, a, b)）
+OP_PUSH = 0  # 压入整数 a
+OP_DICE = 1  # 掷 a 个 b 面骰，压入总和
+OP_NEG = 2
+OP_ADD = 3
+OP_SUB = 4
+OP_MUL = 5
+
+Program = tuple[tuple[int, int, int], ...]
+
+# 编译缓存容量：常用表达式很少，保持较小即可
+COMPILE_CACHE_SIZE = 512
+
+# 单个骰子段的面数上限
+MAX_DICE_SIDES = 1000
+# 细节中完整展开的骰子数量上限，超出部分以 "..." 省略
+DETAIL_PREVIEW = 100
+
+
+# 单个骰子段的数量上限（默认 100，可由环境变量 DICE_MAX_COUNT 调整）
+MAX_DICE_COUNT = max(1, env_number("DICE_MAX_COUNT", 100, int))
+
+
+def validate_bounds(count: int, sides: int) -> bool:
+    return 1 <= count <= MAX_DICE_COUNT and 2 <= sides <= MAX_DICE_SIDES
+
+
+def normalize_expression(expr: str) -> str:
+    """规范化表达式文本：移除空白并统一小写（`2D6` 与 `2d6` 共享缓存）。"""
+    return "".join((expr or "").split()).lower()
+
+
+class _Parser:
+    """递归下降解析器：语法与原 `_roll_expression` 完全一致，仅输出后缀序列。"""
+
+    __slots__ = ("s", "idx", "ops")
+
+    def __init__(self, s: str) -> None:
+        self.s = s
+        self.idx = 0
+        self.ops: list[tuple[int, int, int]] = []
+
+    def consume(self, ch: str) -> bool:
+        if self.idx < len(self.s) and self.s[self.idx] == ch:
+            self.idx += 1
+            return True
+        return False
+
+    def parse_int(self) -> int:
+        s = self.s
+        start = self.idx
+        if self.idx < len(s) and s[self.idx] in "+-":
+            self.idx += 1
+        while self.idx < len(s) and s[self.idx].isdigit():
+            self.idx += 1
+        if start == self.idx or s[start:self.idx] in {"+", "-"}:
+            raise ValueError("Expected integer")
+        return int(s[start:self.idx])
+
+    def parse_factor(self) -> None:
+        s = self.s
+        # unary +/-
+        if self.consume("+"):
+            self.parse_factor()
+            return
+        if self.consume("-"):
+            self.parse_factor()
+            self.ops.append((OP_NEG, 0, 0))
+            return
+        # parentheses
+        if self.consume("("):
+            self.parse_expr()
+            if not self.consume(")"):
+                raise ValueError("Missing closing parenthesis")
+            return
+        # dice or integer: [N]dM or integer
+        save = self.idx
+        n_val = 0
+        has_n = False
+        while self.idx < len(s) and s[self.idx].isdigit():
+            has_n = True
+            n_val = n_val * 10 + int(s[self.idx])
+            self.idx += 1
+        if self.idx < len(s) and s[self.idx] == "d":
+            self.idx += 1
+            # sides required
+            if self.idx >= len(s) or (s[self.idx] in "+-*"):
+                raise ValueError("Missing sides after 'd'")
+            # parse sides (no unary signs here)
+            if not s[self.idx].isdigit():
+                raise ValueError("Invalid sides")
+            sides = 0
+            while self.idx < len(s) and s[self.idx].isdigit():
+                sides = sides * 10 + int(s[self.idx])
+                self.idx += 1
+            count = n_val if has_n else 1
+            if count <= 0:
+                raise ValueError("Dice count must be positive")
+            if not validate_bounds(count, sides):
+                raise ValueError(
+                    f"Out of range dice: require 1<=N<={MAX_DICE_COUNT} and 2<=M<={MAX_DICE_SIDES}"
+                )
+            self.ops.append((OP_DICE, count, sides))
+            return
+        # fallback: integer
+        self.idx = save
+        self.ops.append((OP_PUSH, self.parse_int(), 0))
+
+    def parse_term(self) -> None:
+        self.parse_factor()
+        while self.consume("*"):
+            self.parse_factor()
+            self.ops.append((OP_MUL, 0, 0))
+
+    def parse_expr(self) -> None:
+        self.parse_term()
+        while True:
+            if self.consume("+"):
+                self.parse_term()
+                self.ops.append((OP_ADD, 0, 0))
+            elif self.consume("-"):
+                self.parse_term()
+                self.ops.append((OP_SUB, 0, 0))
+            else:
+                break
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_normalized(s: str) -> Program:
+    if not s:
+        raise ValueError("Empty expression")
+    parser = _Parser(s)
+    parser.parse_expr()
+    if parser.idx != len(s):
+        raise ValueError("Unexpected trailing characters")
+    return tuple(parser.ops)
+
+
+def compile_expression(expr: str) -> Program:
+    """编译表达式为后缀操作序列；结果按规范化文本进入有界 LRU 缓存。
+
+    语法错误抛出 ValueError（错误不会被缓存）。
+    """
+    return _compile_normalized(normalize_expression(expr))
+
+
+def evaluate(program: Program, rng: Any = None) -> tuple[int, list[str]]:
+    """对编译结果求值（每次求值重新掷骰），返回 (总值, 细节列表)。
+
+    rng 为提供 `roll(count, sides)` 的对象（如频道流 `_streams.Recorder`）；省略时使用 `_rng` 全局后端。
+    """
+    stack: list[int] = []
+    details: list[str] = []
+    for op, a, b in program:
+        if op == OP_PUSH:
+            stack.append(a)
+        elif op == OP_DICE:
+            rolls = rng.roll(a, b) if rng is not None else _rng.roll_dice(a, b)
+            shown = ", ".join(map(str, rolls[:DETAIL_PREVIEW]))
+            if a > DETAIL_PREVIEW:
+                shown += ", ..."
+            details.append(f"{a}d{b}=[{shown}]")
+            stack.append(sum(rolls))
+        elif op == OP_NEG:
+            stack[-1] = -stack[-1]
+        else:
+            rhs = stack.pop()
+            if op == OP_ADD:
+                stack[-1] += rhs
+            elif op == OP_SUB:
+                stack[-1] -= rhs
+            else:
+                stack[-1] *= rhs
+    return stack[0], details
+
+
+_BINARY = {OP_ADD: operator.add, OP_SUB: operator.sub, OP_MUL: operator.mul}
+
+
+def dice_per_trial(program: Program) -> int:
+    """单次求值需要掷的骰子总数。"""
+    return sum(a for op, a, _b in program if op == OP_DICE)
+
+
+def evaluate_many(program: Program, trials: int, rng: Any = None) -> list[int]:
+    """对编译结果独立求值 trials 次，只返回总值。
+
+    按列求值：每个骰子段一次性抽取 trials 组骰子（见 `_rng.roll_sums`），运算逐列进行，不生成细节文本。
+    rng 为提供 `roll_sums(count, sides, trials)` 的对象（如 `_streams.StreamService.fork` 返回的子流）；省略时使用 `_rng` 全局后端。
+    """
+    stack: list[list[int]] = []
+    for op, a, b in program:
+        if op == OP_PUSH:
+            stack.append([a] * trials)
+        elif op == OP_DICE:
+            stack.append(rng.roll_sums(a, b, trials) if rng is not None else _rng.roll_sums(a, b, trials))
+        elif op == OP_NEG:
+            stack[-1] = [-v for v in stack[-1]]
+        else:
+            rhs = stack.pop()
+            stack[-1] = list(map(_BINARY[op], stack[-1], rhs))
+    return stack[0]
+
+
+def roll_expression(expr: str, rng: Any = None) -> tuple[int, list[str]]:
+    """编译（命中缓存时跳过）并求值表达式。"""
+    return evaluate(compile_expression(expr), rng)
+
+
+def cache_stats() -> dict[str, int]:
+    """返回编译缓存的命中/未命中计数与当前容量占用。"""
+    info = _compile_normalized.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize or 0,
+    }
+
+
+def clear_cache() -> None:
+    _compile_normalized.cache_clear()
@@ -0,0 +1,269 @@
+"""扩展发现与并发加载（bot.py 启动与 Manager 共用）。
+
+- `discover`：扫描包下不以 `_` 开头的 .py 模块，结果缓存；`search` 按目录 mtime 自动刷新，供自动补全使用
+- 扩展可在模块顶层声明 `DEPENDS_ON = ("cogs.xxx", ...)` 与 `LAZY = True`：通过 AST 读取字面量，无需导入
+- `COGS_LAZY=1` 时，声明了 `LAZY` 且不被其它扩展依赖的扩展只注册占位命令，首次调用时才导入（见 `_lazy`）
+- `load_all`：按依赖分层，层内用 `asyncio.gather` 并发加载；依赖加载失败的扩展跳过
+- 每个扩展的加载耗时汇总为启动报告
+"""
+
+import os
+import ast
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from pathlib import Path
+from typing import NamedTuple
+
+from discord.ext import commands
+
+from . import _lazy
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEPENDS_ATTR = "DEPENDS_ON"
+LAZY_ATTR = "LAZY"
+
+
+# search() 检查目录 mtime 的最小间隔（秒）：自动补全每次按键都会调用
+STALE_CHECK_INTERVAL = 2.0
+SEARCH_LIMIT = 25
+
+
+class _Index:
+    """模块名的前缀/子串索引，按查询串缓存结果。"""
+
+    __slots__ = ("_keys", "_lowered", "_memo")
+
+    _MEMO_SIZE = 256
+
+    def __init__(self, modules: tuple[str, ...]) -> None:
+        # 末段（coc）与完整路径（cogs.coc）各一份有序键，用于二分查找前缀
+        self._keys = (
+            sorted((m.rsplit(".", 1)[-1].lower(), m) for m in modules),
+            sorted((m.lower(), m) for m in modules),
+        )
+        self._lowered = [(m.lower(), m) for m in modules]
+        self._memo: dict[str, tuple[str, ...]] = {}
+
+    def search(self, query: str) -> tuple[str, ...]:
+        """依次为：末段前缀匹配、完整路径前缀匹配、子串匹配（各自按名称排序）。"""
+        query = query.strip().lower()
+        hit = self._memo.get(query)
+        if hit is not None:
+            return hit
+        found: dict[str, None] = {}
+        for keys in self._keys:
+            i = bisect_left(keys, (query,))
+            while i < len(keys) and keys[i][0].startswith(query):
+                found[keys[i][1]] = None
+                i += 1
+        for low, m in self._lowered:
+            if query in low:
+                found[m] = None
+        result = tuple(found)
+        if len(self._memo) >= self._MEMO_SIZE:
+            self._memo.clear()
+        self._memo[query] = result
+        return result
+
+
+class _Info(NamedTuple):
+    modules: tuple[str, ...]
+    depends: dict[str, tuple[str, ...]]
+    lazy: frozenset[str]
+    # (目录, mtime_ns)：目录下文件增删改名都会改变其 mtime
+    stamp: tuple[tuple[str, int], ...]
+    index: _Index
+
+
+# base_package -> 扫描结果
+_cache: dict[str, _Info] = {}
+# base_package -> 上次检查目录 mtime 的时间
+_checked: dict[str, float] = {}
+
+
+class LoadResult(NamedTuple):
+    name: str
+    seconds: float
+    error: BaseException | None = None
+    lazy: bool = False
+
+
+def _read_declarations(path: Path) -> tuple[tuple[str, ...], bool]:
+    """读取模块顶层的 `DEPENDS_ON` 与 `LAZY` 字面量；不存在或无法解析时视为未声明。"""
+    try:
+        source = path.read_text(encoding="utf-8")
+    except OSError:
+        return (), False
+    # 绝大多数扩展没有声明，先做廉价的文本检查再解析
+    if DEPENDS_ATTR not in source and LAZY_ATTR not in source:
+        return (), False
+    try:
+        tree = ast.parse(source, filename=str(path))
+    except SyntaxError:
+        return (), False
+    values = {}
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id in (DEPENDS_ATTR, LAZY_ATTR)
+        ):
+            try:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                logger.warning("%s in %s is not a literal, ignoring", node.targets[0].id, path)
+    return tuple(str(v) for v in values.get(DEPENDS_ATTR, ())), values.get(LAZY_ATTR) is True
+
+
+def _scan(base_package: str) -> _Info:
+    package_dir = ROOT_DIR / base_package.replace(".", "/")
+    modules: list[str] = []
+    depends: dict[str, tuple[str, ...]] = {}
+    lazy: set[str] = set()
+    stamp: list[tuple[str, int]] = []
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        stamp.append((root, os.stat(root).st_mtime_ns))
+        rel_parts = Path(root).relative_to(package_dir).parts
+        for filename in files:
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            name = ".".join((base_package, *rel_parts, filename[:-3]))
+            modules.append(name)
+            deps, is_lazy = _read_declarations(Path(root, filename))
+            if deps:
+                depends[name] = deps
+            if is_lazy:
+                lazy.add(name)
+    modules.sort()
+    return _Info(tuple(modules), depends, frozenset(lazy), tuple(stamp), _Index(tuple(modules)))
+
+
+def _is_stale(info: _Info) -> bool:
+    for root, mtime in info.stamp:
+        try:
+            if os.stat(root).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _info(base_package: str, refresh: bool = False) -> _Info:
+    if refresh or base_package not in _cache:
+        _cache[base_package] = _scan(base_package)
+        _checked[base_package] = time.monotonic()
+    return _cache[base_package]
+
+
+def discover(base_package: str = "cogs", refresh: bool = False) -> tuple[str, ...]:
+    """返回包下可加载的扩展模块路径（如 'cogs.general'），按名称排序。"""
+    return _info(base_package, refresh).modules
+
+
+def search(query: str, base_package: str = "cogs", limit: int = SEARCH_LIMIT) -> tuple[str, ...]:
+    """按前缀/子串查找扩展模块；目录有变化时（最多每 STALE_CHECK_INTERVAL 秒检查一次）重新扫描。"""
+    info = _info(base_package)
+    now = time.monotonic()
+    if now - _checked.get(base_package, 0.0) >= STALE_CHECK_INTERVAL:
+        _checked[base_package] = now
+        if _is_stale(info):
+            info = _info(base_package, refresh=True)
+    return info.index.search(query)[:limit]
+
+
+def dependencies(base_package: str = "cogs") -> dict[str, tuple[str, ...]]:
+    return _info(base_package).depends
+
+
+def lazy_enabled() -> bool:
+    return os.getenv("COGS_LAZY", "0").strip().lower() in ("1", "true", "yes")
+
+
+def load_order(modules: tuple[str, ...], depends: dict[str, tuple[str, ...]]) -> list[list[str]]:
+    """按依赖分层：每层内的扩展互不依赖，可并发加载。
+
+    依赖不在待加载集合中的忽略（视为已加载或外部提供）；存在环时剩余扩展合为最后一层并告警。
+    """
+    pending = {m: {d for d in depends.get(m, ()) if d in modules and d != m} for m in modules}
+    layers: list[list[str]] = []
+    while pending:
+        ready = sorted(m for m, deps in pending.items() if not deps)
+        if not ready:
+            logger.warning("Dependency cycle among extensions: %s", ", ".join(sorted(pending)))
+            layers.append(sorted(pending))
+            break
+        layers.append(ready)
+        for m in ready:
+            del pending[m]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return layers
+
+
+async def _timed_load(bot: commands.Bot, name: str) -> LoadResult:
+    start = time.perf_counter()
+    try:
+        await bot.load_extension(name)
+    except Exception as exc:
+        logger.exception("Failed to load extension %s: %s", name, exc)
+        return LoadResult(name, time.perf_counter() - start, exc)
+    return LoadResult(name, time.perf_counter() - start)
+
+
+def _register_lazy(bot: commands.Bot, name: str) -> LoadResult | None:
+    start = time.perf_counter()
+    if not _lazy.register(bot, name):
+        return None
+    return LoadResult(name, time.perf_counter() - start, lazy=True)
+
+
+async def load_all(bot: commands.Bot, base_package: str = "cogs") -> list[LoadResult]:
+    """发现并加载包下所有扩展，返回每个扩展的加载结果。"""
+    info = _info(base_package)
+    modules, depends = info.modules, info.depends
+    lazy: set[str] = set()
+    if lazy_enabled():
+        # 被其它扩展依赖的扩展仍正常加载，保证依赖方加载时其已就绪
+        required = {d for deps in depends.values() for d in deps}
+        lazy = set(info.lazy - required)
+    results: list[LoadResult] = []
+    failed: set[str] = set()
+    for layer in load_order(modules, depends):
+        runnable = []
+        for name in layer:
+            missing = [d for d in depends.get(name, ()) if d in failed]
+            if missing:
+                logger.error("Skipping extension %s: dependency failed (%s)", name, ", ".join(missing))
+                failed.add(name)
+                results.append(LoadResult(name, 0.0, RuntimeError(f"dependency failed: {', '.join(missing)}")))
+                continue
+            if name in lazy:
+                result = _register_lazy(bot, name)
+                if result is not None:
+                    results.append(result)
+                    continue
+            runnable.append(name)
+        for result in await asyncio.gather(*(_timed_load(bot, name) for name in runnable)):
+            results.append(result)
+            if result.error is not None:
+                failed.add(result.name)
+    return results
+
+
+def format_report(results: list[LoadResult], total: float) -> str:
+    """启动报告：按耗时降序列出每个扩展。"""
+    ok = sum(1 for r in results if r.error is None)
+    lines = [f"Loaded {ok}/{len(results)} extensions in {total * 1000:.1f}ms"]
+    for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+        if r.error is not None:
+            status = f"FAILED ({r.error})"
+        else:
+            status = "lazy (stubs only)" if r.lazy else "ok"
+        lines.append(f"  {r.seconds * 1000:8.1f}ms  {r.name}  {status}")
+    return "\n".join(lines)
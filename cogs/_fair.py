@@ -0,0 +1,156 @@
+"""公平暗骰：密码学随机数 + 承诺-揭示（commit-reveal）。
+
+- 骰子取自 `os.urandom` 熵池（不经频道流，`RNG_MASTER_SEED` 泄露也无法预测结果）；
+  熵池整块缓冲，当前块用完时换上后台线程预先生成的备用块，事件循环上不等待系统调用
+- 暗骰结果私聊给掷骰者，频道内公开承诺：`sha256(nonce|结果文本|salt)` 与 nonce；
+  salt 为 `secrets` 生成的 128 位随机串，揭示前不公开——否则 1d100 只有 100 种可能，可以直接穷举出结果
+- `/reveal nonce` 由掷骰者或本频道 KP 公开原文与 salt，任何人都可以自行计算 sha256 核对
+
+服务挂在 bot 上（`bot._fair_dice`），扩展 reload 后未揭示的承诺仍然有效；承诺只保存在内存中，重启后失效。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import secrets
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple
+
+from ._streams import WORD_TYPECODE, WordSource
+from ._utils import env_number
+
+if TYPE_CHECKING:
+    from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# 熵池每块字节数的默认值与下限
+POOL_BYTES = 16384
+_MIN_POOL_BYTES = 256
+# 未揭示的承诺最多保留条数，超出时丢弃最早的
+MAX_PENDING = 10000
+
+
+class EntropyPool(WordSource):
+    """`os.urandom` 熵池：接口与频道流相同（die / roll / bits），可直接传给 `_dice.evaluate`。
+
+    在事件循环中使用时，每次换块后立即在线程池中生成下一块备用；备用块未就绪（或没有运行中的事件循环）时才同步生成。
+    """
+
+    __slots__ = ("_spare", "_refilling", "refills", "sync_refills")
+
+    def __init__(self, size: int = POOL_BYTES) -> None:
+        self._size = max(_MIN_POOL_BYTES, size) // 4
+        self._spare: array | None = None
+        self._refilling = False
+        self.refills = 0
+        self.sync_refills = 0
+        self._buf = self._generate()
+        self._i = 0
+
+    def _generate(self) -> array:
+        # 字节序无关紧要：每个字都是均匀随机的
+        return array(WORD_TYPECODE, os.urandom(self._size * 4))
+
+    def _refill(self) -> None:
+        spare, self._spare = self._spare, None
+        if spare is None:
+            spare = self._generate()
+            self.sync_refills += 1
+        self._buf = spare
+        self._i = 0
+        self.refills += 1
+        self.prefetch()
+
+    def prefetch(self) -> None:
+        """在线程池中生成备用块（已有备用块或正在生成时忽略）；必须在事件循环线程中调用，否则不做任何事。"""
+        if self._spare is not None or self._refilling:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refilling = True
+        loop.run_in_executor(None, self._generate).add_done_callback(self._set_spare)
+
+    def _set_spare(self, future: asyncio.Future) -> None:
+        self._refilling = False
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._spare = future.result()
+
+
+class Commitment(NamedTuple):
+    nonce: str
+    channel_id: int
+    user_id: int
+    roller: str
+    text: str
+    salt: str
+    digest: str
+    at: float
+
+    @property
+    def preimage(self) -> str:
+        return preimage_of(self.nonce, self.text, self.salt)
+
+
+def preimage_of(nonce: str, text: str, salt: str) -> str:
+    """承诺的原文：`nonce|结果文本|salt`；揭示时公开，任何人可自行计算 sha256 核对。"""
+    return f"{nonce}|{text}|{salt}"
+
+
+def digest_of(nonce: str, text: str, salt: str) -> str:
+    return hashlib.sha256(preimage_of(nonce, text, salt).encode()).hexdigest()
+
+
+class FairDice:
+    """熵池与未揭示承诺表。"""
+
+    def __init__(self, pool_bytes: int = POOL_BYTES, max_pending: int = MAX_PENDING) -> None:
+        self.pool = EntropyPool(pool_bytes)
+        self.max_pending = max(1, max_pending)
+        self._pending: OrderedDict[str, Commitment] = OrderedDict()
+
+    def commit(self, channel_id: int, user_id: int, roller: str, text: str) -> Commitment:
+        """为暗骰结果文本生成承诺并登记，返回承诺（含 nonce 与 digest）。"""
+        nonce = secrets.token_hex(6)
+        while nonce in self._pending:
+            nonce = secrets.token_hex(6)
+        salt = secrets.token_hex(16)
+        commitment = Commitment(nonce, channel_id, user_id, roller, text, salt, digest_of(nonce, text, salt), time.time())
+        self._pending[nonce] = commitment
+        if len(self._pending) > self.max_pending:
+            dropped = self._pending.popitem(last=False)[1]
+            logger.warning("Dropped unrevealed fair roll %s (pending limit %s)", dropped.nonce, self.max_pending)
+        return commitment
+
+    def get(self, nonce: str) -> Commitment | None:
+        return self._pending.get(nonce)
+
+    def pop(self, nonce: str) -> Commitment | None:
+        return self._pending.pop(nonce, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "refills": self.pool.refills,
+            "sync_refills": self.pool.sync_refills,
+        }
+
+
+def default_fair() -> bool:
+    """`COC_FAIR_SECRET=1` 时 /secret 默认使用公平模式。"""
+    return os.getenv("COC_FAIR_SECRET", "0").strip() == "1"
+
+
+def get_fair(bot: commands.Bot) -> FairDice:
+    """返回 bot 共享的公平暗骰服务（首次调用时按环境变量创建）。"""
+    if not hasattr(bot, "_fair_dice"):
+        bot._fair_dice = FairDice(env_number("FAIR_POOL_BYTES", POOL_BYTES, int))  # type: ignore[attr-defined]
+    return bot._fair_dice  # type: ignore[attr-defined]
@@ -0,0 +1,112 @@
+"""/help 与 .help 共用的帮助 Embed。
+
+内容从已注册的应用命令（`bot.tree`）与文本命令（`bot.commands`）生成，不再手写重复文本；
+生成结果缓存在 bot 上，仅在扩展加载 / 卸载 / 重载后（由 Manager 调用 `invalidate`）重建。
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+TITLE = "📖 Command Help"
+DESCRIPTION = "Here are all available commands. Use `/` for slash commands and `.` prefix for text commands."
+FOOTER = "Tip: Many text commands support @user to perform actions on other players"
+
+# 分组与组内顺序；未列出的命令归入 OTHER_SECTION
+SECTIONS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("🔧 General Commands", ("ping", "help")),
+    ("🎲 Dice Rolling", ("roll", "rollmany", "secret", "reveal", "prob", "flip")),
+    ("🎭 CoC Checks", ("check", "groupcheck", "sc", "growth", "odds", "ti")),
+    ("👤 Character Management", ("stats", "set", "add", "remove", "reset", "cs", "nn", "kp", "history")),
+)
+OTHER_SECTION = "🧩 Other Commands"
+
+# Embed 单个字段值的长度上限
+_FIELD_LIMIT = 1024
+
+
+def _slash_usage(cmd: app_commands.Command) -> str:
+    params = " ".join(f"<{p.name}>" if p.required else f"[{p.name}]" for p in cmd.parameters)
+    return f"`/{cmd.name}{' ' + params if params else ''}`"
+
+
+def _split_help(cmd: commands.Command) -> tuple[str, str, str]:
+    """文本命令的 help 形如 "说明. Usage: 用法. 补充说明"，拆成 (说明, 用法, 补充说明)。"""
+    summary, _, usage = (cmd.help or "").partition(" Usage:")
+    usage, _, notes = usage.strip().partition(". ")
+    return summary.strip().rstrip("."), usage.strip().rstrip("."), notes.strip().rstrip(".")
+
+
+def _text_usage(cmd: commands.Command) -> str:
+    _summary, usage, _notes = _split_help(cmd)
+    if usage:
+        # help 中手写的用法比 `cmd.signature`（如 `[arg]`）更准确；"a or b" 列出多种写法
+        usages = [f"`{part.strip()}`" for part in usage.split(" or ")]
+    else:
+        signature = cmd.signature
+        usages = [f"`.{cmd.name}{' ' + signature if signature else ''}`"]
+    text = " or ".join(usages)
+    if cmd.aliases:
+        text += f" (alias {', '.join(f'`.{alias}`' for alias in cmd.aliases)})"
+    return text
+
+
+def _command_lines(bot: commands.Bot) -> dict[str, str]:
+    slash = {
+        cmd.name: cmd
+        for cmd in bot.tree.get_commands()
+        if isinstance(cmd, app_commands.Command)
+    }
+    text = {cmd.name: cmd for cmd in bot.commands if not cmd.hidden}
+    lines: dict[str, str] = {}
+    for name in sorted(slash.keys() | text.keys()):
+        s_cmd, t_cmd = slash.get(name), text.get(name)
+        usages = [_slash_usage(s_cmd)] if s_cmd else []
+        summary = s_cmd.description.rstrip(".") if s_cmd else ""
+        if t_cmd:
+            usages.append(_text_usage(t_cmd))
+            text_summary, _usage, notes = _split_help(t_cmd)
+            summary = summary or text_summary
+            if notes:
+                # 例如 "Support @mention"：只对文本命令成立的补充说明
+                summary = f"{summary}. {notes}"
+        lines[name] = f"{' or '.join(usages)} - {summary}"
+    return lines
+
+
+def _add_section(embed: discord.Embed, title: str, lines: list[str]) -> None:
+    """添加一个分组字段；超过字段长度上限时拆成续接字段。"""
+    chunk: list[str] = []
+    size = 0
+    for line in lines:
+        if chunk and size + len(line) + 1 > _FIELD_LIMIT:
+            embed.add_field(name=title, value="\n".join(chunk), inline=False)
+            title, chunk, size = f"{title} (cont.)", [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        embed.add_field(name=title, value="\n".join(chunk), inline=False)
+
+
+def build_help_embed(bot: commands.Bot) -> discord.Embed:
+    lines = _command_lines(bot)
+    embed = discord.Embed(title=TITLE, description=DESCRIPTION, color=discord.Color.blue())
+    for title, names in SECTIONS:
+        _add_section(embed, title, [lines.pop(name) for name in names if name in lines])
+    if lines:
+        _add_section(embed, OTHER_SECTION, list(lines.values()))
+    embed.set_footer(text=FOOTER)
+    return embed
+
+
+def get_help_embed(bot: commands.Bot) -> discord.Embed:
+    """返回缓存的帮助 Embed，首次调用或失效后重建。"""
+    embed = getattr(bot, "_help_embed", None)
+    if embed is None:
+        embed = bot._help_embed = build_help_embed(bot)  # type: ignore[attr-defined]
+    return embed
+
+
+def invalidate(bot: commands.Bot) -> None:
+    """已注册命令发生变化时调用。"""
+    bot._help_embed = None  # type: ignore[attr-defined]
@@ -0,0 +1,357 @@
+"""追加式事件日志 + 周期快照的属性持久层（`COC_STORE_BACKEND=journal`）。
+
+- 每个变更事件写成一行紧凑 JSON：`[ts, cmd, op, channel_id, user_id, actor_id, payload]`，
+  日志只追加不改写，同时作为“谁在何时改了哪个属性”的审计记录
+- 每累计 `snapshot_every` 个事件写一次快照（每个频道一行），临时文件 fsync 后才原子替换；
+  快照落盘后日志换到下一代文件 `journal.<n>.jsonl`，旧日志改名为 `journal.<n>.archive.jsonl` 保留最近 `history` 代，
+  供 `history()`（KP 的 /history 命令）查询；更早的归档删除
+- 内存中只保留快照之后改动过的频道；其余频道在被访问时才按偏移从快照中读取，
+  常驻与逐出仍由 `AttrStore` 的 LRU/TTL 决定
+- 启动时只扫描快照建立 频道 -> 偏移 的索引，并把当前一代日志按频道分组；
+  各频道的日志记录在该频道首次被读取或改动时才应用到快照状态上
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+from typing import Callable
+
+from ._store import OP_DEL, OP_KP, OP_RESET, OP_SET, Attr, Attrs, Event
+
+logger = logging.getLogger(__name__)
+
+# 第 0 代日志沿用旧文件名，之后为 journal.<n>.jsonl
+JOURNAL_FILE = "journal.jsonl"
+SNAPSHOT_FILE = "snapshot.jsonl"
+_JOURNAL_NAME = re.compile(r"^journal(?:\.(\d+))?\.jsonl$")
+_ARCHIVE_NAME = re.compile(r"^journal\.(\d+)\.archive\.jsonl$")
+
+# 频道状态：[kp_user_id, {user_id: {key: (label, value)}}]
+_Channel = list
+
+
+def _encode(ev: Event) -> str:
+    return json.dumps(
+        [round(ev.ts, 3), ev.cmd, ev.op, ev.channel_id, ev.user_id, ev.actor_id, ev.payload],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def _encode_channel(channel_id: int, chan: _Channel) -> bytes:
+    kp_id, users = chan
+    row = [channel_id, kp_id, [[user_id, [[k, l, v] for k, (l, v) in attrs.items()]] for user_id, attrs in users.items()]]
+    return (json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _decode_event(record: list) -> Event:
+    ts, cmd, op, channel_id, user_id, actor_id, payload = record
+    return Event(op, channel_id, user_id, payload, cmd, actor_id, ts)
+
+
+def _decode_channel(kp_id: int | None, users: list) -> _Channel:
+    return [kp_id, {user_id: {key: (label, value) for key, label, value in attrs} for user_id, attrs in users}]
+
+
+def _apply(chan: _Channel, op: str, user_id: int | None, payload) -> None:
+    if op == OP_SET:
+        attrs = chan[1].setdefault(user_id, {})
+        for key, label, value in payload:
+            attrs[key] = (label, value)
+    elif op == OP_DEL:
+        attrs = chan[1].get(user_id)
+        if attrs:
+            for key in payload:
+                attrs.pop(key, None)
+    elif op == OP_RESET:
+        chan[1].pop(user_id, None)
+    elif op == OP_KP:
+        chan[0] = user_id
+
+
+def _fsync_dir(directory: Path) -> None:
+    """让目录项（rename 结果）落盘；不支持打开目录的平台上跳过。"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class JournalBackend:
+    """与 `SQLiteBackend` 接口一致：load_channel / write / close。"""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        snapshot_every: int = 50_000,
+        fsync: bool = False,
+        history: int = 20,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / SNAPSHOT_FILE
+        self.snapshot_every = snapshot_every
+        self._fsync = fsync
+        # 保留的已压缩日志代数（审计记录）；0 表示压缩后直接删除
+        self.history_generations = max(0, history)
+        # 写入（含快照）只在落盘线程，读取在事件循环线程；_changed 与快照读句柄由锁保护
+        self._lock = threading.Lock()
+        # 换代（关闭 / 打开 / 归档日志文件）与 history() 读取日志文件互斥
+        self._files_lock = threading.Lock()
+        # 快照之后改动过的频道的完整状态
+        self._changed: dict[int, _Channel] = {}
+        # 快照中各频道所在行的字节偏移
+        self._index: dict[int, int] = {}
+        # 恢复时读出、尚未应用的日志记录：channel_id -> [(op, user_id, payload), ...]
+        self._tail: dict[int, list[tuple]] = {}
+        self._snap_fh = None
+        self.generation = 0
+        self._since_snapshot = 0
+        self.recover()
+        self._fh = open(self.journal_path, "ab")
+
+    def _journal_path(self, generation: int) -> Path:
+        return self.directory / (JOURNAL_FILE if generation == 0 else f"journal.{generation}.jsonl")
+
+    @property
+    def journal_path(self) -> Path:
+        return self._journal_path(self.generation)
+
+    # ---------------- Recovery ----------------
+    def recover(self) -> int:
+        """建立快照索引并重放当前一代日志，返回重放的事件数。"""
+        start = time.perf_counter()
+        self._changed = {}
+        self._index = {}
+        self._tail = {}
+        if self._snap_fh is not None:
+            self._snap_fh.close()
+            self._snap_fh = None
+        self.generation = self._open_snapshot() if self.snapshot_path.exists() else 0
+        replayed = 0
+        journal = self.journal_path
+        if journal.exists():
+            tail = journal.read_bytes()
+            records, valid_len = self._parse_tail(tail)
+            if valid_len < len(tail):
+                # 崩溃时可能留下半行：截断到最后一条完整记录，保证后续追加的行可解析
+                logger.warning("Truncating %d bytes of incomplete journal tail", len(tail) - valid_len)
+                with open(journal, "r+b") as f:
+                    f.truncate(valid_len)
+            tail_by_channel = self._tail
+            for _ts, _cmd, op, channel_id, user_id, _actor, payload in records:
+                ops = tail_by_channel.get(channel_id)
+                if ops is None:
+                    ops = tail_by_channel[channel_id] = []
+                ops.append((op, user_id, payload))
+            replayed = len(records)
+        self._retire_old_journals()
+        self._since_snapshot = replayed
+        logger.info(
+            "Journal recovered %d indexed channels (generation %d), replayed %d events in %.3fs",
+            len(self._index), self.generation, replayed, time.perf_counter() - start,
+        )
+        return replayed
+
+    def _open_snapshot(self) -> int:
+        """打开快照并逐行建立索引（只取每行开头的频道 id，不解析 JSON），返回快照之后的日志代数。"""
+        fh = open(self.snapshot_path, "rb")
+        header = json.loads(fh.readline())
+        index = self._index
+        pos = fh.tell()
+        for line in fh:
+            index[int(line[1:line.index(b",")])] = pos
+            pos += len(line)
+        self._snap_fh = fh
+        return int(header["generation"])
+
+    def _archive_path(self, generation: int) -> Path:
+        return self.directory / f"journal.{generation}.archive.jsonl"
+
+    def _archives(self) -> list[tuple[int, Path]]:
+        """已归档的日志，按代数从新到旧。"""
+        found = []
+        for path in self.directory.iterdir():
+            m = _ARCHIVE_NAME.match(path.name)
+            if m is not None:
+                found.append((int(m.group(1)), path))
+        return sorted(found, reverse=True)
+
+    def _retire_old_journals(self) -> None:
+        """把早于当前代的日志改名归档，只保留最近 `history_generations` 代，更早的删除。"""
+        oldest_kept = self.generation - self.history_generations
+        for path in self.directory.iterdir():
+            m = _JOURNAL_NAME.match(path.name)
+            if m is None:
+                continue
+            generation = int(m.group(1) or 0)
+            if generation >= self.generation:
+                continue
+            if generation >= oldest_kept:
+                path.rename(self._archive_path(generation))
+            else:
+                path.unlink()
+        for generation, path in self._archives():
+            if generation < oldest_kept:
+                path.unlink()
+
+    @staticmethod
+    def _parse_tail(tail: bytes) -> tuple[list, int]:
+        """解析日志尾部，返回 (记录列表, 完整记录的字节长度)。"""
+        if not tail:
+            return [], 0
+        end = tail.rfind(b"\n") + 1
+        body = tail[:end].decode("utf-8")
+        try:
+            # 一次性解析整段（远快于逐行 json.loads）
+            return (json.loads("[" + body.rstrip("\n").replace("\n", ",") + "]") if body else []), end
+        except json.JSONDecodeError:
+            pass
+        records = []
+        valid = 0
+        for line in body.splitlines(keepends=True):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid += len(line.encode("utf-8"))
+        return records, valid
+
+    # ---------------- Channel state ----------------
+    def _read_snapshot(self, channel_id: int) -> _Channel | None:
+        pos = self._index.get(channel_id)
+        if pos is None:
+            return None
+        self._snap_fh.seek(pos)
+        _channel_id, kp_id, users = json.loads(self._snap_fh.readline())
+        return _decode_channel(kp_id, users)
+
+    def _base(self, channel_id: int) -> _Channel:
+        """频道的最新完整状态：首次用到时从快照读入 _changed，并应用恢复时留下的日志记录。"""
+        chan = self._changed.get(channel_id)
+        if chan is None:
+            chan = self._changed[channel_id] = self._read_snapshot(channel_id) or [None, {}]
+            for op, user_id, payload in self._tail.pop(channel_id, ()):
+                _apply(chan, op, user_id, payload)
+        return chan
+
+    # ---------------- Backend interface ----------------
+    def load_channel(self, channel_id: int) -> tuple[dict[int, Attrs], int | None]:
+        with self._lock:
+            chan = self._changed.get(channel_id)
+            if chan is None:
+                chan = self._base(channel_id) if channel_id in self._tail else self._read_snapshot(channel_id)
+            if chan is None:
+                return {}, None
+            users = {
+                user_id: {key: Attr(label, value) for key, (label, value) in attrs.items()}
+                for user_id, attrs in chan[1].items()
+            }
+            return users, chan[0]
+
+    def write(self, events: list[Event]) -> None:
+        """追加一批事件并应用到已改动频道；累计足够事件后写快照。"""
+        self._fh.write("".join(_encode(ev) + "\n" for ev in events).encode("utf-8"))
+        self._fh.flush()
+        if self._fsync:
+            os.fsync(self._fh.fileno())
+        with self._lock:
+            for ev in events:
+                _apply(self._base(ev.channel_id), ev.op, ev.user_id, ev.payload)
+        self._since_snapshot += len(events)
+        if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """写入新快照并换到下一代日志（压缩）。
+
+        未改动频道的行从旧快照原样复制。新快照 fsync 后才替换旧快照，替换并同步目录后才删除旧日志，
+        任一步骤中崩溃，恢复时都能得到完整状态。只在落盘线程调用。
+        """
+        generation = self.generation + 1
+        with self._lock:
+            for channel_id in list(self._tail):
+                self._base(channel_id)
+        changed = self._changed
+        index: dict[int, int] = {}
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "wb") as out:
+            out.write(json.dumps({"generation": generation}).encode("utf-8") + b"\n")
+            if self._snap_fh is not None:
+                # 独立的读句柄：顺序复制期间不占用 load_channel 的锁
+                with open(self.snapshot_path, "rb") as old:
+                    old.readline()
+                    for line in old:
+                        channel_id = int(line[1:line.index(b",")])
+                        if channel_id not in changed:
+                            index[channel_id] = out.tell()
+                            out.write(line)
+            for channel_id, chan in changed.items():
+                if chan[0] is not None or chan[1]:
+                    index[channel_id] = out.tell()
+                    out.write(_encode_channel(channel_id, chan))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.snapshot_path)
+        _fsync_dir(self.directory)
+
+        snap_fh = open(self.snapshot_path, "rb")
+        with self._lock:
+            old_fh, self._snap_fh = self._snap_fh, snap_fh
+            self._index = index
+            self._changed = {}
+        if old_fh is not None:
+            old_fh.close()
+        with self._files_lock:
+            self._fh.close()
+            self.generation = generation
+            self._fh = open(self.journal_path, "ab")
+            self._retire_old_journals()
+        self._since_snapshot = 0
+
+    # ---------------- Audit trail ----------------
+    def history(self, channel_id: int, limit: int, match: Callable[[Event], bool] | None = None) -> list[Event]:
+        """频道最近的变更事件（新的在前），依次读取当前日志与保留的归档；match 为额外的筛选条件。
+
+        在落盘线程之外调用（例如 `asyncio.to_thread`）；读取期间阻止日志换代。
+        """
+        # 每行形如 [ts,"cmd","op",channel_id,...]：先按字节粗筛，只解析可能命中的行
+        needle = b",%d," % channel_id
+        found: list[Event] = []
+        with self._files_lock:
+            paths = [self.journal_path] + [path for _generation, path in self._archives()]
+            for path in paths:
+                try:
+                    data = path.read_bytes()
+                except FileNotFoundError:
+                    continue
+                # 当前日志可能正被追加：只看完整的行
+                data = data[:data.rfind(b"\n") + 1]
+                matched = []
+                for line in data.splitlines():
+                    if needle not in line:
+                        continue
+                    ev = _decode_event(json.loads(line))
+                    if ev.channel_id == channel_id and (match is None or match(ev)):
+                        matched.append(ev)
+                found.extend(reversed(matched))
+                if len(found) >= limit:
+                    break
+        return found[:limit]
+
+    def close(self) -> None:
+        self._fh.close()
+        if self._snap_fh is not None:
+            self._snap_fh.close()
+            self._snap_fh = None
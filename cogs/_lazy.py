@@ -0,0 +1,200 @@
+"""扩展懒加载（`COGS_LAZY=1`，仅对声明了 `LAZY = True` 的扩展生效）。
+
+启动时不导入扩展模块，而是按 `_manifest` 静态读取的清单注册同名占位命令：
+- 占位 Slash 命令的名称、描述与参数与真实命令一致，命令树指纹不变，无需重新同步
+- 占位命令的参数补全同样转交给真实 Cog 的补全方法
+- 任一占位命令（或其补全）首次被调用时：移除该扩展的全部占位命令，正常 `load_extension`，再把本次调用转交给真实命令
+- 加载失败时恢复占位命令并告知调用者，下次调用时重试，而不是让该扩展的命令在本进程中消失
+"""
+
+import time
+import asyncio
+import inspect
+import logging
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from . import _help, _manifest
+
+logger = logging.getLogger(__name__)
+
+_TYPES = {"str": str, "int": int, "float": float, "bool": bool}
+
+LOAD_FAILED = "This command is temporarily unavailable: its extension failed to load. Please try again later or tell an admin."
+
+
+class _LazyExtension:
+    __slots__ = ("module", "slash", "text", "lock")
+
+    def __init__(self, module: str) -> None:
+        self.module = module
+        self.slash: list[app_commands.Command] = []
+        self.text: list[commands.Command] = []
+        self.lock = asyncio.Lock()
+
+
+def _registry(bot: commands.Bot) -> dict[str, _LazyExtension]:
+    registry = getattr(bot, "_lazy_extensions", None)
+    if registry is None:
+        registry = bot._lazy_extensions = {}  # type: ignore[attr-defined]
+    return registry
+
+
+def _resolve(annotation: str):
+    if annotation.endswith(" | None"):
+        return Optional[_TYPES[annotation[: -len(" | None")]]]
+    return _TYPES[annotation]
+
+
+def _slash_stub(bot: commands.Bot, module: str, spec: dict) -> app_commands.Command:
+    name = spec["name"]
+    params = [inspect.Parameter("interaction", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=discord.Interaction)]
+    for p in spec["params"]:
+        kind = inspect.Parameter.KEYWORD_ONLY if p["keyword_only"] else inspect.Parameter.POSITIONAL_OR_KEYWORD
+        default = inspect.Parameter.empty if p["required"] else p["default"]
+        params.append(inspect.Parameter(p["name"], kind, default=default, annotation=_resolve(p["annotation"])))
+
+    async def callback(interaction: discord.Interaction, **kwargs) -> None:
+        try:
+            await materialize(bot, module)
+        except Exception:
+            if interaction.response.is_done():
+                await interaction.followup.send(LOAD_FAILED, ephemeral=True)
+            else:
+                await interaction.response.send_message(LOAD_FAILED, ephemeral=True)
+            return
+        real = bot.tree.get_command(name)
+        if not isinstance(real, app_commands.Command):
+            raise app_commands.CommandNotFound(name, [])
+        await real.callback(real.binding, interaction, **kwargs)
+
+    callback.__name__ = callback.__qualname__ = f"lazy_{name}"
+    callback.__signature__ = inspect.Signature(params)  # type: ignore[attr-defined]
+    if spec["describe"]:
+        callback = app_commands.describe(**spec["describe"])(callback)
+    if spec.get("autocomplete"):
+        callback = app_commands.autocomplete(**{
+            param: _autocomplete_stub(bot, module, spec["cog"], method)
+            for param, method in spec["autocomplete"].items()
+        })(callback)
+    return app_commands.Command(name=name, description=spec["description"], callback=callback)
+
+
+def _autocomplete_stub(bot: commands.Bot, module: str, cog_name: str, method: str):
+    async def complete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice]:
+        try:
+            await materialize(bot, module)
+        except Exception:
+            return []
+        cog = bot.get_cog(cog_name)
+        if cog is None:
+            return []
+        return await getattr(cog, method)(interaction, current)
+
+    return complete
+
+
+def _text_stub(bot: commands.Bot, module: str, spec: dict) -> commands.Command:
+    async def callback(ctx: commands.Context, *, rest: str | None = None) -> None:
+        try:
+            await materialize(bot, module)
+        except Exception:
+            await ctx.send(LOAD_FAILED)
+            return
+        # 重新解析原消息，交给真实命令处理
+        await bot.process_commands(ctx.message)
+
+    return commands.Command(
+        callback,
+        name=spec["name"],
+        aliases=spec["aliases"],
+        help=spec["help"],
+        usage=spec["usage"],
+        # 指标采集跳过占位命令：真实命令随后会被再次调用并计入
+        extras={"lazy_stub": True},
+    )
+
+
+def _add_stubs(bot: commands.Bot, ext: _LazyExtension, slash: list, text: list) -> None:
+    for cmd in slash:
+        bot.tree.add_command(cmd, override=True)
+        ext.slash.append(cmd)
+    for cmd in text:
+        # 加载失败的扩展可能已注册了部分同名命令
+        bot.remove_command(cmd.name)
+        bot.add_command(cmd)
+        ext.text.append(cmd)
+
+
+def _remove_stubs(bot: commands.Bot, ext: _LazyExtension) -> None:
+    for cmd in ext.slash:
+        bot.tree.remove_command(cmd.name)
+    for cmd in ext.text:
+        bot.remove_command(cmd.name)
+    ext.slash.clear()
+    ext.text.clear()
+
+
+def register(bot: commands.Bot, module: str) -> bool:
+    """为扩展注册占位命令；清单不可用或命令名冲突时返回 False（调用方应正常加载）。"""
+    manifest = _manifest.read_manifest(module)
+    if manifest is None:
+        return False
+    ext = _LazyExtension(module)
+    try:
+        for spec in manifest["slash"]:
+            cmd = _slash_stub(bot, module, spec)
+            bot.tree.add_command(cmd)
+            ext.slash.append(cmd)
+        for spec in manifest["text"]:
+            cmd = _text_stub(bot, module, spec)
+            bot.add_command(cmd)
+            ext.text.append(cmd)
+    except Exception as exc:
+        logger.warning("Cannot register lazy stubs for %s, loading eagerly: %s", module, exc)
+        _remove_stubs(bot, ext)
+        return False
+    _registry(bot)[module] = ext
+    return True
+
+
+def is_pending(bot: commands.Bot, module: str) -> bool:
+    """扩展是否仍处于“仅注册了占位命令”的状态。"""
+    return module in _registry(bot)
+
+
+def drop(bot: commands.Bot, module: str) -> bool:
+    """移除扩展的占位命令（不加载）；返回该扩展此前是否处于懒加载状态。"""
+    ext = _registry(bot).pop(module, None)
+    if ext is None:
+        return False
+    _remove_stubs(bot, ext)
+    _help.invalidate(bot)
+    return True
+
+
+async def materialize(bot: commands.Bot, module: str) -> None:
+    """真正加载扩展（并发调用只加载一次）。"""
+    ext = _registry(bot).get(module)
+    if ext is None:
+        return
+    async with ext.lock:
+        if _registry(bot).get(module) is not ext:
+            return
+        # 加载完成前保留登记，使并发的首次调用都在锁上等待；真实命令与占位命令同名，须先移除占位命令
+        slash, text = list(ext.slash), list(ext.text)
+        _remove_stubs(bot, ext)
+        start = time.perf_counter()
+        try:
+            await bot.load_extension(module)
+        except Exception:
+            # 恢复占位命令并保留登记：下次调用时重试
+            _add_stubs(bot, ext, slash, text)
+            logger.exception("Failed to lazily load extension %s; its commands stay registered as stubs", module)
+            raise
+        _registry(bot).pop(module, None)
+        _help.invalidate(bot)
+        logger.info("Lazily loaded extension %s on first use in %.1fms", module, (time.perf_counter() - start) * 1000)
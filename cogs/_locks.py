@@ -0,0 +1,74 @@
+"""按 (channel_id, user_id) 分配的 asyncio 锁表。
+
+用于让“读属性 -> 计算 -> 写回”的流程（/add、/sc、SC 按钮）在同一角色卡上串行执行，
+不同角色卡之间互不阻塞。锁按需创建，最后一个持有/等待者离开时即从表中移除，表大小只与并发量相关。
+
+`CommandCore` 目前在读取与回写之间没有 await，单线程事件循环本身已保证这些步骤不被打断；
+锁保证的是临界区内出现挂起点（例如异步读取后端）后仍然正确，见 tests/test_locks.py 中让出事件循环的用例。
+"""
+
+import asyncio
+from typing import Hashable
+
+
+class _Slot:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        # 当前持有 + 等待该锁的协程数
+        self.users = 0
+
+
+class _Guard:
+    __slots__ = ("_owner", "_key", "_slot")
+
+    def __init__(self, owner: "KeyedLocks", key: Hashable) -> None:
+        self._owner = owner
+        self._key = key
+        self._slot: _Slot | None = None
+
+    async def __aenter__(self) -> None:
+        owner = self._owner
+        slot = owner._slots.get(self._key)
+        if slot is None:
+            slot = owner._slots[self._key] = _Slot()
+        slot.users += 1
+        owner.acquires += 1
+        if slot.lock.locked():
+            owner.contended += 1
+        try:
+            await slot.lock.acquire()
+        except BaseException:
+            self._leave(slot)
+            raise
+        self._slot = slot
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        slot = self._slot
+        self._slot = None
+        slot.lock.release()
+        self._leave(slot)
+
+    def _leave(self, slot: _Slot) -> None:
+        slot.users -= 1
+        if not slot.users:
+            del self._owner._slots[self._key]
+
+
+class KeyedLocks:
+    """用法：`async with locks(channel_id, user_id): ...`"""
+
+    def __init__(self) -> None:
+        self._slots: dict[Hashable, _Slot] = {}
+        self.acquires = 0
+        self.contended = 0
+
+    def __call__(self, channel_id: int, user_id: int) -> _Guard:
+        return _Guard(self, (channel_id, user_id))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def stats(self) -> dict[str, int]:
+        return {"active": len(self._slots), "acquires": self.acquires, "contended": self.contended}
@@ -0,0 +1,240 @@
+"""扩展命令清单：通过 AST 静态读取扩展模块中的命令定义，无需导入模块。
+
+供懒加载模式（见 `_lazy`）注册占位命令使用。只识别本仓库用到的写法：
+`@app_commands.command(name=..., description=...)`、`@app_commands.describe(...)`、
+`@app_commands.autocomplete(param=<Cog 方法>)`、`@commands.command(name=..., aliases=..., help=...)`，参数注解限于 str/int/float/bool 及其 `| None`。
+遇到无法静态还原的定义（其它装饰器、监听器、命令组、复杂注解）时返回 None，调用方应回退为正常加载。
+"""
+
+import os
+import ast
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 允许出现在占位命令参数上的注解（源码文本）
+SIMPLE_TYPES = ("str", "int", "float", "bool")
+
+# 定义了这些 Cog 钩子的扩展不能懒加载
+COG_HOOKS = (
+    "interaction_check", "cog_check", "cog_before_invoke", "cog_after_invoke",
+    "cog_app_command_error", "cog_command_error", "bot_check", "bot_check_once",
+)
+
+# 解析结果的磁盘缓存：{模块路径: {"key": [mtime_ns, size], "manifest": 清单或 null}}
+CACHE_PATH = ROOT_DIR / "data" / "lazy_manifest.json"
+
+# 模块路径 -> ((mtime_ns, size), 清单)
+_cache: dict[str, tuple[tuple[int, int], dict | None]] = {}
+_disk_loaded = False
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def module_path(module: str) -> Path:
+    return ROOT_DIR / (module.replace(".", "/") + ".py")
+
+
+def _dotted(node: ast.expr) -> str:
+    return ast.unparse(node)
+
+
+def _literal(node: ast.expr):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise _Unsupported(f"non-literal value: {_dotted(node)}") from None
+
+
+def _call_kwargs(call: ast.Call) -> dict:
+    if call.args:
+        raise _Unsupported(f"positional decorator arguments: {_dotted(call)}")
+    return {kw.arg: _literal(kw.value) for kw in call.keywords}
+
+
+def _annotation(node: ast.expr | None) -> str:
+    text = _dotted(node) if node is not None else "str"
+    base = text[: -len(" | None")] if text.endswith(" | None") else text
+    if base not in SIMPLE_TYPES:
+        raise _Unsupported(f"unsupported annotation: {text}")
+    return text
+
+
+def _params(func: ast.AsyncFunctionDef, skip: int) -> list[dict]:
+    """除去 self 与 interaction/ctx 后的参数：[{name, annotation, required, default}]。"""
+    args = func.args
+    if args.vararg or args.kwarg or args.posonlyargs:
+        raise _Unsupported(f"unsupported parameters in {func.name}")
+    positional = args.args[skip:]
+    defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+    defaults = defaults[skip:]
+    out = []
+    for arg, default in zip(positional, defaults):
+        out.append(_param(arg, default, keyword_only=False))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        out.append(_param(arg, default, keyword_only=True))
+    return out
+
+
+def _param(arg: ast.arg, default: ast.expr | None, keyword_only: bool) -> dict:
+    param = {"name": arg.arg, "annotation": _annotation(arg.annotation), "keyword_only": keyword_only}
+    if default is None:
+        param["required"] = True
+    else:
+        param["required"] = False
+        param["default"] = _literal(default)
+    return param
+
+
+def _text_usage(params: list[dict]) -> str:
+    """与 discord.py `Command.signature` 的格式一致。"""
+    parts = []
+    for p in params:
+        if p["required"]:
+            parts.append(f"<{p['name']}>")
+        elif p.get("default") in (None, ""):
+            parts.append(f"[{p['name']}]")
+        else:
+            parts.append(f"[{p['name']}={p['default']}]")
+    return " ".join(parts)
+
+
+def _autocomplete(call: ast.Call) -> dict[str, str]:
+    """参数名 -> 同一 Cog 内的补全方法名。"""
+    if call.args or not all(isinstance(kw.value, ast.Name) for kw in call.keywords):
+        raise _Unsupported(f"autocomplete must reference cog methods: {_dotted(call)}")
+    return {kw.arg: kw.value.id for kw in call.keywords}
+
+
+def _cog_name(cls: ast.ClassDef) -> str:
+    for kw in cls.keywords:
+        if kw.arg == "name":
+            return _literal(kw.value)
+    return cls.name
+
+
+def _read_cog(cls: ast.ClassDef) -> tuple[list[dict], list[dict]]:
+    cog_name = _cog_name(cls)
+    slash: list[dict] = []
+    text: list[dict] = []
+    for node in cls.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            if _dotted(node.value.func).endswith("Group"):
+                raise _Unsupported("app command groups")
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or not node.decorator_list:
+            continue
+        kinds: dict[str, ast.Call] = {}
+        for deco in node.decorator_list:
+            if not isinstance(deco, ast.Call):
+                raise _Unsupported(f"decorator on {node.name}: {_dotted(deco)}")
+            name = _dotted(deco.func)
+            if name not in ("app_commands.command", "app_commands.describe", "app_commands.autocomplete", "commands.command"):
+                raise _Unsupported(f"decorator on {node.name}: {name}")
+            kinds[name] = deco
+        if not isinstance(node, ast.AsyncFunctionDef):
+            raise _Unsupported(f"{node.name} is not a coroutine")
+        if "app_commands.command" in kinds:
+            meta = _call_kwargs(kinds["app_commands.command"])
+            describe = _call_kwargs(kinds["app_commands.describe"]) if "app_commands.describe" in kinds else {}
+            autocomplete = _autocomplete(kinds["app_commands.autocomplete"]) if "app_commands.autocomplete" in kinds else {}
+            slash.append({
+                "name": meta.get("name", node.name),
+                "description": meta.get("description") or ast.get_docstring(node) or "…",
+                "params": _params(node, 2),
+                "describe": describe,
+                "autocomplete": autocomplete,
+                "cog": cog_name,
+            })
+        elif "commands.command" in kinds:
+            meta = _call_kwargs(kinds["commands.command"])
+            params = _params(node, 2)
+            text.append({
+                "name": meta.get("name", node.name),
+                "aliases": list(meta.get("aliases", ())),
+                "help": meta.get("help") or ast.get_docstring(node) or "",
+                "usage": _text_usage(params),
+            })
+        else:
+            raise _Unsupported(f"describe without command on {node.name}")
+    return slash, text
+
+
+def _build(path: Path) -> dict:
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    slash: list[dict] = []
+    text: list[dict] = []
+    cogs: list[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and any(_dotted(b) == "commands.Cog" for b in node.bases):
+            if any(isinstance(n, ast.Attribute) and n.attr == "listener" for n in ast.walk(node)):
+                raise _Unsupported(f"event listeners in {node.name}")
+            hooks = [n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)) and n.name in COG_HOOKS]
+            if hooks:
+                # 占位命令绕过了 Cog 级检查与错误处理
+                raise _Unsupported(f"cog hooks in {node.name}: {', '.join(hooks)}")
+            cogs.append(node.name)
+            s, t = _read_cog(node)
+            slash.extend(s)
+            text.extend(t)
+    if not cogs:
+        raise _Unsupported("no Cog classes found")
+    return {"cogs": cogs, "slash": slash, "text": text}
+
+
+def _load_disk_cache() -> None:
+    global _disk_loaded
+    _disk_loaded = True
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable manifest cache %s: %s", CACHE_PATH, exc)
+        return
+    for module, entry in data.items():
+        _cache.setdefault(module, (tuple(entry["key"]), entry["manifest"]))
+
+
+def _save_disk_cache() -> None:
+    data = {module: {"key": list(key), "manifest": manifest} for module, (key, manifest) in _cache.items()}
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, CACHE_PATH)
+    except OSError as exc:
+        logger.warning("Failed to save manifest cache %s: %s", CACHE_PATH, exc)
+
+
+def read_manifest(module: str) -> dict | None:
+    """返回扩展模块的命令清单；无法静态还原时返回 None。
+
+    解析结果按源文件 (mtime, 大小) 缓存在内存与磁盘上，源文件未变时无需重新解析。
+    """
+    path = module_path(module)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    if not _disk_loaded:
+        _load_disk_cache()
+    cached = _cache.get(module)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    try:
+        manifest = _build(path)
+    except (_Unsupported, SyntaxError, OSError) as exc:
+        logger.info("Extension %s cannot be loaded lazily: %s", module, exc)
+        manifest = None
+    _cache[module] = (key, manifest)
+    _save_disk_cache()
+    return manifest
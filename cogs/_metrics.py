@@ -0,0 +1,158 @@
+"""命令指标：按命令统计耗时直方图、调用次数、错误数与进行中的命令数，输出 Prometheus 文本格式。
+
+- 耗时从 bot 收到命令（Slash：`interaction_check`；文本：全局检查）起算，到完成 / 出错事件为止
+- 命令通过 `defer()` 延迟响应时，往返耗时单独记录（见 `defer`），其余部分记为自身代码耗时
+- 直方图使用固定桶，记录一次只需一次二分查找与几次加法
+- 额外指标（网关延迟、出站队列、属性存储等）以回调形式注册，在抓取时才计算
+
+数据挂在 bot 上（`bot._coc_metrics`），扩展 reload 后继续累计；采集与 HTTP 服务见 `cogs/metrics.py`。
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable
+
+# 直方图桶上界（秒），最后隐含 +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Interaction.extras 中记录的开始时间与 defer 往返耗时
+START_KEY = "metrics_start"
+DEFER_KEY = "metrics_defer"
+
+PREFIX = "bot"
+
+KINDS = ("slash", "text")
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _CommandSeries:
+    __slots__ = ("duration", "defer", "handler", "ok", "errors")
+
+    def __init__(self) -> None:
+        # 总耗时、defer 往返耗时、自身代码耗时（总耗时减去 defer）
+        self.duration = Histogram()
+        self.defer = Histogram()
+        self.handler = Histogram()
+        self.ok = 0
+        self.errors = 0
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str], _CommandSeries] = {}
+        self.in_flight = dict.fromkeys(KINDS, 0)
+        # 指标名 -> (说明, 回调)；回调返回当前值
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def begin(self, kind: str) -> float:
+        """命令开始：进行中计数加一，返回开始时间（交给 `finish`）。"""
+        self.in_flight[kind] += 1
+        return time.perf_counter()
+
+    def finish(self, kind: str, command: str, start: float, *, error: bool = False, defer: float | None = None) -> None:
+        elapsed = time.perf_counter() - start
+        self.in_flight[kind] -= 1
+        series = self._series.get((kind, command))
+        if series is None:
+            series = self._series[(kind, command)] = _CommandSeries()
+        series.duration.observe(elapsed)
+        if defer is not None:
+            series.defer.observe(defer)
+            series.handler.observe(max(0.0, elapsed - defer))
+        else:
+            series.handler.observe(elapsed)
+        if error:
+            series.errors += 1
+        else:
+            series.ok += 1
+
+    def count_error(self, kind: str, command: str) -> None:
+        """命令开始前（参数解析、检查阶段）失败：只计错误数。"""
+        series = self._series.get((kind, command))
+        if series is None:
+            series = self._series[(kind, command)] = _CommandSeries()
+        series.errors += 1
+
+    def gauge(self, name: str, help_text: str, func: Callable[[], float]) -> None:
+        self._gauges[name] = (help_text, func)
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）。"""
+        out: list[str] = []
+        items = sorted(self._series.items())
+        for metric, attr, help_text in (
+            ("command_duration_seconds", "duration", "End-to-end command latency from receipt to completion."),
+            ("command_defer_seconds", "defer", "Round trip of interaction.response.defer()."),
+            ("command_handler_seconds", "handler", "Command latency excluding the defer() round trip."),
+        ):
+            name = f"{PREFIX}_{metric}"
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} histogram")
+            for (kind, command), series in items:
+                hist = getattr(series, attr)
+                if not hist.count:
+                    continue
+                labels = f'kind="{kind}",command="{_escape(command)}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, hist.counts):
+                    cumulative += n
+                    out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                out.append(f"{name}_sum{{{labels}}} {hist.total:.6f}")
+                out.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        name = f"{PREFIX}_commands_total"
+        out.append(f"# HELP {name} Completed commands by status.")
+        out.append(f"# TYPE {name} counter")
+        for (kind, command), series in items:
+            labels = f'kind="{kind}",command="{_escape(command)}"'
+            out.append(f'{name}{{{labels},status="ok"}} {series.ok}')
+            out.append(f'{name}{{{labels},status="error"}} {series.errors}')
+
+        name = f"{PREFIX}_commands_in_flight"
+        out.append(f"# HELP {name} Commands currently running.")
+        out.append(f"# TYPE {name} gauge")
+        for kind in KINDS:
+            out.append(f'{name}{{kind="{kind}"}} {self.in_flight[kind]}')
+
+        for gauge, (help_text, func) in sorted(self._gauges.items()):
+            try:
+                value = float(func())
+            except Exception:
+                continue
+            name = f"{PREFIX}_{gauge}"
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} gauge")
+            out.append(f"{name} {value:g}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_registry(bot) -> Registry:
+    registry = getattr(bot, "_coc_metrics", None)
+    if registry is None:
+        registry = bot._coc_metrics = Registry()
+    return registry
+
+
+async def defer(interaction, **kwargs) -> None:
+    """`interaction.response.defer(**kwargs)`，并记录往返耗时供指标区分 defer 与自身代码。"""
+    start = time.perf_counter()
+    await interaction.response.defer(**kwargs)
+    interaction.extras[DEFER_KEY] = time.perf_counter() - start
@@ -0,0 +1,289 @@
+"""文本命令结果的出站队列：按频道合并短时间内的多条纯文本消息，并按令牌桶节流。
+
+- 频道空闲时首条消息立即发送；之后在合并窗口（默认 150ms）内排队的结果合并为一条消息，单条不超过 2000 字符
+- 每个频道一个令牌桶（默认 3 条突发、每秒补充 0.4 条：任意 5 秒内不超过 Discord 频道限速的 5 条），
+  超出时在本地排队，等待期间继续合并
+- 超长内容按行拆分（单行过长时按空白或硬切），代码块跨段时自动闭合并在下一段重新打开
+- 同一频道的消息按入队顺序发送；一条合并消息中含有不同用户的结果时，每条结果前加上触发者的显示名
+
+只用于不带 embed / view / 文件的普通频道消息；Slash 命令的响应绑定在各自的 Interaction 上，不能合并。
+队列挂在 bot 上（`bot._coc_outbox`），扩展 reload 后继续使用。`COC_OUTBOX=0` 时直接发送。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from ._utils import env_number
+
+if TYPE_CHECKING:
+    import discord
+    from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# Discord 单条消息的字符上限
+MESSAGE_LIMIT = 2000
+# 合并多条结果时的分隔符
+SEPARATOR = "\n"
+
+_FENCE = "```"
+# 拆分时为重新打开 / 闭合代码块预留的字符数
+_FENCE_RESERVE = 32
+# 频道数超过该值时清理空闲队列
+_PRUNE_AT = 1024
+
+
+def _hard_wrap(line: str, width: int) -> list[str]:
+    """把超过 width 的单行切成多段：优先在后半段的最后一个空白处断开。"""
+    pieces = []
+    while len(line) > width:
+        cut = line.rfind(" ", width // 2, width)
+        if cut <= 0:
+            cut = width
+        pieces.append(line[:cut])
+        line = line[cut:].lstrip(" ")
+    pieces.append(line)
+    return pieces
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """把文本拆成不超过 limit 字符的多段，尽量在行边界断开，并保持代码块完整。"""
+    if len(text) <= limit:
+        return [text]
+    width = max(1, limit - _FENCE_RESERVE)
+    chunks: list[str] = []
+    current = ""
+    # 当前所在代码块的起始标记（如 "```py"），不在代码块内时为空
+    fence = ""
+    for line in text.split("\n"):
+        for piece in _hard_wrap(line, width):
+            # 始终为可能需要的闭合标记预留空间
+            if current and len(current) + 1 + len(piece) + len(_FENCE) + 1 > limit:
+                chunks.append(current + "\n" + _FENCE if fence else current)
+                current = fence
+            current = f"{current}\n{piece}" if current else piece
+        if line.count(_FENCE) % 2:
+            if fence:
+                fence = ""
+            else:
+                lang = line.strip()[len(_FENCE):].split(maxsplit=1)
+                fence = _FENCE + (lang[0][:16] if lang else "")
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TokenBucket:
+    """容量 capacity、每秒补充 rate 个令牌；每发送一条消息消耗一个。"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """距离有可用令牌还需等待的秒数。"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Pending:
+    __slots__ = ("text", "author", "future", "enqueued")
+
+    def __init__(self, text: str, author: str | None, future: asyncio.Future, enqueued: float) -> None:
+        self.text = text
+        self.author = author
+        self.future = future
+        self.enqueued = enqueued
+
+    @property
+    def size(self) -> int:
+        """合并时占用的字符数：按需加上的作者前缀也计算在内。"""
+        return len(self.text) + (len(self.author) + 2 if self.author else 0)
+
+
+def _join(batch: list[_Pending]) -> str:
+    """合并一批结果；来自多位用户时，每条结果前加上 "名字: "，否则原样拼接。"""
+    if len({item.author for item in batch}) == 1:
+        return SEPARATOR.join(item.text for item in batch)
+    return SEPARATOR.join(f"{item.author}: {item.text}" if item.author else item.text for item in batch)
+
+
+class _ChannelQueue:
+    __slots__ = ("pending", "bucket", "task", "last_sent")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.pending: deque[_Pending] = deque()
+        self.bucket = bucket
+        self.task: asyncio.Task | None = None
+        self.last_sent = float("-inf")
+
+
+class Outbox:
+    """按频道排队的出站消息：`await outbox.send(channel, text)` 在消息实际发出后返回。"""
+
+    def __init__(
+        self,
+        *,
+        window: float = 0.15,
+        rate: float = 0.4,
+        burst: int = 3,
+        limit: int = MESSAGE_LIMIT,
+    ) -> None:
+        self.window = max(0.0, window)
+        self.rate = rate if rate > 0 else 0.4
+        self.burst = max(1, burst)
+        self.limit = limit
+        self._queues: dict[int, _ChannelQueue] = {}
+        # 统计
+        self.payloads = 0
+        self.delivered = 0
+        self.messages = 0
+        self.max_depth = 0
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    def _queue_for(self, channel_id: int) -> _ChannelQueue:
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            if len(self._queues) >= _PRUNE_AT:
+                self._prune()
+            queue = self._queues[channel_id] = _ChannelQueue(TokenBucket(self.rate, self.burst))
+        return queue
+
+    def _prune(self) -> None:
+        """移除无待发消息且令牌已补满的频道队列（重新创建时状态等价）。"""
+        now = time.monotonic()
+        for channel_id, queue in list(self._queues.items()):
+            if queue.task is None and not queue.pending and queue.bucket.is_full(now):
+                del self._queues[channel_id]
+
+    async def send(self, channel: discord.abc.Messageable, content: str, author: str | None = None) -> discord.Message:
+        """排队发送纯文本；返回包含该内容（的最后一段）的消息。发送失败时抛出原异常。
+
+        author 为触发命令的用户显示名，与其他用户的结果合并到同一条消息时用于区分归属。
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._queue_for(channel.id)
+        now = time.monotonic()
+        futures = []
+        for piece in split_message(content, self.limit):
+            future = loop.create_future()
+            queue.pending.append(_Pending(piece, author, future, now))
+            futures.append(future)
+        self.payloads += 1
+        self.max_depth = max(self.max_depth, len(queue.pending))
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._drain(channel, queue))
+        results = await asyncio.gather(*futures)
+        return results[-1]
+
+    def _take_batch(self, queue: _ChannelQueue) -> list[_Pending]:
+        batch = [queue.pending.popleft()]
+        size = batch[0].size
+        while queue.pending:
+            nxt = queue.pending[0].size + len(SEPARATOR)
+            if size + nxt > self.limit:
+                break
+            batch.append(queue.pending.popleft())
+            size += nxt
+        return batch
+
+    async def _drain(self, channel: discord.abc.Messageable, queue: _ChannelQueue) -> None:
+        try:
+            while queue.pending:
+                # 频道刚发过消息时等满合并窗口，让同一波结果合并；空闲时首批立即发送
+                now = time.monotonic()
+                if now - queue.last_sent < self.window:
+                    wait = queue.pending[0].enqueued + self.window - now
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                wait = queue.bucket.delay(time.monotonic())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                batch = self._take_batch(queue)
+                queue.bucket.take(time.monotonic())
+                await self._deliver(channel, batch)
+                queue.last_sent = time.monotonic()
+        finally:
+            queue.task = None
+            # 被取消（如关闭时）仍未发送的消息，通知等待方
+            while queue.pending:
+                item = queue.pending.popleft()
+                if not item.future.done():
+                    item.future.cancel()
+
+    async def _deliver(self, channel: discord.abc.Messageable, batch: list[_Pending]) -> None:
+        try:
+            message = await channel.send(_join(batch))
+        except Exception as exc:
+            logger.warning("Failed to send %d queued message(s) to channel %s: %s", len(batch), channel.id, exc)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        sent = time.monotonic()
+        self.messages += 1
+        self.delivered += len(batch)
+        for item in batch:
+            delay = sent - item.enqueued
+            self.delay_total += delay
+            self.delay_max = max(self.delay_max, delay)
+            if not item.future.done():
+                item.future.set_result(message)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "channels": len(self._queues),
+            "pending": sum(len(q.pending) for q in self._queues.values()),
+            "max_depth": self.max_depth,
+            "payloads": self.payloads,
+            "messages": self.messages,
+            "avg_delay_ms": self.delay_total / max(1, self.delivered) * 1000,
+            "max_delay_ms": self.delay_max * 1000,
+        }
+
+
+def get_outbox(bot: commands.Bot) -> Outbox | None:
+    """返回 bot 共享的出站队列；`COC_OUTBOX=0` 时返回 None。"""
+    if not hasattr(bot, "_coc_outbox"):
+        outbox = None
+        if os.getenv("COC_OUTBOX", "1").strip() != "0":
+            outbox = Outbox(
+                window=env_number("COC_OUTBOX_WINDOW_MS", 150.0) / 1000,
+                rate=env_number("COC_OUTBOX_RATE", 0.4),
+                burst=env_number("COC_OUTBOX_BURST", 3, int),
+            )
+        bot._coc_outbox = outbox  # type: ignore[attr-defined]
+    return bot._coc_outbox  # type: ignore[attr-defined]
+
+
+async def send_text(ctx: commands.Context, content: str) -> discord.Message:
+    """文本命令发送纯文本结果：经出站队列合并与节流；队列禁用时直接发送。"""
+    outbox = get_outbox(ctx.bot)
+    if outbox is None:
+        return await ctx.send(content)
+    return await outbox.send(ctx.channel, content, ctx.author.display_name)
@@ -0,0 +1,287 @@
+"""骰子表达式的精确概率分布（/prob）。
+
+复用 `_dice.compile_expression` 的语法与后缀序列，按栈对“分布”求值：
+- NdM：NumPy 可用时一次 FFT 求 N 次幂；否则用前缀和做 N 次均匀卷积（每次 O(长度)）
+- `+`/`-`：分布卷积（NumPy 时走 FFT，纯 Python 时直接卷积并限制规模）
+- `*`：与常数相乘为缩放；两个随机量相乘在规模允许时逐项展开
+NumPy 为可选依赖（`pip install ".[fast]"`）：100d1000 首次计算约 0.1 秒，纯 Python 约 1 秒。
+结果按规范化表达式缓存，缓存同时限制条目数与总项数；任何中间分布的取值范围超过 `MAX_SUPPORT` 时拒绝计算。
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import accumulate
+from operator import mul, sub
+
+from . import _dice
+
+try:
+    import numpy as _np
+except ImportError:  # 可选依赖
+    _np = None
+
+# 分布缓存容量：大表达式（如 100d1000）单个分布约 10 万项
+DIST_CACHE_SIZE = 32
+# 缓存中所有分布的总项数上限（每个分布按 probs 与惰性建立的 cdf/tail 共 3 倍计）
+DIST_CACHE_MAX_CELLS = 3_000_000
+# 纯 Python 直接卷积 / 乘积展开允许的最大运算量
+MAX_DIRECT_OPS = 2_000_000
+# 单个（含中间）分布允许的最大取值个数，如 1d6*1000000 需要 500 万项，超出即拒绝
+MAX_SUPPORT = 1_000_000
+# NumPy 下长度超过该值时改用 FFT 卷积
+FFT_THRESHOLD = 512
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class Distribution:
+    """离散分布：取值 offset + i 的概率为 probs[i]。"""
+
+    __slots__ = ("offset", "probs", "_cdf", "_tail")
+
+    def __init__(self, offset: int, probs: list[float]) -> None:
+        self.offset = offset
+        self.probs = probs
+        self._cdf: list[float] | None = None
+        self._tail: list[float] | None = None
+
+    @classmethod
+    def point(cls, value: int) -> "Distribution":
+        return cls(value, [1.0])
+
+    @property
+    def is_point(self) -> bool:
+        return len(self.probs) == 1
+
+    @property
+    def low(self) -> int:
+        return self.offset
+
+    @property
+    def high(self) -> int:
+        return self.offset + len(self.probs) - 1
+
+    def mean(self) -> float:
+        return self.offset + sum(map(mul, range(len(self.probs)), self.probs))
+
+    def variance(self, mean: float | None = None) -> float:
+        mu = (self.mean() if mean is None else mean) - self.offset
+        return sum(map(mul, [(i - mu) ** 2 for i in range(len(self.probs))], self.probs))
+
+    def percentile(self, q: float) -> int:
+        """最小的取值 v，使 P(total <= v) >= q/100。"""
+        if self._cdf is None:
+            self._cdf = list(accumulate(self.probs))
+        idx = bisect_left(self._cdf, q / 100 - 1e-12)
+        return self.offset + min(idx, len(self.probs) - 1)
+
+    def at_least(self, k: int) -> float:
+        """P(total >= k)。"""
+        if k <= self.low:
+            return 1.0
+        if k > self.high:
+            return 0.0
+        if self._tail is None:
+            # 后缀和：tail[i] = P(total >= offset + i)
+            self._tail = list(accumulate(reversed(self.probs)))[::-1]
+        return min(1.0, self._tail[k - self.offset])
+
+
+# ---------------- 分布运算 ----------------
+def _check_support(size: int) -> None:
+    if size > MAX_SUPPORT:
+        raise ValueError("Expression too large for an exact distribution")
+
+
+def _uniform_power(count: int, sides: int) -> Distribution:
+    """count 个 sides 面骰之和的分布。"""
+    size = count * (sides - 1) + 1
+    _check_support(size)
+    if _np is not None and size > FFT_THRESHOLD:
+        base = _np.full(sides, 1.0 / sides)
+        spectrum = _np.fft.rfft(base, size) ** count
+        probs = _np.clip(_np.fft.irfft(spectrum, size), 0.0, None)
+        return Distribution(count, probs.tolist())
+    # 前缀和均匀卷积：new[t] = (P[t+1] - P[t+1-sides]) / sides，边界处截断
+    probs = [1.0]
+    inv = 1.0 / sides
+    pad = [0.0] * sides
+    for _ in range(count):
+        prefix = list(accumulate(probs, initial=0.0))
+        hi = prefix[1:] + [prefix[-1]] * (sides - 1)
+        lo = pad + prefix[1:-1]
+        probs = [d * inv for d in map(sub, hi, lo)]
+    return Distribution(count, probs)
+
+
+def _convolve(a: Distribution, b: Distribution) -> Distribution:
+    if a.is_point:
+        return Distribution(b.offset + a.offset, b.probs)
+    if b.is_point:
+        return Distribution(a.offset + b.offset, a.probs)
+    offset = a.offset + b.offset
+    la, lb = len(a.probs), len(b.probs)
+    _check_support(la + lb - 1)
+    if _np is not None:
+        if la + lb > FFT_THRESHOLD:
+            n = la + lb - 1
+            out = _np.fft.irfft(_np.fft.rfft(a.probs, n) * _np.fft.rfft(b.probs, n), n)
+            return Distribution(offset, _np.clip(out, 0.0, None).tolist())
+        return Distribution(offset, _np.convolve(a.probs, b.probs).tolist())
+    if la * lb > MAX_DIRECT_OPS:
+        raise ValueError("Expression too large for an exact distribution")
+    out = [0.0] * (la + lb - 1)
+    for i, p in enumerate(a.probs):
+        if not p:
+            continue
+        for j, q in enumerate(b.probs):
+            out[i + j] += p * q
+    return Distribution(offset, out)
+
+
+def _negate(a: Distribution) -> Distribution:
+    return Distribution(-a.high, a.probs[::-1])
+
+
+def _scale(a: Distribution, factor: int) -> Distribution:
+    if factor == 0:
+        return Distribution.point(0)
+    if factor < 0:
+        return _scale(_negate(a), -factor)
+    if factor == 1:
+        return a
+    size = (len(a.probs) - 1) * factor + 1
+    _check_support(size)
+    probs = [0.0] * size
+    probs[::factor] = a.probs
+    return Distribution(a.offset * factor, probs)
+
+
+def _multiply(a: Distribution, b: Distribution) -> Distribution:
+    if a.is_point:
+        return _scale(b, a.offset)
+    if b.is_point:
+        return _scale(a, b.offset)
+    if len(a.probs) * len(b.probs) > MAX_DIRECT_OPS:
+        raise ValueError("Expression too large for an exact distribution")
+    # 两个随机量相乘：逐项展开到稀疏表
+    values = [a.low * b.low, a.low * b.high, a.high * b.low, a.high * b.high]
+    low, high = min(values), max(values)
+    _check_support(high - low + 1)
+    out = [0.0] * (high - low + 1)
+    for i, p in enumerate(a.probs):
+        if not p:
+            continue
+        x = a.offset + i
+        for j, q in enumerate(b.probs):
+            out[x * (b.offset + j) - low] += p * q
+    return Distribution(low, out)
+
+
+class _DistCache:
+    """按规范化表达式缓存分布的 LRU：同时限制条目数与总项数，可在多个线程中使用。"""
+
+    def __init__(self, maxsize: int, max_cells: int) -> None:
+        self.maxsize = maxsize
+        self.max_cells = max_cells
+        self.cells = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, Distribution] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _weight(dist: Distribution) -> int:
+        return 3 * len(dist.probs)
+
+    def get(self, key: str) -> Distribution | None:
+        with self._lock:
+            dist = self._data.get(key)
+            if dist is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return dist
+
+    def put(self, key: str, dist: Distribution) -> None:
+        weight = self._weight(dist)
+        if weight > self.max_cells:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.cells -= self._weight(old)
+            self._data[key] = dist
+            self.cells += weight
+            while len(self._data) > self.maxsize or self.cells > self.max_cells:
+                _key, evicted = self._data.popitem(last=False)
+                self.cells -= self._weight(evicted)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_cache = _DistCache(DIST_CACHE_SIZE, DIST_CACHE_MAX_CELLS)
+
+
+def _evaluate(s: str) -> Distribution:
+    program = _dice.compile_expression(s)
+    stack: list[Distribution] = []
+    for op, a, b in program:
+        if op == _dice.OP_PUSH:
+            stack.append(Distribution.point(a))
+        elif op == _dice.OP_DICE:
+            stack.append(_uniform_power(a, b))
+        elif op == _dice.OP_NEG:
+            stack[-1] = _negate(stack[-1])
+        else:
+            rhs = stack.pop()
+            if op == _dice.OP_ADD:
+                stack[-1] = _convolve(stack[-1], rhs)
+            elif op == _dice.OP_SUB:
+                stack[-1] = _convolve(stack[-1], _negate(rhs))
+            else:
+                stack[-1] = _multiply(stack[-1], rhs)
+    return stack[0]
+
+
+def distribution(expr: str) -> Distribution:
+    """返回表达式总值的概率分布；语法错误或规模过大时抛出 ValueError。"""
+    key = _dice.normalize_expression(expr)
+    dist = _cache.get(key)
+    if dist is None:
+        dist = _evaluate(key)
+        _cache.put(key, dist)
+    return dist
+
+
+def format_summary(expr: str, dist: Distribution, at_least: int | None = None) -> str:
+    """将分布格式化为 /prob 的回复文本。"""
+    mean = dist.mean()
+    sd = dist.variance(mean) ** 0.5
+    pcts = ", ".join(f"p{q}={dist.percentile(q)}" for q in PERCENTILES)
+    lines = [
+        f"Prob: {expr} | range {dist.low}..{dist.high} | mean {mean:.2f} | var {sd * sd:.2f} | sd {sd:.2f}",
+        f"Percentiles: {pcts}",
+    ]
+    if at_least is not None:
+        lines.append(f"P(total >= {at_least}) = {dist.at_least(at_least) * 100:.4g}%")
+    return "\n".join(lines)
+
+
+def summarize(expr: str, at_least: int | None = None) -> str:
+    """计算分布并格式化（两者都与取值个数成正比，调用方应整体放到线程中执行）。"""
+    return format_summary(expr, distribution(expr), at_least)
+
+
+def cache_stats() -> dict[str, int]:
+    return {
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+        "size": len(_cache),
+        "maxsize": _cache.maxsize,
+        "cells": _cache.cells,
+        "max_cells": _cache.max_cells,
+    }
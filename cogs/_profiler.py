@@ -0,0 +1,191 @@
+"""运行中采样分析（`/admin profile`）：定位线上卡顿的热点函数。
+
+- 采样：后台线程按固定间隔（默认 5ms）读取事件循环线程的调用栈（`sys._current_frames`），
+  事件循环本身不做任何额外工作；循环空闲（阻塞在 selector 上）的样本单独计数
+- 可选同时在事件循环线程上启用 cProfile（确定性分析，开销明显更大，只在需要调用次数时开启）
+- 结果写入本地目录（默认 `data/profiles`）：折叠栈文件 `.folded`（可直接用 flamegraph.pl / speedscope 打开），
+  启用 cProfile 时另存 `.pstats`；并生成热点函数的简短摘要
+"""
+
+import os
+import sys
+import time
+import logging
+import pstats
+import cProfile
+import threading
+import sysconfig
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+
+from ._utils import env_number
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = ROOT_DIR / "data" / "profiles"
+DEFAULT_INTERVAL = 0.005
+
+# 事件循环空闲时阻塞所在的函数（selectors 模块）
+_IDLE_FUNCS = frozenset({"select", "poll"})
+
+_PREFIXES = tuple(
+    p.rstrip(os.sep) + os.sep
+    for p in {str(ROOT_DIR), sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"]}
+)
+
+
+def _label(code: CodeType) -> str:
+    """折叠栈中的帧名：去掉仓库 / site-packages / 标准库前缀的文件路径 + 函数名。"""
+    filename = code.co_filename
+    for prefix in _PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    # 3.11+ 的 co_qualname 含类名，可区分同名方法
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{filename}:{name}".replace(";", ":").replace(" ", "_")
+
+
+def _is_idle(stack: tuple[CodeType, ...]) -> bool:
+    leaf = stack[-1]
+    return leaf.co_name in _IDLE_FUNCS and leaf.co_filename.endswith("selectors.py")
+
+
+class SamplingProfiler:
+    """对单个线程（事件循环线程）做栈采样。"""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        # 调用栈（根在前）-> 样本数
+        self.samples: Counter[tuple[CodeType, ...]] = Counter()
+        self.idle = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if not stack:
+                continue
+            stack.reverse()
+            key = tuple(stack)
+            if _is_idle(key):
+                self.idle += 1
+            else:
+                self.samples[key] += 1
+
+    @property
+    def busy(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """flamegraph 折叠栈格式：每行 `帧;帧;帧 样本数`。"""
+        lines = [f"{';'.join(map(_label, stack))} {n}" for stack, n in self.samples.items()]
+        if self.idle:
+            lines.append(f"<idle> {self.idle}")
+        return "\n".join(lines) + "\n"
+
+    def top(self, n: int, repo_only: bool = True) -> list[tuple[str, int, int]]:
+        """按包含子调用的样本数排序的热点函数：[(帧名, 包含样本数, 自身样本数)]。"""
+        inclusive: Counter[CodeType] = Counter()
+        own: Counter[CodeType] = Counter()
+        for stack, count in self.samples.items():
+            # 递归函数在同一栈中只计一次
+            for code in set(stack):
+                inclusive[code] += count
+            own[stack[-1]] += count
+        root = str(ROOT_DIR)
+        ranked = [
+            (code, count) for code, count in inclusive.most_common()
+            if not repo_only or code.co_filename.startswith(root)
+        ]
+        return [(_label(code), count, own[code]) for code, count in ranked[:n]]
+
+
+class Session:
+    """一次分析会话：采样器 + 可选 cProfile。start / stop 须在事件循环线程上调用。"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, use_cprofile: bool = False) -> None:
+        self.sampler = SamplingProfiler(threading.get_ident(), interval)
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        if self.cprofile is not None:
+            # 其它分析工具（如调试器）已激活时 cProfile 无法启用，仅保留采样
+            try:
+                self.cprofile.enable()
+            except ValueError:
+                self.cprofile = None
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.sampler.stop()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.elapsed = time.perf_counter() - self.started
+
+    def dump(self, directory: str | os.PathLike = DEFAULT_DIR) -> list[Path]:
+        """写出折叠栈与 pstats 文件，返回文件路径。"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("profile-%Y%m%d-%H%M%S")
+        paths = [directory / f"{stem}.folded"]
+        paths[0].write_text(self.sampler.collapsed(), encoding="utf-8")
+        if self.cprofile is not None:
+            paths.append(directory / f"{stem}.pstats")
+            self.cprofile.dump_stats(paths[-1])
+        return paths
+
+    def summary(self, n: int = 10) -> str:
+        sampler = self.sampler
+        busy, total = sampler.busy, sampler.busy + sampler.idle
+        lines = [
+            f"Profiled {self.elapsed:.1f}s: {total} samples @ {sampler.interval * 1000:g}ms, "
+            f"event loop busy {busy / max(1, total):.1%} ({busy})"
+        ]
+        hot = sampler.top(n)
+        if hot:
+            lines.append("Hot functions (repo code, % of busy samples, inclusive / self):")
+            lines.extend(f"  {count / busy:6.1%} {own / busy:6.1%}  {name}" for name, count, own in hot)
+        if self.cprofile is not None:
+            stats = pstats.Stats(self.cprofile)
+            calls = sorted(
+                (
+                    (key, value) for key, value in stats.stats.items()
+                    if key[0].startswith(str(ROOT_DIR)) and key[0] != __file__
+                ),
+                key=lambda kv: kv[1][3],
+                reverse=True,
+            )[:5]
+            if calls:
+                lines.append("cProfile (repo code, cumulative):")
+                for (filename, _line, func), (_cc, ncalls, _tt, ct, _callers) in calls:
+                    rel = os.path.relpath(filename, ROOT_DIR)
+                    lines.append(f"  {ct * 1000:9.1f}ms {ncalls:7d} calls  {rel}:{func}")
+        return "\n".join(lines)
+
+
+def configured_interval() -> float:
+    """采样间隔（秒），由环境变量 `PROFILE_INTERVAL_MS` 调整。"""
+    return max(0.001, env_number("PROFILE_INTERVAL_MS", DEFAULT_INTERVAL * 1000) / 1000)
+
+
+def output_dir() -> Path:
+    return Path(os.getenv("PROFILE_DIR") or DEFAULT_DIR)
@@ -0,0 +1,123 @@
+"""掷骰随机数后端：整批抽取，避免逐个骰子调用 Python 层 RNG。
+
+- `python`：基于 `random.choices` / `getrandbits` 的批量抽取（无额外依赖）
+- `numpy`：基于 NumPy `Generator.integers`（需安装 numpy）
+- `auto`（默认）：已安装 numpy 时使用 numpy，否则回退 python
+
+通过环境变量 `DICE_BACKEND` 选择，或在运行时调用 `set_backend()`。
+"""
+
+import os
+import random
+import logging
+
+try:
+    import numpy as _np
+except ImportError:  # 可选依赖
+    _np = None
+
+logger = logging.getLogger(__name__)
+
+
+class PythonBackend:
+    """纯 Python 批量后端：一次 `choices` 调用抽取整批骰子。"""
+
+    name = "python"
+
+    def __init__(self, rng: random.Random | None = None) -> None:
+        self._rng = rng or random.Random()
+        self._ranges: dict[int, range] = {}
+
+    def roll(self, count: int, sides: int) -> list[int]:
+        population = self._ranges.get(sides)
+        if population is None:
+            population = self._ranges.setdefault(sides, range(1, sides + 1))
+        return self._rng.choices(population, k=count)
+
+    def roll_sums(self, count: int, sides: int, trials: int) -> list[int]:
+        """trials 次独立的 count 颗骰子之和：一次抽取全部骰子后按组求和。"""
+        rolls = self.roll(count * trials, sides)
+        if count == 1:
+            return rolls
+        return list(map(sum, zip(*[iter(rolls)] * count)))
+
+    def bits(self, n: int) -> int:
+        return self._rng.getrandbits(n) if n > 0 else 0
+
+
+class NumpyBackend:
+    """NumPy 后端：大批量时使用 `Generator.integers`；小批量走 Python 路径以避免调用开销。"""
+
+    name = "numpy"
+
+    # 低于该数量时 NumPy 的调用与 tolist 开销超过收益
+    SMALL_BATCH = 32
+
+    def __init__(self, seed: int | None = None) -> None:
+        if _np is None:
+            raise RuntimeError("numpy is not installed")
+        self._gen = _np.random.default_rng(seed)
+        self._small = PythonBackend(random.Random(seed))
+
+    def roll(self, count: int, sides: int) -> list[int]:
+        if count < self.SMALL_BATCH:
+            return self._small.roll(count, sides)
+        return self._gen.integers(1, sides, size=count, endpoint=True).tolist()
+
+    def roll_sums(self, count: int, sides: int, trials: int) -> list[int]:
+        if count * trials < self.SMALL_BATCH:
+            return self._small.roll_sums(count, sides, trials)
+        rolls = self._gen.integers(1, sides, size=(trials, count), endpoint=True)
+        return rolls.sum(axis=1).tolist()
+
+    def bits(self, n: int) -> int:
+        if n < self.SMALL_BATCH * 8:
+            return self._small.bits(n)
+        nbytes = (n + 7) // 8
+        value = int.from_bytes(self._gen.bytes(nbytes), "big")
+        return value >> (nbytes * 8 - n)
+
+
+def available_backends() -> list[str]:
+    return ["python", "numpy"] if _np is not None else ["python"]
+
+
+def make_backend(name: str = "auto") -> PythonBackend | NumpyBackend:
+    """按名称创建后端；`auto` 优先 numpy。未知名称或缺少依赖时回退 python。"""
+    name = (name or "auto").strip().lower()
+    if name in {"auto", "numpy"} and _np is not None:
+        return NumpyBackend()
+    if name == "numpy":
+        logger.warning("DICE_BACKEND=numpy but numpy is not installed. Falling back to python backend.")
+    elif name not in {"auto", "python"}:
+        logger.warning("Unknown DICE_BACKEND %r. Falling back to python backend.", name)
+    return PythonBackend()
+
+
+_backend = make_backend(os.getenv("DICE_BACKEND", "auto"))
+
+
+def get_backend() -> PythonBackend | NumpyBackend:
+    return _backend
+
+
+def set_backend(name: str) -> str:
+    """切换全局后端，返回实际生效的后端名。"""
+    global _backend
+    _backend = make_backend(name)
+    return _backend.name
+
+
+def roll_dice(count: int, sides: int) -> list[int]:
+    """掷 count 个 sides 面骰，返回每颗骰子的点数。"""
+    return _backend.roll(count, sides)
+
+
+def roll_sums(count: int, sides: int, trials: int) -> list[int]:
+    """批量掷骰：返回 trials 个“count 颗 sides 面骰之和”。"""
+    return _backend.roll_sums(count, sides, trials)
+
+
+def coin_bits(n: int) -> int:
+    """返回 n 个随机比特组成的整数（用于批量抛硬币）。"""
+    return _backend.bits(n)
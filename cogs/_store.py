@@ -0,0 +1,580 @@
+"""CoC 角色属性存储：内存为主，SQLite（WAL）或事件日志（见 _journal）持久化，写后批量落盘。
+
+- 读：按频道懒加载，首次访问某频道时从 SQLite 读取该频道的全部属性与 KP
+- 写：先改内存，再把变更事件放入写队列；后台任务按间隔或队列长度批量写入（单事务）
+- 命令处理从不等待磁盘写入
+- 常驻内存的频道按 LRU/TTL 逐出（仅在有持久层时），读路径不为未知频道/用户分配空表
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import sqlite3
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, deque
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping, NamedTuple
+
+from ._utils import env_number
+
+if TYPE_CHECKING:
+    from ._journal import JournalBackend
+
+logger = logging.getLogger(__name__)
+
+
+class Attr:
+    """单个属性：紧凑的 __slots__ 记录，label 经 intern 在所有角色卡之间共享。
+
+    值类型在写入时确定：整数保持为 int，其余（如 NAME）一律存为 str。
+    """
+
+    __slots__ = ("label", "value")
+
+    def __init__(self, label: str, value: int | str) -> None:
+        self.label = sys.intern(label)
+        self.value = value if type(value) is int else str(value)
+
+    def __repr__(self) -> str:
+        return f"Attr({self.label!r}, {self.value!r})"
+
+
+# 属性表：attr_key -> Attr；AttrsView 为读路径返回的只读视图类型
+Attrs = dict[str, Attr]
+AttrsView = Mapping[str, Attr]
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "coc.sqlite3"
+DEFAULT_JOURNAL_DIR = Path(__file__).resolve().parent.parent / "data" / "journal"
+
+# 事件类型
+OP_SET = "set"      # payload: ((key, label, value), ...)
+OP_DEL = "del"      # payload: (key, ...)
+OP_RESET = "reset"  # payload: ()
+OP_KP = "kp"        # user_id 为新 KP（None 表示清空）；payload: ()
+
+# 属性数值的取值范围：SQLite INTEGER 为有符号 64 位
+VALUE_MIN = -(2**63)
+VALUE_MAX = 2**63 - 1
+
+
+class Event(NamedTuple):
+    op: str
+    channel_id: int
+    user_id: int | None
+    payload: tuple = ()
+    # 审计信息：触发变更的命令、执行者与时间
+    cmd: str = ""
+    actor_id: int | None = None
+    ts: float = 0.0
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attrs (
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    label TEXT NOT NULL,
+    value,
+    PRIMARY KEY (channel_id, user_id, key)
+);
+CREATE TABLE IF NOT EXISTS kp (
+    channel_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL
+);
+"""
+
+
+class SQLiteBackend:
+    """SQLite 持久化：读连接在事件循环线程使用，写连接仅在落盘线程使用（WAL 允许读写并发）。"""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        self._reader = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load_channel(self, channel_id: int) -> tuple[dict[int, Attrs], int | None]:
+        users: dict[int, Attrs] = {}
+        rows = self._reader.execute(
+            "SELECT user_id, key, label, value FROM attrs WHERE channel_id = ? ORDER BY rowid",
+            (channel_id,),
+        )
+        for user_id, key, label, value in rows:
+            users.setdefault(user_id, {})[sys.intern(key)] = Attr(label, value)
+        row = self._reader.execute("SELECT user_id FROM kp WHERE channel_id = ?", (channel_id,)).fetchone()
+        return users, (row[0] if row else None)
+
+    def write(self, events: list[Event]) -> None:
+        """在单个事务中按顺序应用一批事件。"""
+        cur = self._writer.cursor()
+        cur.execute("BEGIN")
+        try:
+            for ev in events:
+                if ev.op == OP_SET:
+                    cur.executemany(
+                        "INSERT INTO attrs (channel_id, user_id, key, label, value) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (channel_id, user_id, key) DO UPDATE SET label = excluded.label, value = excluded.value",
+                        [(ev.channel_id, ev.user_id, key, label, value) for key, label, value in ev.payload],
+                    )
+                elif ev.op == OP_DEL:
+                    cur.executemany(
+                        "DELETE FROM attrs WHERE channel_id = ? AND user_id = ? AND key = ?",
+                        [(ev.channel_id, ev.user_id, key) for key in ev.payload],
+                    )
+                elif ev.op == OP_RESET:
+                    cur.execute(
+                        "DELETE FROM attrs WHERE channel_id = ? AND user_id = ?", (ev.channel_id, ev.user_id)
+                    )
+                elif ev.op == OP_KP:
+                    if ev.user_id is None:
+                        cur.execute("DELETE FROM kp WHERE channel_id = ?", (ev.channel_id,))
+                    else:
+                        cur.execute(
+                            "INSERT INTO kp (channel_id, user_id) VALUES (?, ?) "
+                            "ON CONFLICT (channel_id) DO UPDATE SET user_id = excluded.user_id",
+                            (ev.channel_id, ev.user_id),
+                        )
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        self._reader.close()
+        self._writer.close()
+
+
+# 持久层因事件内容本身（而非 I/O）无法写入时抛出的异常；这类事件重试也不会成功
+_UNWRITABLE = (OverflowError, TypeError, ValueError, sqlite3.InterfaceError, sqlite3.IntegrityError)
+
+
+class _ChannelEntry:
+    """单个频道的常驻数据与最近访问时间。"""
+
+    __slots__ = ("users", "kp", "last_access", "key_index")
+
+    def __init__(self, users: dict[int, Attrs] | None = None, kp: int | None = None) -> None:
+        self.users: dict[int, Attrs] = users if users is not None else {}
+        self.kp = kp
+        self.last_access = time.monotonic()
+        # user_id -> 有序属性键列表；首次补全时按需建立，之后随写入增量维护
+        self.key_index: dict[int, list[str]] = {}
+
+
+# 估算内存占用的常量（字节），取自 benchmarks/bench_memory 的实测量级
+_CHANNEL_BYTES = 400
+_USER_BYTES = 250
+_ATTR_BYTES = 125
+
+# 读路径未命中时返回的只读空表，避免为只读访问分配字典
+_EMPTY_ATTRS: AttrsView = MappingProxyType({})
+_EMPTY_USERS: Mapping[int, AttrsView] = MappingProxyType({})
+
+
+class AttrStore:
+    """频道 -> 用户 -> 属性 的内存存储，变更经写队列异步持久化。
+
+    有持久层时，常驻频道按 LRU 管理：超过 `max_channels` / `max_bytes`
+    或空闲超过 `ttl` 秒的频道会被逐出内存（数据已在持久层，下次访问再懒加载）。
+    """
+
+    def __init__(
+        self,
+        backend: "SQLiteBackend | JournalBackend | None" = None,
+        flush_interval: float = 2.0,
+        flush_threshold: int = 256,
+        max_channels: int = 0,
+        max_bytes: int = 0,
+        ttl: float = 0.0,
+    ) -> None:
+        self._backend = backend
+        self._flush_interval = flush_interval
+        self._flush_threshold = flush_threshold
+        self._max_channels = max_channels
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        # 按最近访问排序：最久未访问的在最前
+        self._channels: OrderedDict[int, _ChannelEntry] = OrderedDict()
+        self._pending: list[Event] = []
+        # 各频道在写队列中尚未落盘的事件数；有未落盘事件的频道不可逐出
+        self._dirty: Counter[int] = Counter()
+        self._wakeup: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._flush_task: asyncio.Task | None = None
+        # 持久层拒绝写入的事件（保留最近若干条以便排查），不再阻塞写队列
+        self.quarantined: deque[Event] = deque(maxlen=100)
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dropped = 0
+
+    # ---------------- Residency ----------------
+    def _entry(self, channel_id: int, create: bool) -> _ChannelEntry | None:
+        """返回频道的常驻数据；未常驻时从持久层懒加载。
+
+        无持久层时，只读访问（create=False）不会为未知频道分配条目；
+        有持久层时空频道也会常驻（避免重复查库），同样受 LRU/TTL 约束。
+        """
+        entry = self._channels.get(channel_id)
+        if entry is not None:
+            self.hits += 1
+            self._channels.move_to_end(channel_id)
+            entry.last_access = time.monotonic()
+            return entry
+        self.misses += 1
+        if self._backend is not None:
+            users, kp_id = self._backend.load_channel(channel_id)
+            entry = _ChannelEntry(users, kp_id)
+        elif create:
+            entry = _ChannelEntry()
+        else:
+            return None
+        self._channels[channel_id] = entry
+        if self._max_channels and len(self._channels) > self._max_channels:
+            self._evict_lru(lambda: len(self._channels) > self._max_channels, keep=channel_id)
+        return entry
+
+    def _evictable(self) -> bool:
+        # 无持久层时逐出会丢数据
+        return self._backend is not None
+
+    def _evict(self, channel_id: int) -> None:
+        del self._channels[channel_id]
+        self.evictions += 1
+
+    def _evict_lru(self, over_limit: Callable[[], bool], keep: int | None = None) -> int:
+        """按 LRU 顺序逐出干净（已落盘）的频道，直到 over_limit() 为假。"""
+        if not self._evictable():
+            return 0
+        evicted = 0
+        for channel_id in list(self._channels):
+            if not over_limit():
+                break
+            if channel_id == keep or self._dirty.get(channel_id):
+                continue
+            self._evict(channel_id)
+            evicted += 1
+        return evicted
+
+    def estimated_bytes(self) -> int:
+        total = 0
+        for entry in self._channels.values():
+            total += _CHANNEL_BYTES + sum(_USER_BYTES + _ATTR_BYTES * len(a) for a in entry.users.values())
+        return total
+
+    def enforce_limits(self) -> int:
+        """按 TTL、频道数与内存上限逐出频道，返回逐出数量。"""
+        if not self._evictable():
+            return 0
+        evicted = 0
+        if self._ttl > 0:
+            deadline = time.monotonic() - self._ttl
+            for channel_id, entry in list(self._channels.items()):
+                # OrderedDict 按访问时间有序，遇到未过期的即可停止
+                if entry.last_access > deadline:
+                    break
+                if not self._dirty.get(channel_id):
+                    self._evict(channel_id)
+                    evicted += 1
+        if self._max_channels:
+            evicted += self._evict_lru(lambda: len(self._channels) > self._max_channels)
+        if self._max_bytes:
+            size = self.estimated_bytes()
+            if size > self._max_bytes:
+                for channel_id, entry in list(self._channels.items()):
+                    if size <= self._max_bytes:
+                        break
+                    if self._dirty.get(channel_id):
+                        continue
+                    size -= _CHANNEL_BYTES + sum(_USER_BYTES + _ATTR_BYTES * len(a) for a in entry.users.values())
+                    self._evict(channel_id)
+                    evicted += 1
+        if evicted:
+            logger.debug("Evicted %d idle channels (resident=%d)", evicted, len(self._channels))
+        return evicted
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "resident_channels": len(self._channels),
+            "estimated_bytes": self.estimated_bytes(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "pending_events": len(self._pending),
+            "dropped_events": self.dropped,
+        }
+
+    # ---------------- Reads ----------------
+    def user_attrs(self, channel_id: int, user_id: int) -> AttrsView:
+        """只读访问用户属性；不存在时返回共享的空表，不分配新字典。"""
+        entry = self._entry(channel_id, create=False)
+        if entry is None:
+            return _EMPTY_ATTRS
+        return entry.users.get(user_id, _EMPTY_ATTRS)
+
+    def user_sheet(self, channel_id: int, user_id: int) -> tuple[AttrsView, int | None]:
+        """一次查找同时返回用户属性与频道 KP（输出显示名的命令两者都要）。"""
+        entry = self._entry(channel_id, create=False)
+        if entry is None:
+            return _EMPTY_ATTRS, None
+        return entry.users.get(user_id, _EMPTY_ATTRS), entry.kp
+
+    def channel_users(self, channel_id: int) -> Mapping[int, AttrsView]:
+        """只读访问频道内的全部角色卡（user_id -> 属性表），用于 /groupcheck 等整频道操作。"""
+        entry = self._entry(channel_id, create=False)
+        if entry is None:
+            return _EMPTY_USERS
+        return entry.users
+
+    def get_kp(self, channel_id: int) -> int | None:
+        entry = self._entry(channel_id, create=False)
+        return entry.kp if entry is not None else None
+
+    def complete_attrs(self, channel_id: int, user_id: int, query: str, limit: int = 25) -> list[str]:
+        """属性名补全：返回展示用 label，前缀匹配（按键排序）在前，不足 limit 时补充子串匹配。
+
+        query 须已按属性键规则标准化（小写、压缩空白）。
+        """
+        entry = self._entry(channel_id, create=False)
+        attrs = entry.users.get(user_id) if entry is not None else None
+        if not attrs:
+            return []
+        keys = entry.key_index.get(user_id)
+        if keys is None:
+            keys = entry.key_index[user_id] = sorted(attrs)
+        out: list[str] = []
+        i = bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query) and len(out) < limit:
+            out.append(attrs[keys[i]].label)
+            i += 1
+        if query and len(out) < limit:
+            for key in keys:
+                if query in key and not key.startswith(query):
+                    out.append(attrs[key].label)
+                    if len(out) >= limit:
+                        break
+        return out
+
+    # ---------------- Writes ----------------
+    # cmd / actor_id 仅用于审计（事件日志），不影响存储语义
+    def set_attrs(
+        self,
+        channel_id: int,
+        user_id: int,
+        items: Iterable[tuple[str, str, int | str]],
+        *,
+        cmd: str = "set",
+        actor_id: int | None = None,
+    ) -> None:
+        """写入若干 (key, label, value)。"""
+        items = tuple(items)
+        entry = self._entry(channel_id, create=True)
+        attrs = entry.users.setdefault(user_id, {})
+        keys = entry.key_index.get(user_id)
+        for key, label, value in items:
+            key = sys.intern(key)
+            if keys is not None and key not in attrs:
+                insort(keys, key)
+            attrs[key] = Attr(label, value)
+        self._enqueue(Event(OP_SET, channel_id, user_id, items, cmd, actor_id))
+
+    def remove_attrs(
+        self,
+        channel_id: int,
+        user_id: int,
+        keys: Iterable[str],
+        *,
+        cmd: str = "remove",
+        actor_id: int | None = None,
+    ) -> list[str]:
+        """删除若干属性键，返回实际删除的键。"""
+        entry = self._entry(channel_id, create=False)
+        attrs = entry.users.get(user_id) if entry is not None else None
+        if not attrs:
+            return []
+        removed = [key for key in keys if attrs.pop(key, None) is not None]
+        index = entry.key_index.get(user_id)
+        if index is not None:
+            for key in removed:
+                del index[bisect_left(index, key)]
+        if removed:
+            self._enqueue(Event(OP_DEL, channel_id, user_id, tuple(removed), cmd, actor_id))
+        return removed
+
+    def reset_user(self, channel_id: int, user_id: int, *, cmd: str = "reset", actor_id: int | None = None) -> bool:
+        """清除用户在频道内的全部属性，返回是否存在并被清除。"""
+        entry = self._entry(channel_id, create=False)
+        if entry is None:
+            return False
+        existed = entry.users.pop(user_id, None) is not None
+        entry.key_index.pop(user_id, None)
+        if existed:
+            self._enqueue(Event(OP_RESET, channel_id, user_id, (), cmd, actor_id))
+        return existed
+
+    def set_kp(self, channel_id: int, user_id: int | None, *, cmd: str = "kp", actor_id: int | None = None) -> None:
+        entry = self._entry(channel_id, create=True)
+        entry.kp = user_id
+        self._enqueue(Event(OP_KP, channel_id, user_id, (), cmd, actor_id))
+
+    # ---------------- Write-behind ----------------
+    def _enqueue(self, event: Event) -> None:
+        if self._backend is None:
+            return
+        self._pending.append(event._replace(ts=time.time()))
+        self._dirty[event.channel_id] += 1
+        if len(self._pending) >= self._flush_threshold and self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """启动后台落盘任务（幂等）。"""
+        if self._backend is None or (self._flush_task is not None and not self._flush_task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = asyncio.create_task(self._flush_loop(), name="coc-store-flush")
+
+    async def _flush_loop(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Attribute store flush failed; will retry")
+            self.enforce_limits()
+
+    async def flush(self) -> int:
+        """将写队列中的事件在一个事务中写入持久层，返回写入的事件数。"""
+        if self._backend is None or not self._pending:
+            return 0
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            events, self._pending = self._pending, []
+            if not events:
+                return 0
+            try:
+                await asyncio.to_thread(self._backend.write, events)
+            except Exception:
+                # 整批失败：逐条重写，隔离无法写入的事件；遇到其它错误时未处理的部分放回队首，保持顺序，等待下次重试
+                done = await asyncio.to_thread(self._write_each, events)
+                self._mark_clean(events[:done])
+                if done < len(events):
+                    self._pending[:0] = events[done:]
+                    raise
+                return done
+            self._mark_clean(events)
+            return len(events)
+
+    def _write_each(self, events: list[Event]) -> int:
+        """逐条写入事件（在落盘线程中执行），返回已处理（写入或隔离）的事件数。"""
+        for i, ev in enumerate(events):
+            try:
+                self._backend.write([ev])
+            except _UNWRITABLE as exc:
+                self.dropped += 1
+                self.quarantined.append(ev)
+                logger.error("Dropping event the attribute store cannot write: %r (%s)", ev, exc)
+            except Exception:
+                return i
+        return len(events)
+
+    async def history(
+        self, channel_id: int, limit: int, match: Callable[[Event], bool] | None = None
+    ) -> list[Event] | None:
+        """频道最近的变更事件（新的在前）；持久层不保留事件日志（仅内存或 SQLite）时返回 None。"""
+        reader = getattr(self._backend, "history", None)
+        if reader is None:
+            return None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # 持有落盘锁：没有正在写入中的批次，尚未落盘的事件都在写队列里，且都比日志中的新
+        async with self._flush_lock:
+            found = [
+                ev for ev in reversed(self._pending)
+                if ev.channel_id == channel_id and (match is None or match(ev))
+            ][:limit]
+            if len(found) < limit:
+                found += await asyncio.to_thread(reader, channel_id, limit - len(found), match)
+        return found
+
+    def _mark_clean(self, events: list[Event]) -> None:
+        for ev in events:
+            self._dirty[ev.channel_id] -= 1
+        self._dirty = +self._dirty  # 去掉计数为 0 的频道
+
+    async def close(self) -> None:
+        """停止后台任务并落盘剩余事件。"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+def _open_backend(path: str) -> "SQLiteBackend | JournalBackend":
+    kind = os.getenv("COC_STORE_BACKEND", "sqlite").strip().lower()
+    if kind == "journal":
+        from ._journal import JournalBackend
+
+        # journal 模式下 COC_DB_PATH 指向存放日志与快照的目录
+        directory = path if path != str(DEFAULT_DB_PATH) else str(DEFAULT_JOURNAL_DIR)
+        return JournalBackend(
+            directory,
+            snapshot_every=env_number("COC_JOURNAL_SNAPSHOT_EVERY", 50_000, int),
+            fsync=os.getenv("COC_JOURNAL_FSYNC", "0") == "1",
+            history=env_number("COC_JOURNAL_HISTORY", 20, int),
+        )
+    if kind != "sqlite":
+        logger.warning("Unknown COC_STORE_BACKEND %r. Falling back to sqlite.", kind)
+    return SQLiteBackend(path)
+
+
+def open_store() -> AttrStore:
+    """按环境变量创建存储：`COC_DB_PATH` 为空字符串时仅使用内存。"""
+    path = os.getenv("COC_DB_PATH", str(DEFAULT_DB_PATH))
+    flush_interval = env_number("COC_DB_FLUSH_INTERVAL", 2.0)
+    flush_threshold = env_number("COC_DB_FLUSH_THRESHOLD", 256, int)
+    max_channels = env_number("COC_CACHE_MAX_CHANNELS", 5000, int)
+    max_bytes = env_number("COC_CACHE_MAX_BYTES", 0, int)
+    ttl = env_number("COC_CACHE_TTL", 6 * 3600.0)
+    backend = None
+    if path:
+        try:
+            backend = _open_backend(path)
+            logger.info("Attribute store persisted to %s", path)
+        except Exception as exc:
+            logger.exception("Failed to open attribute store %s, falling back to memory: %s", path, exc)
+    return AttrStore(
+        backend,
+        flush_interval=flush_interval,
+        flush_threshold=flush_threshold,
+        max_channels=max_channels,
+        max_bytes=max_bytes,
+        ttl=ttl,
+    )
@@ -0,0 +1,370 @@
+"""按频道划分的可复现随机数流：每个频道一条独立的 `random.Random`，种子由主种子、频道 id 与 epoch 派生。
+
+- 主种子取自 `RNG_MASTER_SEED`；未设置时每次启动随机生成并写入日志（INFO），需要事后复核时应固定该值
+- 每条流以 32 位字为单位整块预生成（一次 `getrandbits` 生成 `BLOCK` 个字）到缓冲区，抽取时只移动下标，
+  缓冲区耗尽后原地换下一块；骰子用拒绝采样映射到 1~sides，结果无偏
+- 流位置 = 已消耗的字数。每条命令在掷骰日志中记一条：起止位置、各次抽取的骰型与结果（抽取本身不记位置，
+  由起点顺序推出），`/admin replay` 用同一种子重建流、从起点按顺序重新抽取并比对结果与终点
+- epoch 由启动时间与序号组成：频道流被逐出后重建、或固定主种子重启后，都不会重放已经用过的序列；
+  每个频道流建立时把 epoch 写入日志（INFO），重启后可凭主种子、频道 id 与 epoch 离线重建该流
+
+服务挂在 bot 上（`bot._rng_streams`），扩展 reload 后流位置与日志保持不变。
+`/rollmany` 一次可达上百万颗骰子，不能在事件循环中逐颗抽取：`fork` 从频道流抽取 `FORK_BITS` 位种子（记为一条
+`bits` 记录，含起止位置），整批骰子在线程中由该种子派生的子流 `Stream(seed)` 生成。复核时 replay 校验种子，
+再以同一种子与记录标签中的次数、表达式重算整批结果。
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import random
+import hashlib
+import logging
+import secrets
+import itertools
+from array import array
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, NamedTuple
+
+from ._utils import env_number
+
+if TYPE_CHECKING:
+    from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# 每次预生成的 32 位字数
+BLOCK = 1024
+_SPAN = 1 << 32
+# 32 位无符号整数的 array 类型码（个别平台上 "I" 为 2 字节）
+WORD_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+_SWAP = sys.byteorder == "big"
+# `fork` 从频道流抽取的子流种子位数
+FORK_BITS = 64
+
+
+class Draw(NamedTuple):
+    """一次抽取：数量与骰子面数（sides 为 0 表示 `bits(count)`）以及结果。"""
+
+    count: int
+    sides: int
+    values: tuple[int, ...]
+
+
+class RollRecord(NamedTuple):
+    """掷骰日志中的一条：一条命令的全部抽取；起点位置即频道内的掷骰编号，end 为命令结束时的流位置。"""
+
+    position: int
+    end: int
+    user_id: int
+    label: str
+    draws: tuple[Draw, ...]
+    at: float
+
+
+class WordSource:
+    """按块缓冲 32 位随机字的抽取基类：骰子与比特都从缓冲区顺序取用，缓冲区耗尽时调用 `_refill` 换下一块。
+
+    子类在 `_refill` 中设置新的 `_buf`（长度 `_size` 的 array）并把 `_i` 归零。
+    """
+
+    __slots__ = ("_buf", "_i", "_size")
+
+    def _refill(self) -> None:
+        raise NotImplementedError
+
+    def _word(self) -> int:
+        if self._i == self._size:
+            self._refill()
+        word = self._buf[self._i]
+        self._i += 1
+        return word
+
+    def die(self, sides: int) -> int:
+        limit = _SPAN - _SPAN % sides
+        while True:
+            if self._i == self._size:
+                self._refill()
+            word = self._buf[self._i]
+            self._i += 1
+            if word < limit:
+                return word % sides + 1
+
+    def roll(self, count: int, sides: int) -> list[int]:
+        # 超出 limit 的字被丢弃（拒绝采样），保证每个点数概率相同
+        limit = _SPAN - _SPAN % sides
+        buf, i, size = self._buf, self._i, self._size
+        out: list[int] = []
+        while len(out) < count:
+            if i == size:
+                self._i = i
+                self._refill()
+                buf, i = self._buf, 0
+            word = buf[i]
+            i += 1
+            if word < limit:
+                out.append(word % sides + 1)
+        self._i = i
+        return out
+
+    def roll_sums(self, count: int, sides: int, trials: int) -> list[int]:
+        """trials 次独立的 count 颗骰子之和（与 `_rng` 后端的 roll_sums 相同），供 `_dice.evaluate_many` 使用。"""
+        rolls = self.roll(count * trials, sides)
+        if count == 1:
+            return rolls
+        return list(map(sum, zip(*[iter(rolls)] * count)))
+
+    def bits(self, n: int) -> int:
+        if n <= 0:
+            return 0
+        value = 0
+        for _ in range((n + 31) // 32):
+            value = value << 32 | self._word()
+        return value >> (-n % 32)
+
+
+class Stream(WordSource):
+    """单条可复现的随机数流：由 `random.Random(seed)` 一次 `getrandbits` 生成一整块；位置 = 已消耗的字数。"""
+
+    __slots__ = ("_rng", "_base")
+
+    def __init__(self, seed: int) -> None:
+        self._rng = random.Random(seed)
+        self._size = BLOCK
+        self._base = -BLOCK
+        self._refill()
+
+    @property
+    def position(self) -> int:
+        return self._base + self._i
+
+    def _refill(self) -> None:
+        buf = array(WORD_TYPECODE, self._rng.getrandbits(32 * BLOCK).to_bytes(4 * BLOCK, "little"))
+        if _SWAP:
+            buf.byteswap()
+        self._buf = buf
+        self._base += BLOCK
+        self._i = 0
+
+    def seek(self, position: int) -> None:
+        """前进到 position（只能向前）：跳过的块照常生成后丢弃，保证与原流一致。"""
+        if position < self.position:
+            raise ValueError("Cannot seek backwards.")
+        while position >= self._base + BLOCK:
+            self._refill()
+        self._i = position - self._base
+
+
+class Recorder:
+    """一条命令的抽取代理：接口与 `_rng` 后端相同（roll / bits），另有单骰 die；退出时把整条命令写入频道日志一次。
+
+    用法：`with streams.draw(channel_id, user_id, "check 50") as rng: rng.die(100)`。
+    抽取在 with 块内同步完成，同一频道的命令不会交错，起点之后的位置由抽取顺序唯一确定。
+    每次抽取只向平铺列表追加 (sides, 结果) 两项，读取日志时才转换为 `RollRecord` / `Draw`。
+    """
+
+    __slots__ = ("_channel", "_stream", "_user_id", "_label", "_start", "_ops")
+
+    def __init__(self, channel: _Channel, user_id: int, label: str) -> None:
+        self._channel = channel
+        stream = self._stream = channel.stream
+        self._user_id = user_id
+        self._label = label
+        self._start = stream._base + stream._i
+        # 平铺的 sides, 结果, sides, 结果, ...：die 的结果为 int，roll 为返回给调用方的同一个 list（调用方不得修改），
+        # bits 的 sides 为 0、结果为 (n, value)
+        self._ops: list = []
+
+    def __enter__(self) -> Recorder:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 出错（如第二个表达式无效）时已消耗的抽取同样记录
+        if self._ops:
+            stream = self._stream
+            self._channel.log.append(
+                (self._start, stream._base + stream._i, self._user_id, self._label, self._ops, time.time())
+            )
+
+    def die(self, sides: int) -> int:
+        value = self._stream.die(sides)
+        ops = self._ops
+        ops.append(sides)
+        ops.append(value)
+        return value
+
+    def roll(self, count: int, sides: int) -> list[int]:
+        values = self._stream.roll(count, sides)
+        ops = self._ops
+        ops.append(sides)
+        ops.append(values)
+        return values
+
+    def bits(self, n: int) -> int:
+        value = self._stream.bits(n)
+        ops = self._ops
+        ops.append(0)
+        ops.append((n, value))
+        return value
+
+
+def _draws(ops: list) -> tuple[Draw, ...]:
+    draws: list[Draw] = []
+    for i in range(0, len(ops), 2):
+        sides, result = ops[i], ops[i + 1]
+        if sides == 0:
+            draws.append(Draw(result[0], 0, (result[1],)))
+        elif type(result) is int:
+            draws.append(Draw(1, sides, (result,)))
+        else:
+            draws.append(Draw(len(result), sides, tuple(result)))
+    return tuple(draws)
+
+
+def _record(raw: tuple) -> RollRecord:
+    position, end, user_id, label, ops, at = raw
+    return RollRecord(position, end, user_id, label, _draws(ops), at)
+
+
+class _Channel:
+    __slots__ = ("epoch", "stream", "log")
+
+    def __init__(self, epoch: str, stream: Stream, log_size: int) -> None:
+        self.epoch = epoch
+        self.stream = stream
+        # (start, end, user_id, label, [sides, result, ...], at)，见 Recorder
+        self.log: deque[tuple] = deque(maxlen=log_size)
+
+
+class StreamService:
+    """频道流与掷骰日志；常驻频道数超过 max_channels 时逐出最久未用的频道（连同其日志）。"""
+
+    def __init__(self, master_seed: str, *, max_channels: int = 1024, log_size: int = 200) -> None:
+        self.master_seed = master_seed
+        self.max_channels = max(1, max_channels)
+        self.log_size = max(1, log_size)
+        self._channels: OrderedDict[int, _Channel] = OrderedDict()
+        self._boot = time.time_ns()
+        self._serial = itertools.count()
+        self.evictions = 0
+
+    def _seed(self, channel_id: int, epoch: str) -> int:
+        digest = hashlib.sha256(f"{self.master_seed}:{channel_id}:{epoch}".encode()).digest()
+        return int.from_bytes(digest, "big")
+
+    def _channel(self, channel_id: int) -> _Channel:
+        channel = self._channels.get(channel_id)
+        if channel is not None:
+            self._channels.move_to_end(channel_id)
+            return channel
+        epoch = f"{self._boot}-{next(self._serial)}"
+        channel = self._channels[channel_id] = _Channel(epoch, Stream(self._seed(channel_id, epoch)), self.log_size)
+        logger.info("RNG stream for channel %s started with epoch %s", channel_id, epoch)
+        if len(self._channels) > self.max_channels:
+            self._channels.popitem(last=False)
+            self.evictions += 1
+        return channel
+
+    def draw(self, channel_id: int, user_id: int, label: str) -> Recorder:
+        """开始一条命令的抽取；返回的 Recorder 作为上下文管理器使用。"""
+        return Recorder(self._channel(channel_id), user_id, label)
+
+    def epoch(self, channel_id: int) -> str | None:
+        channel = self._channels.get(channel_id)
+        return channel.epoch if channel is not None else None
+
+    def die(self, channel_id: int, user_id: int, label: str, sides: int) -> int:
+        """只抽一个骰子的命令（如 /check）的快捷路径：与 `draw` + `Recorder.die` 记录相同，但不创建 Recorder。"""
+        channel = self._channel(channel_id)
+        stream = channel.stream
+        start = stream._base + stream._i
+        value = stream.die(sides)
+        channel.log.append((start, stream._base + stream._i, user_id, label, [sides, value], time.time()))
+        return value
+
+    def fork(self, channel_id: int, user_id: int, label: str) -> Stream:
+        """从频道流抽取种子并记一条日志，返回由该种子派生的子流；子流只属于调用方，可交给线程使用。"""
+        channel = self._channel(channel_id)
+        stream = channel.stream
+        start = stream._base + stream._i
+        seed = stream.bits(FORK_BITS)
+        channel.log.append((start, stream._base + stream._i, user_id, label, [0, (FORK_BITS, seed)], time.time()))
+        return Stream(seed)
+
+    def position(self, channel_id: int) -> int:
+        channel = self._channels.get(channel_id)
+        return channel.stream.position if channel is not None else 0
+
+    def recent(self, channel_id: int, limit: int = 10) -> list[RollRecord]:
+        """频道最近的掷骰记录，新的在前。"""
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            return []
+        return [_record(raw) for raw in itertools.islice(reversed(channel.log), max(0, limit))]
+
+    def find(self, channel_id: int, position: int) -> RollRecord | None:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            return None
+        for raw in reversed(channel.log):
+            if raw[0] == position:
+                return _record(raw)
+        return None
+
+    def replay(self, channel_id: int, record: RollRecord, epoch: str | None = None) -> RollRecord:
+        """用同一种子重建频道流，从记录的起点按顺序重新抽取，返回重放得到的记录（结果与终点可与原记录直接比较）。
+
+        epoch 省略时取频道当前的 epoch；耗时与位置成正比，调用方应放到线程中执行。
+        """
+        if epoch is None:
+            epoch = self.epoch(channel_id)
+            if epoch is None:
+                raise ValueError("No stream for this channel.")
+        stream = Stream(self._seed(channel_id, epoch))
+        stream.seek(record.position)
+        replayed: list[Draw] = []
+        for draw in record.draws:
+            if draw.sides == 0:
+                values: tuple[int, ...] = (stream.bits(draw.count),)
+            else:
+                values = tuple(stream.roll(draw.count, draw.sides))
+            replayed.append(draw._replace(values=values))
+        return record._replace(end=stream.position, draws=tuple(replayed))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "records": sum(len(c.log) for c in self._channels.values()),
+            "evictions": self.evictions,
+        }
+
+
+def format_draws(draws: tuple[Draw, ...], preview: int = 10) -> str:
+    """抽取结果的简短文本：`1d100=[42]; 3d6=[1, 5, 2]; bits(10)=0b1011001110`。"""
+    parts: list[str] = []
+    for draw in draws:
+        if draw.sides == 0:
+            parts.append(f"bits({draw.count})={draw.values[0]:#0{draw.count + 2}b}")
+            continue
+        shown = ", ".join(map(str, draw.values[:preview]))
+        if len(draw.values) > preview:
+            shown += ", ..."
+        parts.append(f"{draw.count}d{draw.sides}=[{shown}]")
+    return "; ".join(parts)
+
+
+def get_streams(bot: commands.Bot) -> StreamService:
+    """返回 bot 共享的频道流服务（首次调用时按环境变量创建）。"""
+    if not hasattr(bot, "_rng_streams"):
+        master_seed = os.getenv("RNG_MASTER_SEED", "").strip()
+        if not master_seed:
+            master_seed = secrets.token_hex(16)
+            logger.info("RNG_MASTER_SEED not set. Generated master seed %s for this process.", master_seed)
+        bot._rng_streams = StreamService(  # type: ignore[attr-defined]
+            master_seed,
+            max_channels=env_number("RNG_MAX_CHANNELS", 1024, int),
+            log_size=env_number("RNG_LOG_SIZE", 200, int),
+        )
+    return bot._rng_streams  # type: ignore[attr-defined]
@@ -1,5 +1,9 @@
 import os
+import json
+import time
+import hashlib
 import logging
+from pathlib import Path
 
 import discord
 from discord import app_commands
@@ -37,13 +41,116 @@ def owner_or_admin(owner_env_var: str = "DISCORD_OWNER_ID") -> app_commands.chec
     return app_commands.check(predicate)
 
 
-async def sync_app_commands(bot: "commands.Bot") -> tuple[str, int]:
+def env_number(name: str, default: float, cast: type = float):
+    """读取数值型环境变量；未设置返回 default，无法解析时记录警告并返回 default。"""
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        logger.warning("%s is not a valid number. Falling back to %s.", name, default)
+        return default
+
+
+# ---------------- 同步指纹 ----------------
+# 每个作用域（global / guild id）记录上次成功同步时命令树序列化结果的哈希；
+# 命令树未变化时跳过 `tree.sync()`（一次较慢且受限流的 HTTP 往返）
+DEFAULT_SYNC_STATE_PATH = Path(__file__).resolve().parent.parent / "data" / "sync_state.json"
+
+# 进程内统计：实际同步次数 / 因指纹未变跳过的次数
+SYNC_STATS = {"calls": 0, "skipped": 0}
+
+
+def _sync_state_path() -> Path:
+    return Path(os.getenv("SYNC_STATE_PATH") or DEFAULT_SYNC_STATE_PATH)
+
+
+def _load_sync_state() -> dict[str, str]:
+    path = _sync_state_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable sync state %s: %s", path, exc)
+        return {}
+
+
+def _save_sync_state(state: dict[str, str]) -> None:
+    path = _sync_state_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("Failed to save sync state %s: %s", path, exc)
+
+
+def _scope_key(bot: "commands.Bot", guild: "discord.abc.Snowflake | None") -> str:
+    # 带上 application id，避免多个 bot 共用状态文件时相互误判
+    scope = f"guild:{guild.id}" if guild is not None else "global"
+    return f"{bot.application_id or 0}:{scope}"
+
+
+def tree_fingerprint(bot: "commands.Bot", guild: "discord.abc.Snowflake | None" = None) -> str:
+    """命令树（指定作用域）序列化为 JSON 后的 SHA-256。"""
+    payload = []
+    for cmd in bot.tree.get_commands(guild=guild):
+        try:
+            payload.append(cmd.to_dict(bot.tree))
+        except TypeError:  # discord.py < 2.4：to_dict() 无参数
+            payload.append(cmd.to_dict())
+    payload.sort(key=lambda d: (d.get("type", 1), d.get("name", "")))
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def forget_fingerprint(bot: "commands.Bot", guild: "discord.abc.Snowflake | None" = None) -> None:
+    """清除某作用域的指纹，下次同步必定执行。"""
+    state = _load_sync_state()
+    if state.pop(_scope_key(bot, guild), None) is not None:
+        _save_sync_state(state)
+
+
+async def sync_tree(
+    bot: "commands.Bot", guild: "discord.abc.Snowflake | None" = None, force: bool = False
+) -> tuple[int, bool]:
+    """按需同步某作用域的命令树，返回 (命令数, 是否实际同步)。
+
+    指纹与上次成功同步一致且未指定 `force` 时跳过网络请求，命令数取本地命令树。
+    """
+    key = _scope_key(bot, guild)
+    fingerprint = tree_fingerprint(bot, guild)
+    state = _load_sync_state()
+    if not force and state.get(key) == fingerprint:
+        SYNC_STATS["skipped"] += 1
+        logger.info("App commands unchanged for %s, skipping sync", key)
+        return len(bot.tree.get_commands(guild=guild)), False
+    start = time.perf_counter()
+    synced = await bot.tree.sync(guild=guild)
+    SYNC_STATS["calls"] += 1
+    logger.info(
+        "Synced %d app commands for %s in %.2fs (sync calls: %d, skipped: %d)",
+        len(synced), key, time.perf_counter() - start, SYNC_STATS["calls"], SYNC_STATS["skipped"],
+    )
+    state[key] = fingerprint
+    _save_sync_state(state)
+    return len(synced), True
+
+
+async def sync_app_commands(bot: "commands.Bot", force: bool = False) -> tuple[str, int]:
     """同步应用命令。
 
     - 若设置 `DISCORD_GUILD_ID`：仅同步到该服务器（开发/测试推荐）
     - 否则：执行全局同步（传播较慢）
+    - 命令树指纹未变化时跳过同步（见 `sync_tree`），`force=True` 强制同步
 
-    返回 (scope, count)，scope 为 'guild' 或 'global'。
+    返回 (scope, count)，scope 为 'guild' 或 'global'；跳过时附加 ', unchanged'。
     """
     try:
         import discord as _discord
@@ -65,10 +172,10 @@ async def sync_app_commands(bot: "commands.Bot") -> tuple[str, int]:
         if guild_id:
             guild_obj = _discord.Object(id=guild_id)
             bot.tree.copy_global_to(guild=guild_obj)
-            synced = await bot.tree.sync(guild=guild_obj)
-            return ("guild", len(synced))
-        synced = await bot.tree.sync()
-        return ("global", len(synced))
+            count, synced = await sync_tree(bot, guild_obj, force=force)
+            return ("guild" if synced else "guild, unchanged", count)
+        count, synced = await sync_tree(bot, None, force=force)
+        return ("global" if synced else "global, unchanged", count)
     except Exception as exc:  # 保持健壮性
         logger.exception("App command sync failed: %s", exc)
         return ("error", 0)
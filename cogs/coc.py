@@ -1,486 +1,184 @@
 import re
-import random
+import asyncio
 import logging
 import discord
 from discord import app_commands
 from discord.ext import commands
-from texts.coc7_texts import TEMP_INSANITY_D10
+from . import _core, _fair, _locks, _metrics, _outbox, _prob, _store, _streams
 
 logger = logging.getLogger(__name__)
 
+# COGS_LAZY=1 时仅注册占位命令，首次使用时再导入本模块（见 _extensions / _lazy）
+LAZY = True
+
 
 class SCButton(discord.ui.View):
     """可交互的 SC 按钮，用于让其他玩家执行相同的 SC 检定。"""
-    
+
     def __init__(self, coc_cog: "CoC", channel_id: int, succ_expr: str, fail_expr: str):
         super().__init__(timeout=3600)  # 1小时后按钮失效
         self.coc_cog = coc_cog
         self.channel_id = channel_id
         self.succ_expr = succ_expr
         self.fail_expr = fail_expr
-    
+
     @discord.ui.button(label="Sanity Check", style=discord.ButtonStyle.danger, emoji="🎲")
     async def sc_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """当用户点击按钮时执行 SC 检定。"""
-        user = interaction.user
-        
-        # 获取用户属性
-        attrs = self.coc_cog._get_user_attrs(self.channel_id, user.id)
-        san_meta = attrs.get(self.coc_cog._normalize_attr_name("Sanity")[0])
-        
-        if not san_meta:
-            await interaction.response.send_message(
-                "Attribute 'Sanity' not found. Use .set to define it.",
-                ephemeral=True
-            )
-            return
-        
-        try:
-            san_val = int(san_meta.get("value", 0))
-        except Exception:
-            await interaction.response.send_message(
-                "Attribute 'Sanity' value is invalid.",
-                ephemeral=True
-            )
-            return
-        
-        target = max(1, min(100, san_val))
-        
-        roll = random.randint(1, 100)
-        is_success = roll <= target
-        chosen_expr = self.succ_expr if is_success else self.fail_expr
-        
-        try:
-            loss_total, details = self.coc_cog._roll_expression(chosen_expr)
-        except ValueError as exc:
-            await interaction.response.send_message(str(exc), ephemeral=True)
-            return
-        
-        new_san = max(0, san_val - max(0, loss_total))
-        san_key, san_label = self.coc_cog._normalize_attr_name(str(san_meta.get("label", "Sanity")))
-        attrs[san_key] = {"label": san_label, "value": int(new_san)}
-        
-        # 显示名：使用统一格式
-        display_name = self.coc_cog._get_display_name(self.channel_id, user)
-        
-        outcome = "success" if is_success else "failure"
-        extra = f" | {'; '.join(details)}" if details else ""
-        ti_note = "\n[Temporary Insanity] One-time Sanity loss >= 5. Use /ti or .ti." if loss_total >= 5 else ""
-        
-        result_msg = (
-            f"Sanity Check of {display_name}:\n"
-            f"SC {roll}/{target} [{san_label}] -> {outcome} | loss: {chosen_expr} -> {loss_total}{extra} | Sanity: {san_val} -> {new_san}{ti_note}"
-        )
-        
-        await interaction.response.send_message(result_msg)
+        reply = await self.coc_cog._core.sc_roll(self.channel_id, interaction.user, self.succ_expr, self.fail_expr)
+        await interaction.response.send_message(reply.text, ephemeral=reply.error)
 
 
 class CoC(commands.Cog):
-    """掷骰子相关命令：/roll 输入 NdM 或 dM。"""
+    """掷骰子相关命令：/roll 输入 NdM 或 dM。
+
+    解析、属性查找与结果格式化都在 `_core.CommandCore` 中，下面的 Slash / 文本命令只是适配层。
+    """
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        # 频道级缓存：channel_id -> user_id -> attr_key -> {label, value}
-        # 将缓存挂在 bot 上，确保扩展 reload 后仍复用同一份数据
-        if not hasattr(self.bot, "_coc_channel_player_stats"):
-            self.bot._coc_channel_player_stats = {}
+        # 频道级存储：channel_id -> user_id -> attr_key -> Attr(label, value)，以及 channel_id -> KP user_id
+        # 将存储挂在 bot 上，确保扩展 reload 后仍复用同一份数据；持久化到 SQLite（见 _store）
+        if not hasattr(self.bot, "_coc_store"):
+            self.bot._coc_store = _store.open_store()
         # 直接引用，不复制
-        self._channel_player_stats = self.bot._coc_channel_player_stats  # type: ignore[attr-defined]
-        
-        # KP 缓存：channel_id -> user_id
-        if not hasattr(self.bot, "_coc_channel_kp"):
-            self.bot._coc_channel_kp = {}
-        self._channel_kp = self.bot._coc_channel_kp  # type: ignore[attr-defined]
-
-    # ---------------- Helpers (private) ----------------
-    def _get_display_name(self, channel_id: int, user: discord.Member | discord.User) -> str:
-        """统一获取用户显示名：优先使用 .nn 设置的 NAME，否则使用 Discord 显示名。
-        
-        对于 KP，显示为 "KP" 或 "KP(名字)"。
-        返回用户的显示名称。
-        """
-        # 检查是否是 KP
-        is_kp = self._channel_kp.get(channel_id) == user.id
-        
-        # 尝试从属性中获取 NAME
-        attrs = self._get_user_attrs(channel_id, user.id)
-        name_key = self._normalize_attr_name("NAME")[0]
-        name_meta = attrs.get(name_key)
-        
-        if name_meta is not None:
-            custom_name = str(name_meta.get("value", "")).strip()
-            if custom_name:
-                # KP 显示为 "KP(名字)"
-                if is_kp:
-                    return f"KP({custom_name})"
-                return custom_name
-        
-        # KP 没有设置 nn 时，显示为 "KP"
-        if is_kp:
-            return "KP"
-        
-        # 降级：使用 Discord 显示名
-        if isinstance(user, discord.Member):
-            return user.display_name
-        return getattr(user, "name", "user")
-    
+        self._store: _store.AttrStore = self.bot._coc_store  # type: ignore[attr-defined]
+        # 角色卡级锁：读-改-写（/add、/sc、SC 按钮）期间持有，同样挂在 bot 上跨 reload 共享
+        if not hasattr(self.bot, "_coc_locks"):
+            self.bot._coc_locks = _locks.KeyedLocks()
+        self._locks: _locks.KeyedLocks = self.bot._coc_locks  # type: ignore[attr-defined]
+        # 每个频道独立的随机数流与掷骰日志（见 _streams），同样挂在 bot 上
+        # 公平暗骰的熵池与未揭示承诺（见 _fair）
+        self._core = _core.CommandCore(self._store, self._locks, _streams.get_streams(self.bot), _fair.get_fair(self.bot))
+
+    async def cog_load(self) -> None:
+        await self._store.start()
+
+    async def cog_unload(self) -> None:
+        # reload/关闭前落盘，避免丢失写队列中的变更
+        try:
+            await self._store.flush()
+        except Exception:
+            logger.exception("Failed to flush attribute store on unload")
+
+    # ---------------- Adapters (private) ----------------
+    async def _reply_slash(self, interaction: discord.Interaction, reply: _core.Reply, *, ephemeral: bool = False) -> None:
+        """Slash 适配：错误仅自己可见；KP 发起的 SC 附带按钮；超过单条消息上限时拆成多条。"""
+        if reply.sc is not None:
+            view = SCButton(self, interaction.channel.id, *reply.sc)
+            await interaction.followup.send(reply.text, view=view)
+            return
+        for chunk in _outbox.split_message(reply.text):
+            await interaction.followup.send(chunk, ephemeral=ephemeral or reply.error)
+
+    async def _reply_text(self, ctx: commands.Context, reply: _core.Reply) -> None:
+        """文本适配：经出站队列发送；KP 发起的 SC 带按钮，直接发送。"""
+        if reply.sc is not None:
+            await ctx.send(reply.text, view=SCButton(self, ctx.channel.id, *reply.sc))
+            return
+        await _outbox.send_text(ctx, reply.text)
+
     def _extract_mentions_and_clean_arg(self, ctx: commands.Context, arg: str) -> tuple[list[discord.Member | discord.User], str]:
         """从参数中提取被 @ 的用户，并返回清理后的参数字符串。
-        
+
         返回 (目标用户列表, 清理后的参数)。
         如果没有 @，返回空列表和原参数。
         """
         mentions = ctx.message.mentions
         if not mentions:
             return [], arg
-        
-        # 移除所有 mention 标记，保留其他参数
-        cleaned = arg
-        for user in mentions:
-            # Discord mention 格式：<@USER_ID> 或 <@!USER_ID>
-            cleaned = re.sub(rf'<@!?{user.id}>', '', cleaned)
-        
-        cleaned = cleaned.strip()
-        return mentions, cleaned
-
-    def _parse_expr(self, expr: str) -> tuple[int, int] | None:
-        text = (expr or "").strip()
-        m = re.match(r"^\s*(\d*)\s*d\s*(\d+)\s*$", text, re.IGNORECASE)
-        if not m:
-            return None
-        count_str, sides_str = m.group(1), m.group(2)
-        count = int(count_str) if count_str else 1
-        sides = int(sides_str)
-        return (count, sides)
-
-    def _validate_bounds(self, count: int, sides: int) -> bool:
-        return 1 <= count <= 100 and 2 <= sides <= 1000
-
-    def _roll(self, count: int, sides: int) -> tuple[list[int], int, str, str]:
-        rolls = [random.randint(1, sides) for _ in range(count)]
-        total = sum(rolls)
-        preview = rolls if len(rolls) <= 50 else (rolls[:50] + ["..."])
-        detail = ", ".join(map(str, preview))
-        suffix = "" if len(rolls) <= 50 else f" (showing first 50 of {len(rolls)} rolls)"
-        return (rolls, total, detail, suffix)
-
-    def _roll_expression(self, expr: str) -> tuple[int, list[str]]:
-        """解析并掷骰复杂表达式，例如："(2d6+6)*5"、"3d6*5+1d4-2"。
-
-        返回 (总值, 细节列表)；细节列表包含每个骰子段的展开如 "2d6=[3,4]"。
-        约束：1 <= N <= 100, 2 <= M <= 1000，避免滥用；仅支持 +, -, * 与括号。
-        """
-        s = (expr or "").replace(" ", "")
-        if not s:
-            raise ValueError("Empty expression")
-
-        idx = 0
-        details: list[str] = []
-
-        def peek() -> str:
-            return s[idx] if idx < len(s) else ""
-
-        def consume(ch: str) -> bool:
-            nonlocal idx
-            if idx < len(s) and s[idx] == ch:
-                idx += 1
-                return True
-            return False
-
-        def parse_int() -> int:
-            nonlocal idx
-            start = idx
-            if idx < len(s) and s[idx] in "+-":
-                idx += 1
-            while idx < len(s) and s[idx].isdigit():
-                idx += 1
-            if start == idx or s[start:idx] in {"+", "-"}:
-                raise ValueError("Expected integer")
-            return int(s[start:idx])
-
-        def parse_factor() -> int:
-            nonlocal idx
-            # unary +/-
-            if consume('+'):
-                return parse_factor()
-            if consume('-'):
-                return -parse_factor()
-            # parentheses
-            if consume('('):
-                val = parse_expr()
-                if not consume(')'):
-                    raise ValueError("Missing closing parenthesis")
-                return val
-            # dice or integer
-            # pattern: [N]dM or integer
-            save = idx
-            # optional N
-            n_sign = 1
-            if peek() in '+-':
-                n_sign = 1 if consume('+') else (-1 if consume('-') else 1)
-            n_val = 0
-            has_n = False
-            while idx < len(s) and s[idx].isdigit():
-                has_n = True
-                n_val = n_val * 10 + int(s[idx])
-                idx += 1
-            if n_sign == -1:
-                n_val = -n_val
-            if idx < len(s) and s[idx].lower() == 'd':
-                idx += 1
-                # sides required
-                if idx >= len(s) or (s[idx] in '+-*'):
-                    raise ValueError("Missing sides after 'd'")
-                # parse sides (no unary signs here)
-                if not s[idx].isdigit():
-                    raise ValueError("Invalid sides")
-                sides = 0
-                while idx < len(s) and s[idx].isdigit():
-                    sides = sides * 10 + int(s[idx])
-                    idx += 1
-                count = n_val if has_n else 1
-                if count <= 0:
-                    raise ValueError("Dice count must be positive")
-                if not (1 <= count <= 100 and 2 <= sides <= 1000):
-                    raise ValueError("Out of range dice: require 1<=N<=100 and 2<=M<=1000")
-                rolls = [random.randint(1, sides) for _ in range(count)]
-                details.append(f"{count}d{sides}=[{', '.join(map(str, rolls))}]")
-                return sum(rolls)
-            # fallback: integer
-            idx = save
-            val = parse_int()
-            return val
-
-        def parse_term() -> int:
-            val = parse_factor()
-            while True:
-                if consume('*'):
-                    rhs = parse_factor()
-                    val = val * rhs
-                else:
-                    break
-            return val
-
-        def parse_expr() -> int:
-            val = parse_term()
-            while True:
-                if consume('+'):
-                    val += parse_term()
-                elif consume('-'):
-                    val -= parse_term()
-                else:
-                    break
-            return val
-
-        value = parse_expr()
-        if idx != len(s):
-            raise ValueError("Unexpected trailing characters")
-        return value, details
-
-    # ---------------- CoC Check Helpers (private) ----------------
-    def _coc_check(self, target: int) -> tuple[int, str]:
-        """执行一次 CoC 判定并返回 (roll, 结果文本)。
-
-        规则：
-        - roll 一个 d100，返回 "roll/target" 并附带以下文本之一：
-          - critical success：roll 在 1~5 且 roll <= target
-          - extreme success：roll <= floor(target/5)
-          - hard success：roll <= floor(target/2)
-          - success：roll <= target
-          - critical failure：roll 在 96~100 且 roll > target
-          - failure：其它情况
-        """
-        roll = random.randint(1, 100)
-        half = target // 2
-        fifth = target // 5
-
-        if roll <= target:
-            if 1 <= roll <= 5:
-                return roll, "critical success"
-            if roll <= fifth:
-                return roll, "extreme success"
-            if roll <= half:
-                return roll, "hard success"
-            return roll, "success"
-
-        # roll > target
-        if 96 <= roll <= 100:
-            return roll, "critical failure"
-        return roll, "failure"
-
-    # ---------------- Attribute Store Helpers (private) ----------------
-    def _normalize_attr_name(self, name: str) -> tuple[str, str]:
-        """标准化属性名作为键：去两端空白、压缩内部空白为单个空格并转小写。
-
-        返回 (key, label)，label 为展示用。
-        """
-        compact = " ".join((name or "").strip().split())
-        key = compact.lower()
-        return key, compact
+        # 一次扫描移除所有被 @ 用户的 mention 标记（<@USER_ID> 或 <@!USER_ID>），保留其他参数
+        cleaned = _core.strip_mentions(arg, {user.id for user in mentions})
+        return mentions, cleaned.strip()
 
-    def _get_user_attrs(self, channel_id: int, user_id: int) -> dict[str, dict[str, int | str]]:
-        chan = self._channel_player_stats.setdefault(channel_id, {})
-        return chan.setdefault(user_id, {})
+    def _text_targets(self, ctx: commands.Context, arg: str) -> tuple[list[discord.Member | discord.User], str]:
+        """文本命令的目标：被 @ 的用户，没有 @ 时为发送者本人；返回 (目标, 去掉 mention 的参数)。"""
+        mentions, cleaned = self._extract_mentions_and_clean_arg(ctx, arg)
+        return (mentions or [ctx.author]), cleaned
 
-    def _parse_set_items(self, items: str) -> list[tuple[str, int]]:
-        """解析批量设置字符串：以逗号分隔的若干组 `名称 数值`。
-        示例："STR 60, Dex 50, Move Rate 8"
-        """
-        if not items or not items.strip():
+    # ---------------- Attribute Autocomplete (private) ----------------
+    _ITEM_SEP = re.compile(r"[，,]")
+    _TRAILING_NUMBER = re.compile(r"-?\d+\s*$")
+
+    def _attr_completions(self, interaction: discord.Interaction, prefix: str, query: str) -> list[app_commands.Choice[str]]:
+        channel = interaction.channel
+        user = interaction.user
+        if channel is None or user is None:
             return []
-        parts = re.split(r"[，,]+", items)
-        pairs: list[tuple[str, int]] = []
-        for raw in parts:
-            seg = raw.strip()
-            if not seg:
-                continue
-            # 允许名称与数值之间无空格：如 "STR60" 或 "Move Rate60"
-            m = re.match(r"^(.+?)\s*(-?\d+)\s*$", seg)
-            if not m:
-                raise ValueError(f"Invalid segment: '{seg}'. Use 'Name Value' pairs, separated by commas.")
-            name = m.group(1)
-            try:
-                value = int(m.group(2))
-            except ValueError:
-                raise ValueError(f"Invalid number in segment: '{seg}'.")
-            pairs.append((name, value))
-        return pairs
-
-    def _format_stats_lines(self, attrs: dict[str, dict[str, int | str]]) -> list[str]:
-        if not attrs:
+        key, _label = _core.normalize_attr_name(query)
+        choices = []
+        for label in self._store.complete_attrs(channel.id, user.id, key):
+            value = prefix + label
+            # Discord 限制选项 name/value 最长 100 字符
+            if len(value) <= 100:
+                choices.append(app_commands.Choice(name=value, value=value))
+        return choices
+
+    async def _attr_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """单个属性名（/check、/growth、/odds）；输入数字时不补全。"""
+        if current.strip().isdigit():
             return []
-        # 保留插入顺序：不排序，直接按 dict 的迭代顺序输出
-        lines: list[str] = []
-        for _key, meta in attrs.items():
-            label = str(meta.get("label", ""))
-            raw_val = meta.get("value", "")
-            # 显示时兼容字符串（如 NAME）与整数
-            try:
-                value_str = str(int(raw_val))
-            except Exception:
-                value_str = str(raw_val)
-            lines.append(f"{label}: {value_str}")
-        return lines
-
-    def _format_stats_columns_block(self, attrs: dict[str, dict[str, int | str]], columns: int = 3) -> str:
-        """将任意属性以多列代码块形式输出（列宽自适应）。"""
-        if not attrs:
-            return "``````"
-        # 保留插入顺序，使用存储的 label 展示
-        entries: list[str] = []
-        for key, meta in attrs.items():
-            label = str(meta.get('label', key))
-            raw_val = meta.get('value', '')
-            try:
-                value_str = str(int(raw_val))
-            except Exception:
-                value_str = str(raw_val)
-            entries.append(f"{label}: {value_str}")
-        col_width = max(3, max(len(e) for e in entries))
-        cols = max(1, columns)
-        rows = (len(entries) + cols - 1) // cols
-        lines: list[str] = []
-        for r in range(rows):
-            parts: list[str] = []
-            for c in range(cols):
-                idx = r + c * rows
-                if idx >= len(entries):
-                    continue
-                cell = entries[idx]
-                if c < cols - 1:
-                    parts.append(cell.ljust(col_width + 2))
-                else:
-                    parts.append(cell)
-            lines.append("".join(parts).rstrip())
-        body = "\n".join(lines)
-        return f"```\n{body}\n```"
-
-    def _reset_user_attrs(self, channel_id: int, user_id: int) -> bool:
-        """清除指定频道内指定用户的属性，返回是否存在并被清除。"""
-        chan = self._channel_player_stats.get(channel_id)
-        if not chan:
-            return False
-        existed = user_id in chan
-        if existed:
-            try:
-                del chan[user_id]
-            except KeyError:
-                existed = False
-        if not chan:
-            # 频道下已无用户，移除频道
-            try:
-                del self._channel_player_stats[channel_id]
-            except KeyError:
-                pass
-        return existed
-
-    # ---------------- CoC7 Character Generation (private) ----------------
-
-    def _generate_coc7_attributes(self) -> dict[str, int]:
-        """按 CoC7 标准生成基础属性（含 LUCK）。"""
-        return {
-            "STR": self._roll_expression("3d6*5")[0],
-            "CON": self._roll_expression("3d6*5")[0],
-            "DEX": self._roll_expression("3d6*5")[0],
-            "APP": self._roll_expression("3d6*5")[0],
-            "POW": self._roll_expression("3d6*5")[0],
-            "SIZ": self._roll_expression("(2d6+6)*5")[0],
-            "INT": self._roll_expression("(2d6+6)*5")[0],
-            "EDU": self._roll_expression("(2d6+6)*5")[0],
-            "LUCK": self._roll_expression("3d6*5")[0],
-        }
-
-    def _format_coc7_attrs_block(self, rolled: dict[str, int]) -> str:
-        """格式化 CoC7 属性为对齐的代码块文本，并附带总和（含/不含 LUCK）。"""
-        order = ["STR", "CON", "DEX", "APP", "POW", "SIZ", "INT", "EDU", "LUCK"]
-        items = [(k, rolled.get(k, 0)) for k in order]
-        value_width = max(3, max((len(str(v)) for _k, v in items), default=3))
-        lines: list[str] = []
-        for k, v in items:
-            lines.append(f"{k:<4} {v:>{value_width}}")
-        total_wo_luck = sum(v for k, v in items if k != "LUCK")
-        total_with_luck = total_wo_luck + rolled.get("LUCK", 0)
-        sep_len = max(12, 6 + value_width)
-        lines.append("-" * sep_len)
-        lines.append(f"SUM (w/o LUCK): {total_wo_luck}")
-        lines.append(f"SUM (with LUCK): {total_with_luck}")
-        body = "\n".join(lines)
-        return f"```\n{body}\n```"
+        return self._attr_completions(interaction, "", current)
+
+    async def _attr_list_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """逗号分隔的列表（/add、/remove）：只补全最后一段的属性名，已输入数值时不补全。"""
+        cut = 0
+        for m in self._ITEM_SEP.finditer(current):
+            cut = m.end()
+        tail = current[cut:]
+        if self._TRAILING_NUMBER.search(tail):
+            return []
+        prefix = current[:cut] + " " if cut else ""
+        return self._attr_completions(interaction, prefix, tail)
+
+    async def _group_attr_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """/groupcheck：补全频道内任一角色卡上存在的属性名（发起者通常是没有角色卡的 KP）。"""
+        channel = interaction.channel
+        if channel is None:
+            return []
+        key, _label = _core.normalize_attr_name(current)
+        labels: dict[str, str] = {}
+        for user_id in self._store.channel_users(channel.id):
+            for label in self._store.complete_attrs(channel.id, user_id, key):
+                labels.setdefault(label.lower(), label)
+        return [
+            app_commands.Choice(name=label, value=label)
+            for label in sorted(labels.values(), key=str.lower)[:25]
+            if len(label) <= 100
+        ]
 
     @app_commands.command(name="roll", description="Roll dice: NdM or dM (e.g., 2d6, d20)")
     async def roll(self, interaction: discord.Interaction, expr: str) -> None:
         """根据表达式掷骰并返回结果，支持 NdM 及复杂表达式(如 (2d6+6)*5)。"""
         # 为避免网络/计算延迟导致 Unknown interaction，统一先延迟响应
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         expr = (expr or "").strip()
         if not expr:
             await interaction.followup.send("Missing parameter: expr.", ephemeral=True)
             return
-        try:
-            total, details = self._roll_expression(expr)
-        except ValueError as exc:
-            await interaction.followup.send(str(exc), ephemeral=True)
-            return
-        extra = f" | {'; '.join(details)}" if details else ""
-        await interaction.followup.send(f"Roll: {expr} -> {total}{extra}")
+        await self._reply_slash(interaction, self._core.roll(interaction.channel_id, interaction.user, expr))
 
     @app_commands.command(name="secret", description="Secret roll: NdM or dM; DM result to you and hint in channel")
-    async def secret_slash(self, interaction: discord.Interaction, expr: str) -> None:
-        """与 roll 相同表达式规则，但将结果通过私聊发送给触发者，并在频道内提示一条神秘信息。"""
-        await interaction.response.defer(ephemeral=False)
+    @app_commands.describe(fair="Fair mode: post a hash commitment in the channel, reveal later with /reveal")
+    async def secret_slash(self, interaction: discord.Interaction, expr: str, fair: bool | None = None) -> None:
+        """与 roll 相同表达式规则，但将结果通过私聊发送给触发者，并在频道内提示一条神秘信息。
+
+        公平模式（fair，默认取 COC_FAIR_SECRET）下提示中附带结果的承诺，之后用 /reveal 揭示。
+        """
+        await _metrics.defer(interaction, ephemeral=False)
         expr = (expr or "").strip()
         if not expr:
             await interaction.followup.send("Missing parameter: expr.", ephemeral=True)
             return
-        try:
-            total, details = self._roll_expression(expr)
-        except ValueError as exc:
-            await interaction.followup.send(str(exc), ephemeral=True)
+        if fair is None:
+            fair = _fair.default_fair()
+        reply = self._core.secret_roll(interaction.channel_id, interaction.user, expr, fair=fair)
+        if reply.error:
+            await self._reply_slash(interaction, reply)
             return
-        extra = f" | {'; '.join(details)}" if details else ""
         # DM result to the user
         try:
-            await interaction.user.send(f"Secret Roll: {expr} -> {total}{extra}")
+            await interaction.user.send(reply.text)
         except Exception as exc:
             logger.warning("Failed to DM secret roll result: %s", exc)
             # 作为降级，给出仅自己可见的提示
@@ -489,56 +187,92 @@ class CoC(commands.Cog):
             except Exception:
                 pass
         # Post mysterious teaser in channel
-        await interaction.followup.send("Shadows stir... A secret roll has been cast beyond the veil.")
+        await interaction.followup.send(reply.teaser)
+
+    @app_commands.command(name="reveal", description="Reveal a fair secret roll by its commitment nonce")
+    @app_commands.describe(nonce="Nonce shown with the commitment")
+    async def reveal_slash(self, interaction: discord.Interaction, nonce: str) -> None:
+        await _metrics.defer(interaction, ephemeral=False)
+        await self._reply_slash(interaction, self._core.reveal(interaction.channel_id, interaction.user, nonce))
+
+    @app_commands.command(name="prob", description="Exact probability distribution of a dice expression")
+    @app_commands.describe(expr="Dice expression, e.g., 3d6*5 or 1d100", at_least="Optional: also show P(total >= at_least)")
+    async def prob_slash(self, interaction: discord.Interaction, expr: str, at_least: int | None = None) -> None:
+        """计算表达式总值的精确分布：均值、方差、分位数与 P(total >= k)。"""
+        await _metrics.defer(interaction, ephemeral=False)
+        expr = (expr or "").strip()
+        if not expr:
+            await interaction.followup.send("Missing parameter: expr.", ephemeral=True)
+            return
+        try:
+            # 大表达式（如 100d1000）的求值与汇总都较重，放到线程中避免阻塞事件循环
+            text = await asyncio.to_thread(_prob.summarize, expr, at_least)
+        except ValueError as exc:
+            await interaction.followup.send(str(exc), ephemeral=True)
+            return
+        await interaction.followup.send(text)
+
+    @app_commands.command(name="rollmany", description="Roll one dice expression many times, with summary stats")
+    @app_commands.describe(count="Number of independent rolls, e.g., 12", expr="Dice expression, e.g., 1d100 or (2d6+6)*5")
+    async def rollmany_slash(self, interaction: discord.Interaction, count: int, expr: str) -> None:
+        """同一表达式独立掷 count 次，一条消息返回结果表与统计（最小/最大/均值/直方图）。"""
+        await _metrics.defer(interaction, ephemeral=False)
+        expr = (expr or "").strip()
+        if not expr:
+            await interaction.followup.send("Missing parameter: expr.", ephemeral=True)
+            return
+        await self._reply_slash(interaction, await self._core.roll_many(interaction.channel_id, interaction.user, count, expr))
 
     # ---------------- CoC Check Commands ----------------
     @app_commands.command(name="check", description="CoC d100 check by number or your attribute name")
     @app_commands.describe(arg="Positive integer (1-100) or your attribute name")
+    @app_commands.autocomplete(arg=_attr_autocomplete)
     async def coc_check(self, interaction: discord.Interaction, arg: str) -> None:
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         arg = (arg or "").strip()
         if not arg:
             await interaction.followup.send("Missing parameter: arg.", ephemeral=True)
             return
-        # number path
-        m = re.match(r"^\s*(\d+)\s*$", arg or "")
-        if m:
-            target = int(m.group(1))
-            if not (1 <= target <= 100):
-                await interaction.followup.send("Out of range: require 1 <= target <= 100.", ephemeral=True)
-                return
-            roll, outcome = self._coc_check(target)
-            await interaction.followup.send(f"{roll}/{target} -> {outcome}")
-            return
-
-        # attribute path (channel+user scoped)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        attrs = self._get_user_attrs(channel.id, user.id)
-        key, _label_req = self._normalize_attr_name(arg)
-        meta = attrs.get(key)
-        if not meta:
-            await interaction.followup.send("Attribute not found. Use /set or .set to define it.", ephemeral=True)
+        await self._reply_slash(interaction, self._core.check(channel.id, [user], arg))
+
+    @app_commands.command(name="groupcheck", description="Roll a CoC check of one attribute for every investigator in this channel")
+    @app_commands.describe(attr="Attribute name, e.g., Spot Hidden")
+    @app_commands.autocomplete(attr=_group_attr_autocomplete)
+    async def groupcheck_slash(self, interaction: discord.Interaction, attr: str) -> None:
+        await _metrics.defer(interaction, ephemeral=False)
+        attr = (attr or "").strip()
+        channel = interaction.channel
+        if not attr or channel is None:
+            await interaction.followup.send("Missing parameter: attr.", ephemeral=True)
             return
-        label = str(meta.get("label", arg))
-        try:
-            target = int(meta.get("value", 0))
-        except Exception:
-            await interaction.followup.send("Attribute value is invalid.", ephemeral=True)
+        # 角色卡很多时表格可能超过单条消息上限，由适配层拆分
+        await self._reply_slash(interaction, self._core.group_check(channel.id, interaction.guild, attr, actor_id=interaction.user.id))
+
+    @app_commands.command(name="odds", description="Show CoC check odds for a number or your attribute name")
+    @app_commands.describe(arg="Positive integer (1-100) or your attribute name")
+    @app_commands.autocomplete(arg=_attr_autocomplete)
+    async def odds_slash(self, interaction: discord.Interaction, arg: str) -> None:
+        await _metrics.defer(interaction, ephemeral=True)
+        arg = (arg or "").strip()
+        if not arg:
+            await interaction.followup.send("Missing parameter: arg.", ephemeral=True)
             return
-        target = max(1, min(100, target))  # clamp to [1,100]
-        roll, outcome = self._coc_check(target)
-        # 显示名：使用统一格式
-        display_name = self._get_display_name(channel.id, user)
-        await interaction.followup.send(f"[{label}] check of {display_name}:\n{roll}/{target} -> {outcome}")
+        channel = interaction.channel
+        user = interaction.user
+        if channel is None or user is None:
+            await interaction.followup.send("Channel or user not found.", ephemeral=True)
+            return
+        await self._reply_slash(interaction, self._core.odds(channel.id, user, arg), ephemeral=True)
 
     @app_commands.command(name="sc", description="Sanity check: input 'succ_expr/fail_expr'")
     @app_commands.describe(loss="Two dice expressions separated by '/', e.g., 1d3/1d10")
     async def sc_slash(self, interaction: discord.Interaction, loss: str) -> None:
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
@@ -548,166 +282,46 @@ class CoC(commands.Cog):
         if not loss:
             await interaction.followup.send("Missing parameter: loss. Use 'succ_expr/fail_expr'.", ephemeral=True)
             return
-        parts = (loss or "").split("/", 1)
-        if len(parts) != 2:
-            await interaction.followup.send("Invalid format. Use 'succ_expr/fail_expr'.", ephemeral=True)
-            return
-        succ_expr = parts[0].strip()
-        fail_expr = parts[1].strip()
-        if not succ_expr or not fail_expr:
-            await interaction.followup.send("Invalid format. Both parts required: 'succ_expr/fail_expr'.", ephemeral=True)
-            return
-
-        # 检查是否是 KP 执行的命令
-        is_kp = self._channel_kp.get(channel.id) == user.id
-        
-        if is_kp:
-            # KP 执行时，只发起检定，不对自己判定
-            view = SCButton(self, channel.id, succ_expr, fail_expr)
-            prompt_msg = f"**KP initiates SC check:** `{succ_expr}/{fail_expr}`\nClick the button below to perform the check:"
-            await interaction.followup.send(prompt_msg, view=view)
-        else:
-            # 非 KP 执行时，对自己进行判定
-            attrs = self._get_user_attrs(channel.id, user.id)
-            san_meta = attrs.get(self._normalize_attr_name("Sanity")[0])
-            if not san_meta:
-                await interaction.followup.send("Attribute 'Sanity' not found. Use /set to define it.", ephemeral=True)
-                return
-            try:
-                san_val = int(san_meta.get("value", 0))
-            except Exception:
-                await interaction.followup.send("Attribute 'Sanity' value is invalid.", ephemeral=True)
-                return
-            target = max(1, min(100, san_val))
-
-            roll = random.randint(1, 100)
-            is_success = roll <= target
-            chosen_expr = succ_expr if is_success else fail_expr
-            try:
-                loss_total, details = self._roll_expression(chosen_expr)
-            except ValueError as exc:
-                await interaction.followup.send(str(exc), ephemeral=True)
-                return
-
-            new_san = max(0, san_val - max(0, loss_total))
-            # 回写属性
-            san_key, san_label = self._normalize_attr_name(str(san_meta.get("label", "Sanity")))
-            attrs[san_key] = {"label": san_label, "value": int(new_san)}
-
-            # 显示名：使用统一格式
-            display_name = self._get_display_name(channel.id, user)
-
-            outcome = "success" if is_success else "failure"
-            extra = f" | {'; '.join(details)}" if details else ""
-            ti_note = "\n[Temporary Insanity] Use /ti or .ti." if loss_total >= 5 else ""
-            
-            result_msg = (
-                f"Sanity Check of {display_name}:\n"
-                f"SC {roll}/{target} [{san_label}] -> {outcome} | loss: {chosen_expr} -> {loss_total}{extra} | Sanity: {san_val} -> {new_san}{ti_note}"
-            )
-            await interaction.followup.send(result_msg)
+        # KP 执行时只发起检定（带按钮），否则对自己判定
+        await self._reply_slash(interaction, await self._core.sanity_check(channel.id, user, loss))
 
     @app_commands.command(name="growth", description="Growth check: input number (1-100) or your attribute name")
     @app_commands.describe(arg="Positive integer (1-100) or your attribute name")
+    @app_commands.autocomplete(arg=_attr_autocomplete)
     async def growth_slash(self, interaction: discord.Interaction, arg: str) -> None:
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         arg = (arg or "").strip()
         if not arg:
             await interaction.followup.send("Missing parameter: arg.", ephemeral=True)
             return
-        # number path
-        m = re.match(r"^\s*(\d+)\s*$", arg or "")
-        if m:
-            target = int(m.group(1))
-            if not (1 <= target <= 100):
-                await interaction.followup.send("Out of range: require 1 <= target <= 100.", ephemeral=True)
-                return
-            roll, outcome = self._coc_check(target)
-            is_success = outcome in {"critical success", "extreme success", "hard success", "success"}
-            if is_success:
-                await interaction.followup.send(
-                    f"Growth Check: {roll}/{target} -> {outcome}\nGrowth failed (check success)."
-                )
-            else:
-                growth = random.randint(1, 10)
-                await interaction.followup.send(
-                    f"Growth Check: {roll}/{target} -> {outcome}\nGrowth value: 1d10 -> {growth}"
-                )
-            return
-
-        # attribute path (channel+user scoped)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        attrs = self._get_user_attrs(channel.id, user.id)
-        key, _label_req = self._normalize_attr_name(arg)
-        meta = attrs.get(key)
-        if not meta:
-            await interaction.followup.send("Attribute not found. Use /set or .set to define it.", ephemeral=True)
-            return
-        label = str(meta.get("label", arg))
-        try:
-            target = int(meta.get("value", 0))
-        except Exception:
-            await interaction.followup.send("Attribute value is invalid.", ephemeral=True)
-            return
-        target = max(1, min(100, target))
-        roll, outcome = self._coc_check(target)
-        # 显示名：使用统一格式
-        display_name = self._get_display_name(channel.id, user)
-        is_success = outcome in {"critical success", "extreme success", "hard success", "success"}
-        if is_success:
-            await interaction.followup.send(
-                f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth failed."
-            )
-        else:
-            growth = random.randint(1, 10)
-            await interaction.followup.send(
-                f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth value: 1d10 -> {growth}"
-            )
+        await self._reply_slash(interaction, self._core.growth(channel.id, [user], arg))
 
     # ---------------- Temporary Insanity (TI) ----------------
     @app_commands.command(name="ti", description="Temporary Insanity: roll 1d10 and show effect")
     async def ti_slash(self, interaction: discord.Interaction) -> None:
-        await interaction.response.defer(ephemeral=False)
-        value = random.randint(1, 10)
-        data = TEMP_INSANITY_D10.get(value)
-        if not data:
-            logger.error("TI mapping missing for value=%s", value)
-            await interaction.followup.send(f"TI: {value}")
-            return
-        name = str(data.get("name", "Unknown")).strip()
-        desc = str(data.get("desc", "")).strip()
-        duration = random.randint(1, 10)
-        desc = desc.format(duration=duration)
-        await interaction.followup.send(f"TI: {value} - {name}\n{desc}")
+        await _metrics.defer(interaction, ephemeral=False)
+        await self._reply_slash(interaction, self._core.temporary_insanity(interaction.channel_id, interaction.user))
 
     # ---------------- CoC Attributes Commands ----------------
     @app_commands.command(name="stats", description="Show your attributes in this channel")
     async def stats_slash(self, interaction: discord.Interaction) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        attrs = self._get_user_attrs(channel.id, user.id)
-        if not attrs:
-            await interaction.followup.send("No attributes set.", ephemeral=True)
-            return
-        # 显示名：使用统一格式
-        display_name = self._get_display_name(channel.id, user)
-        # 正文中不包含 NAME
-        filtered = {k: v for k, v in attrs.items() if k != self._normalize_attr_name("NAME")[0]}
-        pretty = self._format_stats_columns_block(filtered, columns=3)
-        await interaction.followup.send(f"Stats of {display_name}\n{pretty}", ephemeral=True)
+        await self._reply_slash(interaction, self._core.stats(channel.id, [user]), ephemeral=True)
 
     @app_commands.command(name="set", description="Batch set your attributes in this channel")
     @app_commands.describe(items="Comma-separated pairs: 'Name Value, Name2 Value2'")
     async def set_slash(self, interaction: discord.Interaction, items: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
@@ -717,25 +331,14 @@ class CoC(commands.Cog):
         if not items:
             await interaction.followup.send("Nothing to set.", ephemeral=True)
             return
-        try:
-            pairs = self._parse_set_items(items)
-        except ValueError as exc:
-            await interaction.followup.send(str(exc), ephemeral=True)
-            return
-        if not pairs:
-            await interaction.followup.send("Nothing to set.", ephemeral=True)
-            return
-        store = self._get_user_attrs(channel.id, user.id)
-        for name, value in pairs:
-            key, label = self._normalize_attr_name(name)
-            store[key] = {"label": label, "value": int(value)}
-        summary = ", ".join([f"{self._normalize_attr_name(n)[1]}={int(v)}" for n, v in pairs])
-        await interaction.followup.send(f"Set: {summary}", ephemeral=True)
+        reply = self._core.set_attrs(channel.id, [user], items, actor_id=user.id)
+        await self._reply_slash(interaction, reply, ephemeral=True)
 
     @app_commands.command(name="add", description="Batch add deltas to your attributes in this channel")
     @app_commands.describe(items="Comma-separated pairs: 'Name Delta, Name2 Delta2' (Delta can be negative)")
+    @app_commands.autocomplete(items=_attr_list_autocomplete)
     async def add_slash(self, interaction: discord.Interaction, items: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
@@ -745,128 +348,50 @@ class CoC(commands.Cog):
         if not items:
             await interaction.followup.send("Nothing to add.", ephemeral=True)
             return
-        try:
-            pairs = self._parse_set_items(items)
-        except ValueError as exc:
-            await interaction.followup.send(str(exc), ephemeral=True)
-            return
-        if not pairs:
-            await interaction.followup.send("Nothing to add.", ephemeral=True)
-            return
-        store = self._get_user_attrs(channel.id, user.id)
-        summary_items: list[str] = []
-        for name, delta in pairs:
-            key, label = self._normalize_attr_name(name)
-            meta = store.get(key)
-            curr_val = 0
-            if meta is not None:
-                try:
-                    curr_val = int(meta.get("value", 0))
-                except Exception:
-                    curr_val = 0
-            new_val = int(curr_val) + int(delta)
-            store[key] = {"label": label, "value": int(new_val)}
-            summary_items.append(f"{label}{'+' if int(delta) >= 0 else ''}{int(delta)} => {int(new_val)}")
-        summary = ", ".join(summary_items)
-        await interaction.followup.send(f"Add: {summary}", ephemeral=True)
+        reply = await self._core.add_attrs(channel.id, [user], items, actor_id=user.id)
+        await self._reply_slash(interaction, reply, ephemeral=True)
 
     @app_commands.command(name="reset", description="Reset your attributes in this channel")
     async def reset_slash(self, interaction: discord.Interaction) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        ok = self._reset_user_attrs(channel.id, user.id)
-        
-        # 如果是 KP 执行 reset，清空 KP 位
-        if self._channel_kp.get(channel.id) == user.id:
-            del self._channel_kp[channel.id]
-            await interaction.followup.send("Reset done. KP position cleared.", ephemeral=True)
-        elif ok:
-            await interaction.followup.send("Reset done.", ephemeral=True)
-        else:
-            await interaction.followup.send("No attributes to reset.", ephemeral=True)
+        await self._reply_slash(interaction, self._core.reset(channel.id, user), ephemeral=True)
 
     @app_commands.command(name="remove", description="Remove attributes from your stats")
     @app_commands.describe(items="Comma-separated attribute names to remove, e.g., 'HP, MP, STR'")
+    @app_commands.autocomplete(items=_attr_list_autocomplete)
     async def remove_slash(self, interaction: discord.Interaction, items: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        
         items = (items or "").strip()
         if not items:
             await interaction.followup.send("No attributes specified.", ephemeral=True)
             return
-        
-        # 解析要删除的属性名列表
-        attr_names = [name.strip() for name in re.split(r"[，,]+", items) if name.strip()]
-        if not attr_names:
-            await interaction.followup.send("No attributes specified.", ephemeral=True)
-            return
-        
-        # 获取用户属性
-        attrs = self._get_user_attrs(channel.id, user.id)
-        if not attrs:
-            await interaction.followup.send("No attributes set.", ephemeral=True)
-            return
-        
-        # 删除指定的属性
-        removed: list[str] = []
-        not_found: list[str] = []
-        
-        for name in attr_names:
-            key, label = self._normalize_attr_name(name)
-            # 不允许删除 NAME 属性，使用 /nn 来管理
-            if key == self._normalize_attr_name("NAME")[0]:
-                not_found.append(f"{label} (use /nn to change name)")
-                continue
-            
-            if key in attrs:
-                del attrs[key]
-                removed.append(label)
-            else:
-                not_found.append(label)
-        
-        # 构建反馈消息
-        messages = []
-        if removed:
-            messages.append(f"Removed: {', '.join(removed)}")
-        if not_found:
-            messages.append(f"Not found: {', '.join(not_found)}")
-        
-        if messages:
-            await interaction.followup.send("\n".join(messages), ephemeral=True)
-        else:
-            await interaction.followup.send("No attributes were removed.", ephemeral=True)
+        await self._reply_slash(interaction, self._core.remove_attrs(channel.id, user, items), ephemeral=True)
 
     # ---------------- CoC7 Character Generation Commands ----------------
     @app_commands.command(name="cs", description="Generate CoC7 base attributes (including Luck) and totals")
     async def cs_slash(self, interaction: discord.Interaction) -> None:
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        rolled = self._generate_coc7_attributes()
-        # 写入频道级缓存
-        store = self._get_user_attrs(channel.id, user.id)
-        for name, value in rolled.items():
-            key, label = self._normalize_attr_name(name)
-            store[key] = {"label": label, "value": int(value)}
-        pretty = self._format_coc7_attrs_block(rolled)
-        await interaction.followup.send(pretty)
+        await self._reply_slash(interaction, self._core.generate_sheet(channel.id, user))
 
     @app_commands.command(name="nn", description="Set your display name in this channel")
     @app_commands.describe(name="Your name to show in stats, or 'clear' to remove")
     async def nn_slash(self, interaction: discord.Interaction, name: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
@@ -876,192 +401,129 @@ class CoC(commands.Cog):
         if not name:
             await interaction.followup.send("Missing parameter: name.", ephemeral=True)
             return
-        
-        store = self._get_user_attrs(channel.id, user.id)
-        key, label = self._normalize_attr_name("NAME")
-        
-        # 检查是否是 clear 命令
-        if name.lower() == "clear":
-            if key in store:
-                del store[key]
-                await interaction.followup.send("Name cleared.", ephemeral=True)
-            else:
-                await interaction.followup.send("No name to clear.", ephemeral=True)
-        else:
-            store[key] = {"label": label, "value": name}
-            await interaction.followup.send(f"Name set to: {name}", ephemeral=True)
+        await self._reply_slash(interaction, self._core.set_name(channel.id, user, name), ephemeral=True)
 
     @app_commands.command(name="kp", description="Register as KP (Keeper) in this channel")
     async def kp_slash(self, interaction: discord.Interaction) -> None:
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         channel = interaction.channel
         user = interaction.user
         if channel is None or user is None:
             await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        
-        # 检查当前频道是否已有 KP
-        current_kp_id = self._channel_kp.get(channel.id)
-        if current_kp_id is not None:
-            if current_kp_id == user.id:
-                await interaction.followup.send("You are already the KP of this channel.", ephemeral=True)
-            else:
-                await interaction.followup.send("Error: This channel already has a KP. Only one KP per channel is allowed.", ephemeral=True)
+        # 每个频道只允许一个 KP；已有 KP 时仅自己可见地提示
+        await self._reply_slash(interaction, self._core.register_kp(channel.id, user))
+
+    @app_commands.command(name="history", description="KP only: recent attribute changes in this channel, newest first")
+    @app_commands.describe(attr="Optional: only changes to this attribute", limit="Number of changes to show (default 20, max 50)")
+    @app_commands.autocomplete(attr=_group_attr_autocomplete)
+    async def history_slash(self, interaction: discord.Interaction, attr: str | None = None, limit: int | None = None) -> None:
+        await _metrics.defer(interaction, ephemeral=True)
+        channel = interaction.channel
+        user = interaction.user
+        if channel is None or user is None:
+            await interaction.followup.send("Channel or user not found.", ephemeral=True)
             return
-        
-        # 注册为 KP
-        self._channel_kp[channel.id] = user.id
-        await interaction.followup.send(f"{user.mention} is now the KP of this channel.")
+        reply = await self._core.history(channel.id, user, attr or "", limit=limit or 20)
+        await self._reply_slash(interaction, reply, ephemeral=True)
 
     # 文本命令：`.roll 2d6` 或 `.roll d20`
     @commands.command(name="roll", aliases=["r"], help="Roll dice: NdM or dM. Usage: .roll 2d6 or .r 2d6")
     async def roll_text(self, ctx: commands.Context, *, expr: str | None = None) -> None:
         expr = (expr or "").strip()
         if not expr:
-            await ctx.send("Usage: .roll <expr> or .r <expr>")
+            await _outbox.send_text(ctx, "Usage: .roll <expr> or .r <expr>")
             return
-        try:
-            total, details = self._roll_expression(expr)
-        except ValueError as exc:
-            await ctx.send(str(exc))
-            return
-        extra = f" | {'; '.join(details)}" if details else ""
-        await ctx.send(f"Roll: {expr} -> {total}{extra}")
+        await self._reply_text(ctx, self._core.roll(ctx.channel.id, ctx.author, expr))
 
-    @commands.command(name="secret", help="Secret roll. Usage: .secret <expr>")
+    @commands.command(name="secret", help="Secret roll (fair: commit-reveal). Usage: .secret [fair] <expr>")
     async def secret_text(self, ctx: commands.Context, *, expr: str | None = None) -> None:
         expr = (expr or "").strip()
+        fair = _fair.default_fair()
+        head, _sep, rest = expr.partition(" ")
+        if head.lower() == "fair":
+            fair, expr = True, rest.strip()
         if not expr:
-            await ctx.send("Usage: .secret <expr>")
+            await _outbox.send_text(ctx, "Usage: .secret [fair] <expr>")
             return
-        try:
-            total, details = self._roll_expression(expr)
-        except ValueError as exc:
-            await ctx.send(str(exc))
+        reply = self._core.secret_roll(ctx.channel.id, ctx.author, expr, fair=fair)
+        if reply.error:
+            await self._reply_text(ctx, reply)
             return
-        extra = f" | {'; '.join(details)}" if details else ""
         # DM result
         try:
-            await ctx.author.send(f"Secret Roll: {expr} -> {total}{extra}")
+            await ctx.author.send(reply.text)
         except Exception as exc:
             logger.warning("Failed to DM secret roll result: %s", exc)
             try:
                 await ctx.author.send("Could not DM you the result. Please enable DMs.")
             except Exception:
                 pass
-        await ctx.send("Shadows stir... A secret roll has been cast beyond the veil.")
+        await _outbox.send_text(ctx, reply.teaser)
+
+    @commands.command(name="reveal", help="Reveal a fair secret roll. Usage: .reveal <nonce>")
+    async def reveal_text(self, ctx: commands.Context, nonce: str | None = None) -> None:
+        if not nonce:
+            await _outbox.send_text(ctx, "Usage: .reveal <nonce>")
+            return
+        await self._reply_text(ctx, self._core.reveal(ctx.channel.id, ctx.author, nonce))
+
+    @commands.command(name="prob", help="Exact probability of a dice expression. Usage: .prob <expr> [>= k]. Large pools are slow without numpy (100d1000 takes about 1s)")
+    async def prob_text(self, ctx: commands.Context, *, expr: str | None = None) -> None:
+        expr = (expr or "").strip()
+        if not expr:
+            await _outbox.send_text(ctx, "Usage: .prob <expr> [>= k]")
+            return
+        expr, at_least = _core.parse_at_least(expr)
+        try:
+            text = await asyncio.to_thread(_prob.summarize, expr, at_least)
+        except ValueError as exc:
+            await _outbox.send_text(ctx, str(exc))
+            return
+        await _outbox.send_text(ctx, text)
+
+    @commands.command(name="rollmany", aliases=["rm"], help="Roll one expression many times. Usage: .rm <count> <expr>")
+    async def rollmany_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
+        parsed = _core.parse_count_expr(arg or "")
+        if parsed is None:
+            await _outbox.send_text(ctx, "Usage: .rollmany <count> <expr> or .rm <count> <expr>")
+            return
+        count, expr = parsed
+        await self._reply_text(ctx, await self._core.roll_many(ctx.channel.id, ctx.author, count, expr))
 
     @commands.command(name="stats", help="Show your attributes in this channel. Usage: .stats. Support @mention")
     async def stats_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
         channel = ctx.channel
         if channel is None:
             return
-        
-        # 提取 mentions
-        arg = (arg or "").strip()
-        mentions, _ = self._extract_mentions_and_clean_arg(ctx, arg)
-        target_users = mentions if mentions else [ctx.author]
-        
-        # 对每个目标用户显示属性
-        results = []
-        for user in target_users:
-            attrs = self._get_user_attrs(channel.id, user.id)
-            if not attrs:
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: No attributes set.")
-                continue
-            # 显示名：使用统一格式
-            display_name = self._get_display_name(channel.id, user)
-            # 正文中不包含 NAME
-            filtered = {k: v for k, v in attrs.items() if k != self._normalize_attr_name("NAME")[0]}
-            pretty = self._format_stats_columns_block(filtered, columns=3)
-            results.append(f"Stats of {display_name}\n{pretty}")
-        
-        await ctx.send("\n\n".join(results))
+        target_users, _ = self._text_targets(ctx, (arg or "").strip())
+        await self._reply_text(ctx, self._core.stats(channel.id, target_users, per_user=True))
 
     @commands.command(name="set", help="Batch set attributes. Usage: .set Name Value, Name2 Value2. Support @mention")
     async def set_text(self, ctx: commands.Context, *, items: str | None = None) -> None:
         channel = ctx.channel
         if channel is None:
             return
-        
         items = (items or "").strip()
         if not items:
-            await ctx.send("Nothing to set.")
-            return
-        
-        # 提取 mentions 并清理参数
-        mentions, cleaned_items = self._extract_mentions_and_clean_arg(ctx, items)
-        target_users = mentions if mentions else [ctx.author]
-        
-        try:
-            pairs = self._parse_set_items(cleaned_items)
-        except ValueError as exc:
-            await ctx.send(str(exc))
-            return
-        if not pairs:
-            await ctx.send("Nothing to set.")
+            await _outbox.send_text(ctx, "Nothing to set.")
             return
-        
-        # 对每个目标用户设置属性
-        results = []
-        for user in target_users:
-            store = self._get_user_attrs(channel.id, user.id)
-            for name, value in pairs:
-                key, label = self._normalize_attr_name(name)
-                store[key] = {"label": label, "value": int(value)}
-            summary = ", ".join([f"{self._normalize_attr_name(n)[1]}={int(v)}" for n, v in pairs])
-            user_display = self._get_display_name(channel.id, user)
-            results.append(f"{user_display}: Set {summary}")
-        
-        await ctx.send("\n".join(results))
+        target_users, cleaned_items = self._text_targets(ctx, items)
+        reply = self._core.set_attrs(channel.id, target_users, cleaned_items, actor_id=ctx.author.id, per_user=True)
+        await self._reply_text(ctx, reply)
 
     @commands.command(name="add", help="Batch add deltas. Usage: .add Name Delta, Name2 Delta2. Support @mention")
     async def add_text(self, ctx: commands.Context, *, items: str | None = None) -> None:
         channel = ctx.channel
         if channel is None:
             return
-        
         items = (items or "").strip()
         if not items:
-            await ctx.send("Nothing to add.")
+            await _outbox.send_text(ctx, "Nothing to add.")
             return
-        
-        # 提取 mentions 并清理参数
-        mentions, cleaned_items = self._extract_mentions_and_clean_arg(ctx, items)
-        target_users = mentions if mentions else [ctx.author]
-        
-        try:
-            pairs = self._parse_set_items(cleaned_items)
-        except ValueError as exc:
-            await ctx.send(str(exc))
-            return
-        if not pairs:
-            await ctx.send("Nothing to add.")
-            return
-        
-        # 对每个目标用户增加属性
-        results = []
-        for user in target_users:
-            store = self._get_user_attrs(channel.id, user.id)
-            summary_items: list[str] = []
-            for name, delta in pairs:
-                key, label = self._normalize_attr_name(name)
-                meta = store.get(key)
-                curr_val = 0
-                if meta is not None:
-                    try:
-                        curr_val = int(meta.get("value", 0))
-                    except Exception:
-                        curr_val = 0
-                new_val = int(curr_val) + int(delta)
-                store[key] = {"label": label, "value": int(new_val)}
-                summary_items.append(f"{label}{'+' if int(delta) >= 0 else ''}{int(delta)} => {int(new_val)}")
-            summary = ", ".join(summary_items)
-            user_display = self._get_display_name(channel.id, user)
-            results.append(f"{user_display}: Add {summary}")
-        
-        await ctx.send("\n".join(results))
+        target_users, cleaned_items = self._text_targets(ctx, items)
+        reply = await self._core.add_attrs(channel.id, target_users, cleaned_items, actor_id=ctx.author.id, per_user=True)
+        await self._reply_text(ctx, reply)
 
     @commands.command(name="reset", help="Reset your attributes in this channel. Usage: .reset")
     async def reset_text(self, ctx: commands.Context) -> None:
@@ -1069,16 +531,7 @@ class CoC(commands.Cog):
         author = ctx.author
         if channel is None or author is None:
             return
-        ok = self._reset_user_attrs(channel.id, author.id)
-        
-        # 如果是 KP 执行 reset，清空 KP 位
-        if self._channel_kp.get(channel.id) == author.id:
-            del self._channel_kp[channel.id]
-            await ctx.send("Reset done. KP position cleared.")
-        elif ok:
-            await ctx.send("Reset done.")
-        else:
-            await ctx.send("No attributes to reset.")
+        await self._reply_text(ctx, self._core.reset(channel.id, author))
 
     @commands.command(name="remove", help="Remove attributes from your stats. Usage: .remove Name1, Name2")
     async def remove_text(self, ctx: commands.Context, *, items: str | None = None) -> None:
@@ -1086,57 +539,15 @@ class CoC(commands.Cog):
         author = ctx.author
         if channel is None or author is None:
             return
-        
         items = (items or "").strip()
         if not items:
-            await ctx.send("Usage: .remove Name1, Name2")
+            await _outbox.send_text(ctx, "Usage: .remove Name1, Name2")
             return
-        
         # 检查是否包含 mention，如果有则报错
         if ctx.message.mentions:
-            await ctx.send("Error: .remove command can only be used on yourself.")
-            return
-        
-        # 解析要删除的属性名列表
-        attr_names = [name.strip() for name in re.split(r"[，,]+", items) if name.strip()]
-        if not attr_names:
-            await ctx.send("No attributes specified.")
+            await _outbox.send_text(ctx, "Error: .remove command can only be used on yourself.")
             return
-        
-        # 获取用户属性
-        attrs = self._get_user_attrs(channel.id, author.id)
-        if not attrs:
-            await ctx.send("No attributes set.")
-            return
-        
-        # 删除指定的属性
-        removed: list[str] = []
-        not_found: list[str] = []
-        
-        for name in attr_names:
-            key, label = self._normalize_attr_name(name)
-            # 不允许删除 NAME 属性，使用 .nn 来管理
-            if key == self._normalize_attr_name("NAME")[0]:
-                not_found.append(f"{label} (use .nn to change name)")
-                continue
-            
-            if key in attrs:
-                del attrs[key]
-                removed.append(label)
-            else:
-                not_found.append(label)
-        
-        # 构建反馈消息
-        messages = []
-        if removed:
-            messages.append(f"Removed: {', '.join(removed)}")
-        if not_found:
-            messages.append(f"Not found: {', '.join(not_found)}")
-        
-        if messages:
-            await ctx.send("\n".join(messages))
-        else:
-            await ctx.send("No attributes were removed.")
+        await self._reply_text(ctx, self._core.remove_attrs(channel.id, author, items))
 
     @commands.command(name="cs", help="Generate CoC7 base attributes and totals. Usage: .cs")
     async def cs_text(self, ctx: commands.Context) -> None:
@@ -1144,28 +555,11 @@ class CoC(commands.Cog):
         author = ctx.author
         if channel is None or author is None:
             return
-        rolled = self._generate_coc7_attributes()
-        # 写入频道级缓存
-        store = self._get_user_attrs(channel.id, author.id)
-        for name, value in rolled.items():
-            key, label = self._normalize_attr_name(name)
-            store[key] = {"label": label, "value": int(value)}
-        pretty = self._format_coc7_attrs_block(rolled)
-        await ctx.send(pretty)
+        await self._reply_text(ctx, self._core.generate_sheet(channel.id, author))
 
     @commands.command(name="ti", help="Temporary Insanity: roll 1d10 and show effect. Usage: .ti")
     async def ti_text(self, ctx: commands.Context) -> None:
-        value = random.randint(1, 10)
-        data = TEMP_INSANITY_D10.get(value)
-        if not data:
-            logger.error("TI mapping missing for value=%s", value)
-            await ctx.send(f"TI: {value}")
-            return
-        name = str(data.get("name", "Unknown")).strip()
-        desc = str(data.get("desc", "")).strip()
-        duration = random.randint(1, 10)
-        desc = desc.format(duration=duration)
-        await ctx.send(f"TI: {value} - {name}\n{desc}")
+        await self._reply_text(ctx, self._core.temporary_insanity(ctx.channel.id, ctx.author))
 
     @commands.command(name="nn", help="Set display name in this channel. Usage: .nn <name> or .nn clear")
     async def nn_text(self, ctx: commands.Context, *, name: str | None = None) -> None:
@@ -1175,27 +569,13 @@ class CoC(commands.Cog):
             return
         name = (name or "").strip()
         if not name:
-            await ctx.send("Usage: .nn <name> or .nn clear")
+            await _outbox.send_text(ctx, "Usage: .nn <name> or .nn clear")
             return
-        
         # 检查是否包含 mention，如果有则报错
         if ctx.message.mentions:
-            await ctx.send("Error: .nn command can only be used on yourself.")
+            await _outbox.send_text(ctx, "Error: .nn command can only be used on yourself.")
             return
-        
-        store = self._get_user_attrs(channel.id, author.id)
-        key, label = self._normalize_attr_name("NAME")
-        
-        # 检查是否是 clear 命令
-        if name.lower() == "clear":
-            if key in store:
-                del store[key]
-                await ctx.send("Name cleared.")
-            else:
-                await ctx.send("No name to clear.")
-        else:
-            store[key] = {"label": label, "value": name}
-            await ctx.send(f"Name set to: {name}")
+        await self._reply_text(ctx, self._core.set_name(channel.id, author, name))
 
     @commands.command(name="kp", help="Register as KP (Keeper) in this channel. Usage: .kp")
     async def kp_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
@@ -1203,222 +583,80 @@ class CoC(commands.Cog):
         author = ctx.author
         if channel is None or author is None:
             return
-        
         # 不接受任何参数
         if arg and arg.strip():
-            await ctx.send("Error: .kp command does not accept any parameters.")
+            await _outbox.send_text(ctx, "Error: .kp command does not accept any parameters.")
             return
-        
-        # 检查当前频道是否已有 KP
-        current_kp_id = self._channel_kp.get(channel.id)
-        if current_kp_id is not None:
-            if current_kp_id == author.id:
-                await ctx.send("You are already the KP of this channel.")
-            else:
-                await ctx.send("Error: This channel already has a KP. Only one KP per channel is allowed.")
+        await self._reply_text(ctx, self._core.register_kp(channel.id, author))
+
+    @commands.command(name="history", help="KP only: recent attribute changes in this channel. Usage: .history [attr name]. Support @mention")
+    async def history_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
+        channel = ctx.channel
+        author = ctx.author
+        if channel is None or author is None:
             return
-        
-        # 注册为 KP
-        self._channel_kp[channel.id] = author.id
-        await ctx.send(f"{author.mention} is now the KP of this channel.")
+        mentions, cleaned = self._extract_mentions_and_clean_arg(ctx, (arg or "").strip())
+        await self._reply_text(ctx, await self._core.history(channel.id, author, cleaned, targets=mentions))
 
     # 文本命令：`.check 60`
     @commands.command(name="check", aliases=["ra"], help="CoC d100 check. Usage: .check <number|attr name> or .ra <number|attr name>. Support @mention")
     async def coc_check_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
         arg = (arg or "").strip()
         if not arg:
-            await ctx.send("Usage: .check <number|attr name> or .ra <number|attr name>")
+            await _outbox.send_text(ctx, "Usage: .check <number|attr name> or .ra <number|attr name>")
             return
-
         channel = ctx.channel
         if channel is None:
             return
-        
-        # 提取 mentions 并清理参数
-        mentions, cleaned_arg = self._extract_mentions_and_clean_arg(ctx, arg)
-        target_users = mentions if mentions else [ctx.author]
-        
-        # number path
-        m = re.match(r"^\s*(\d+)\s*$", cleaned_arg)
-        if m:
-            target = int(m.group(1))
-            if not (1 <= target <= 100):
-                await ctx.send("Out of range: require 1 <= target <= 100.")
-                return
-            # 对每个目标用户执行判定
-            results = []
-            for user in target_users:
-                roll, outcome = self._coc_check(target)
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: {roll}/{target} -> {outcome}")
-            await ctx.send("\n".join(results))
+        target_users, cleaned_arg = self._text_targets(ctx, arg)
+        await self._reply_text(ctx, self._core.check(channel.id, target_users, cleaned_arg, per_user=True))
+
+    @commands.command(name="groupcheck", aliases=["gc"], help="Check one attribute for every investigator in this channel. Usage: .gc <attr name>")
+    async def groupcheck_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
+        arg = (arg or "").strip()
+        channel = ctx.channel
+        if not arg or channel is None:
+            await _outbox.send_text(ctx, "Usage: .groupcheck <attr name> or .gc <attr name>")
             return
-        
-        # 对每个目标用户执行判定
-        results = []
-        for user in target_users:
-            attrs = self._get_user_attrs(channel.id, user.id)
-            key, _label_req = self._normalize_attr_name(cleaned_arg)
-            meta = attrs.get(key)
-            if not meta:
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: Attribute not found. Use .set to define it.")
-                continue
-            label = str(meta.get("label", cleaned_arg))
-            try:
-                target = int(meta.get("value", 0))
-            except Exception:
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: Attribute value is invalid.")
-                continue
-            target = max(1, min(100, target))
-            roll, outcome = self._coc_check(target)
-            # 显示名：使用统一格式
-            display_name = self._get_display_name(channel.id, user)
-            results.append(f"[{label}] check of {display_name}:\n{roll}/{target} -> {outcome}")
-        
-        await ctx.send("\n\n".join(results))
+        await self._reply_text(ctx, self._core.group_check(channel.id, ctx.guild, arg, actor_id=ctx.author.id))
+
+    @commands.command(name="odds", help="Show CoC check odds. Usage: .odds <number|attr name>")
+    async def odds_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
+        arg = (arg or "").strip()
+        if not arg:
+            await _outbox.send_text(ctx, "Usage: .odds <number|attr name>")
+            return
+        channel = ctx.channel
+        if channel is None:
+            return
+        await self._reply_text(ctx, self._core.odds(channel.id, ctx.author, arg))
 
     @commands.command(name="sc", help="Sanity check. Usage: .sc succ_expr/fail_expr")
     async def sc_text(self, ctx: commands.Context, *, loss: str | None = None) -> None:
         loss = (loss or "").strip()
         if not loss:
-            await ctx.send("Usage: .sc succ_expr/fail_expr")
-            return
-        
-        parts = loss.split("/", 1)
-        if len(parts) != 2:
-            await ctx.send("Invalid format. Use 'succ_expr/fail_expr'.")
+            await _outbox.send_text(ctx, "Usage: .sc succ_expr/fail_expr")
             return
-        succ_expr = parts[0].strip()
-        fail_expr = parts[1].strip()
-        if not succ_expr or not fail_expr:
-            await ctx.send("Invalid format. Both parts required: 'succ_expr/fail_expr'.")
-            return
-
         channel = ctx.channel
         author = ctx.author
         if channel is None or author is None:
             return
-        
-        # 检查是否是 KP 执行的命令
-        is_kp = self._channel_kp.get(channel.id) == author.id
-        
-        if is_kp:
-            # KP 执行时，只发起检定，不对自己判定
-            view = SCButton(self, channel.id, succ_expr, fail_expr)
-            prompt_msg = f"**KP initiates SC check:** `{succ_expr}/{fail_expr}`\nClick the button below to perform the check:"
-            await ctx.send(prompt_msg, view=view)
-        else:
-            # 非 KP 执行时，对自己进行判定
-            attrs = self._get_user_attrs(channel.id, author.id)
-            san_meta = attrs.get(self._normalize_attr_name("Sanity")[0])
-            if not san_meta:
-                await ctx.send("Attribute 'Sanity' not found. Use .set to define it.")
-                return
-            try:
-                san_val = int(san_meta.get("value", 0))
-            except Exception:
-                await ctx.send("Attribute 'Sanity' value is invalid.")
-                return
-            target = max(1, min(100, san_val))
-
-            roll = random.randint(1, 100)
-            is_success = roll <= target
-            chosen_expr = succ_expr if is_success else fail_expr
-            try:
-                loss_total, details = self._roll_expression(chosen_expr)
-            except ValueError as exc:
-                await ctx.send(str(exc))
-                return
-
-            new_san = max(0, san_val - max(0, loss_total))
-            san_key, san_label = self._normalize_attr_name(str(san_meta.get("label", "Sanity")))
-            attrs[san_key] = {"label": san_label, "value": int(new_san)}
-
-            # 显示名：使用统一格式
-            display_name = self._get_display_name(channel.id, author)
-
-            outcome = "success" if is_success else "failure"
-            extra = f" | {'; '.join(details)}" if details else ""
-            ti_note = "\n[Temporary Insanity] One-time Sanity loss >= 5. Use /ti or .ti." if loss_total >= 5 else ""
-            
-            result_msg = (
-                f"Sanity Check of {display_name}:\n"
-                f"SC {roll}/{target} [{san_label}] -> {outcome} | loss: {chosen_expr} -> {loss_total}{extra} | Sanity: {san_val} -> {new_san}{ti_note}"
-            )
-            await ctx.send(result_msg)
+        # KP 执行时只发起检定（带按钮），否则对自己判定
+        await self._reply_text(ctx, await self._core.sanity_check(channel.id, author, loss))
 
     @commands.command(name="growth", help="Growth check. Usage: .growth <number|attr name>. Support @mention")
     async def growth_text(self, ctx: commands.Context, *, arg: str | None = None) -> None:
         arg = (arg or "").strip()
         if not arg:
-            await ctx.send("Usage: .growth <number|attr name>")
+            await _outbox.send_text(ctx, "Usage: .growth <number|attr name>")
             return
-        
-        # 提取 mentions 并清理参数
-        mentions, cleaned_arg = self._extract_mentions_and_clean_arg(ctx, arg)
-        target_users = mentions if mentions else [ctx.author]
-
         channel = ctx.channel
         if channel is None:
             return
-        
-        # number path
-        m = re.match(r"^\s*(\d+)\s*$", cleaned_arg)
-        if m:
-            target = int(m.group(1))
-            if not (1 <= target <= 100):
-                await ctx.send("Out of range: require 1 <= target <= 100.")
-                return
-            # 对每个目标用户执行成长检定
-            results = []
-            for user in target_users:
-                roll, outcome = self._coc_check(target)
-                is_success = outcome in {"critical success", "extreme success", "hard success", "success"}
-                user_display = self._get_display_name(channel.id, user)
-                if is_success:
-                    results.append(f"{user_display}: Growth Check {roll}/{target} -> Failed")
-                else:
-                    growth = random.randint(1, 10)
-                    results.append(f"{user_display}: Growth Check {roll}/{target} -> Passed | Growth value: 1d10 -> {growth}")
-            await ctx.send("\n".join(results))
-            return
+        target_users, cleaned_arg = self._text_targets(ctx, arg)
+        await self._reply_text(ctx, self._core.growth(channel.id, target_users, cleaned_arg, per_user=True))
 
-        # attribute path
-        
-        # 对每个目标用户执行成长检定
-        results = []
-        for user in target_users:
-            attrs = self._get_user_attrs(channel.id, user.id)
-            key, _label_req = self._normalize_attr_name(cleaned_arg)
-            meta = attrs.get(key)
-            if not meta:
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: Attribute not found. Use .set to define it.")
-                continue
-            label = str(meta.get("label", cleaned_arg))
-            try:
-                target = int(meta.get("value", 0))
-            except Exception:
-                user_display = self._get_display_name(channel.id, user)
-                results.append(f"{user_display}: Attribute value is invalid.")
-                continue
-            target = max(1, min(100, target))
-            roll, outcome = self._coc_check(target)
-            # 显示名：使用统一格式
-            display_name = self._get_display_name(channel.id, user)
-            is_success = outcome in {"critical success", "extreme success", "hard success", "success"}
-            if is_success:
-                results.append(f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth failed.")
-            else:
-                growth = random.randint(1, 10)
-                results.append(f"[{label}] growth of {display_name}:\n{roll}/{target} -> {outcome}\nGrowth value: 1d10 -> {growth}")
-        
-        await ctx.send("\n\n".join(results))
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(CoC(bot))
     logger.info("Cog 'CoC' loaded")
-
-
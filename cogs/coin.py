@@ -1,22 +1,30 @@
-import random
 import logging
 import discord
 from discord import app_commands
 from discord.ext import commands
+from . import _metrics, _outbox, _streams
 
 logger = logging.getLogger(__name__)
 
+# COGS_LAZY=1 时仅注册占位命令，首次使用时再导入本模块（见 _extensions / _lazy）
+LAZY = True
+
 
 class Coin(commands.Cog):
     """抛硬币：/flip coins，返回每次结果与统计。"""
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # 与 CoC 共用频道随机数流（见 _streams）
+        self._streams = _streams.get_streams(bot)
 
     # ---------------- Helpers (private) ----------------
-    def _flip_n(self, coins: int) -> tuple[list[str], int, int, str, str]:
-        results = ["H" if random.getrandbits(1) else "T" for _ in range(coins)]
-        heads = results.count("H")
+    def _flip_n(self, channel_id: int, user_id: int, coins: int) -> tuple[list[str], int, int, str, str]:
+        # 一次从频道流抽取 coins 个比特，逐位映射为正反面
+        with self._streams.draw(channel_id, user_id, f"flip {coins}") as rng:
+            bitstr = format(rng.bits(coins), f"0{coins}b")
+        results = ["H" if bit == "1" else "T" for bit in bitstr]
+        heads = bitstr.count("1")
         tails = coins - heads
         if coins <= 50:
             detail = ", ".join(results)
@@ -34,26 +42,26 @@ class Coin(commands.Cog):
         - coins 范围限制，避免滥用
         - 小数量展示完整序列；数量大时仅预览前 50 次并给出统计
         """
-        await interaction.response.defer(ephemeral=False)
+        await _metrics.defer(interaction, ephemeral=False)
         if not (1 <= coins <= 1000):
             await interaction.followup.send(
                 "Out of range: require 1 <= coins <= 1000.", ephemeral=True
             )
             return
 
-        # 使用 getrandbits 更快地产生二元结果
-        _results, heads, tails, detail, suffix = self._flip_n(coins)
+        # 使用批量比特抽取更快地产生二元结果
+        _results, heads, tails, detail, suffix = self._flip_n(interaction.channel_id, interaction.user.id, coins)
         await interaction.followup.send(f"Flip {coins}: [{detail}] -> Heads={heads}, Tails={tails}{suffix}")
 
-    # 文本命令：`.r flip 10`
-    @commands.command(name="flip", help="Flip N coins (default 1). Usage: .r flip [coins]")
+    # 文本命令：`.flip 10`
+    @commands.command(name="flip", help="Flip N coins (default 1). Usage: .flip [coins]")
     async def flip_text(self, ctx: commands.Context, coins: int = 1) -> None:
         if not (1 <= coins <= 1000):
-            await ctx.send("Out of range: require 1 <= coins <= 1000.")
+            await _outbox.send_text(ctx, "Out of range: require 1 <= coins <= 1000.")
             return
 
-        _results, heads, tails, detail, suffix = self._flip_n(coins)
-        await ctx.send(f"Flip {coins}: [{detail}] -> Heads={heads}, Tails={tails}{suffix}")
+        _results, heads, tails, detail, suffix = self._flip_n(ctx.channel.id, ctx.author.id, coins)
+        await _outbox.send_text(ctx, f"Flip {coins}: [{detail}] -> Heads={heads}, Tails={tails}{suffix}")
 
 
 async def setup(bot: commands.Bot) -> None:
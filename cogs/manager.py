@@ -1,39 +1,20 @@
-import os
 import logging
 import asyncio
-from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Literal
 
 import discord
 from discord import app_commands
 from discord.ext import commands
-from ._utils import owner_or_admin, sync_app_commands
+from . import _extensions, _help, _lazy, _metrics, _outbox, _profiler, _streams
+from ._utils import forget_fingerprint, owner_or_admin, sync_app_commands, sync_tree
 
 
 logger = logging.getLogger(__name__)
 
-
-def _iter_cog_module_paths(base_package: str = "cogs") -> List[str]:
-    """Discover all extension module paths under a base package.
-
-    Returns paths like 'cogs.general'.
-    """
-    package_dir = Path(__file__).resolve().parent if base_package == "cogs" else Path(__file__).resolve().parent / base_package
-    if not package_dir.exists():
-        return []
-    modules: List[str] = []
-    for path in package_dir.rglob("*.py"):
-        if path.name.startswith("_"):
-            continue
-        rel = path.with_suffix("")
-        try:
-            rel = rel.relative_to(package_dir)
-        except ValueError:
-            # Should not happen, but keep safe
-            continue
-        dotted = str(rel).replace(os.sep, ".")
-        modules.append(f"{base_package}.{dotted}")
-    return sorted(modules)
+# 交互令牌 15 分钟后失效，自动停止的分析会话须在此之前回复
+MAX_PROFILE_SECONDS = 600
+# /admin replay 不带位置时列出的最近掷骰条数
+RECENT_ROLLS = 15
 
 
 class Manager(commands.Cog):
@@ -46,14 +27,33 @@ class Manager(commands.Cog):
         self.bot = bot
 
     # ---------------- Common helpers ----------------
+    async def _load(self, ext: str) -> None:
+        # 懒加载扩展仍处于占位状态时，先移除占位命令再正常加载
+        _lazy.drop(self.bot, ext)
+        await self.bot.load_extension(ext)
+
+    def _extensions_changed(self) -> None:
+        """扩展加载/卸载/重载后调用：使依赖已注册命令的缓存失效。"""
+        _help.invalidate(self.bot)
+
+    def _ext_state(self, ext: str) -> str:
+        if ext in self.bot.extensions:
+            return "loaded"
+        if _lazy.is_pending(self.bot, ext):
+            return "lazy"
+        return "not loaded"
+
     async def _choices(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
-        items = _iter_cog_module_paths("cogs")
-        filtered = [m for m in items if current.lower() in m.lower()]
-        return [app_commands.Choice(name=m, value=m) for m in filtered[:25]]
+        # 模块列表与索引常驻内存，每次按键只做查表；加载状态实时读取
+        return [
+            app_commands.Choice(name=f"{m} ({self._ext_state(m)})", value=m)
+            for m in _extensions.search(current, "cogs")
+        ]
 
     async def _load_ext(self, interaction: discord.Interaction, ext: str) -> None:
         try:
-            await self.bot.load_extension(ext)
+            await self._load(ext)
+            self._extensions_changed()
             scope, count = await sync_app_commands(self.bot)
             await interaction.followup.send(f"Loaded: {ext} | synced {count} ({scope})", ephemeral=True)
         except Exception as exc:
@@ -61,20 +61,45 @@ class Manager(commands.Cog):
 
     async def _unload_ext(self, interaction: discord.Interaction, ext: str) -> None:
         try:
-            await self.bot.unload_extension(ext)
+            # 仍处于占位状态的懒加载扩展只需移除占位命令
+            if not _lazy.drop(self.bot, ext):
+                await self.bot.unload_extension(ext)
+            self._extensions_changed()
             scope, count = await sync_app_commands(self.bot)
             await interaction.followup.send(f"Unloaded: {ext} | synced {count} ({scope})", ephemeral=True)
         except Exception as exc:
             await interaction.followup.send(f"Failed to unload {ext}: {exc}", ephemeral=True)
 
+    async def _finish_profile(self, session: _profiler.Session) -> list[str]:
+        """停止分析并写出文件，返回要回复的消息分段。"""
+        session.stop()
+        try:
+            paths = await asyncio.to_thread(session.dump, _profiler.output_dir())
+            saved = "Saved: " + ", ".join(f"`{p}`" for p in paths)
+        except OSError as exc:
+            logger.exception("Failed to write profile: %s", exc)
+            saved = f"Failed to write profile files: {exc}"
+        return _outbox.split_message(f"```\n{session.summary()}\n```\n{saved}")
+
+    async def _auto_stop_profile(self, interaction: discord.Interaction, session: _profiler.Session, seconds: int) -> None:
+        await asyncio.sleep(seconds)
+        if getattr(self.bot, "_profile_session", None) is not session:
+            return
+        self.bot._profile_session = None  # type: ignore[attr-defined]
+        self.bot._profile_stop_task = None  # type: ignore[attr-defined]
+        for chunk in await self._finish_profile(session):
+            await interaction.followup.send(chunk, ephemeral=True)
+
     async def _reload_ext(self, interaction: discord.Interaction, ext: str) -> None:
         try:
             await self.bot.reload_extension(ext)
+            self._extensions_changed()
             scope, count = await sync_app_commands(self.bot)
             await interaction.followup.send(f"Reloaded: {ext} | synced {count} ({scope})", ephemeral=True)
         except commands.ExtensionNotLoaded:
             try:
-                await self.bot.load_extension(ext)
+                await self._load(ext)
+                self._extensions_changed()
                 scope, count = await sync_app_commands(self.bot)
                 await interaction.followup.send(f"Loaded (was not loaded): {ext} | synced {count} ({scope})", ephemeral=True)
             except Exception as exc:
@@ -87,56 +112,151 @@ class Manager(commands.Cog):
     @app_commands.autocomplete(ext=_choices)
     @owner_or_admin()
     async def admin_load(self, interaction: discord.Interaction, ext: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         await self._load_ext(interaction, ext)
 
     @admin.command(name="unload", description="Unload an extension module")
     @app_commands.autocomplete(ext=_choices)
     @owner_or_admin()
     async def admin_unload(self, interaction: discord.Interaction, ext: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         await self._unload_ext(interaction, ext)
 
     @admin.command(name="reload", description="Reload an extension or all (pass 'all')")
     @app_commands.autocomplete(ext=_choices)
     @owner_or_admin()
     async def admin_reload(self, interaction: discord.Interaction, ext: str) -> None:
-        await interaction.response.defer(ephemeral=True)
+        await _metrics.defer(interaction, ephemeral=True)
         if ext.lower() == "all":
             count = 0
-            for mod in _iter_cog_module_paths("cogs"):
+            # 重新扫描，使新增的扩展文件也被加载
+            for mod in _extensions.discover("cogs", refresh=True):
                 try:
                     await self.bot.reload_extension(mod)
                     count += 1
                 except commands.ExtensionNotLoaded:
                     try:
-                        await self.bot.load_extension(mod)
+                        await self._load(mod)
                         count += 1
                     except Exception:
                         logger.exception("Load failed for %s", mod)
                 except Exception:
                     logger.exception("Reload failed for %s", mod)
+            self._extensions_changed()
             scope, sync_count = await sync_app_commands(self.bot)
             await interaction.followup.send(f"Reloaded all. OK: {count} | synced {sync_count} ({scope})", ephemeral=True)
             return
         await self._reload_ext(interaction, ext)
 
+    @admin.command(name="profile", description="Sample the event loop to find hot functions")
+    @app_commands.describe(
+        action="start or stop a profiling session",
+        seconds="Stop automatically after this many seconds (0 = until /admin profile stop)",
+        cprofile="Also run cProfile on the event loop thread (higher overhead)",
+    )
+    @owner_or_admin()
+    async def admin_profile(
+        self,
+        interaction: discord.Interaction,
+        action: Literal["start", "stop"],
+        seconds: int = 30,
+        cprofile: bool = False,
+    ) -> None:
+        await _metrics.defer(interaction, ephemeral=True)
+        # 会话挂在 bot 上，Manager 重载后仍可停止
+        session: _profiler.Session | None = getattr(self.bot, "_profile_session", None)
+        if action == "stop":
+            if session is None:
+                await interaction.followup.send("No profile is running.", ephemeral=True)
+                return
+            self.bot._profile_session = None  # type: ignore[attr-defined]
+            task = getattr(self.bot, "_profile_stop_task", None)
+            if task is not None:
+                task.cancel()
+            for chunk in await self._finish_profile(session):
+                await interaction.followup.send(chunk, ephemeral=True)
+            return
+
+        if session is not None:
+            await interaction.followup.send("A profile is already running. Use /admin profile stop.", ephemeral=True)
+            return
+        seconds = max(0, min(seconds, MAX_PROFILE_SECONDS))
+        session = _profiler.Session(_profiler.configured_interval(), use_cprofile=cprofile)
+        session.start()
+        self.bot._profile_session = session  # type: ignore[attr-defined]
+        if seconds:
+            # 保留引用，避免任务被回收；手动停止时取消
+            self.bot._profile_stop_task = asyncio.create_task(  # type: ignore[attr-defined]
+                self._auto_stop_profile(interaction, session, seconds), name="admin-profile-stop"
+            )
+            until = f"for {seconds}s"
+        else:
+            until = "until /admin profile stop"
+        mode = "sampling + cProfile" if session.cprofile is not None else "sampling"
+        logger.info("Profiling started (%s) %s by %s", mode, until, interaction.user)
+        await interaction.followup.send(f"Profiling started ({mode}) {until}.", ephemeral=True)
+
+    @admin.command(name="replay", description="List recent rolls in this channel or replay one from its stream position")
+    @app_commands.describe(position="Stream position of the roll (omit to list recent rolls)")
+    @owner_or_admin()
+    async def admin_replay(self, interaction: discord.Interaction, position: int | None = None) -> None:
+        await _metrics.defer(interaction, ephemeral=True)
+        streams = _streams.get_streams(self.bot)
+        channel_id = interaction.channel_id
+        if position is None:
+            records = streams.recent(channel_id, RECENT_ROLLS)
+            if not records:
+                await interaction.followup.send("No rolls logged in this channel.", ephemeral=True)
+                return
+            lines = [
+                f"#{r.position} <t:{int(r.at)}:T> <@{r.user_id}> {r.label}: {_streams.format_draws(r.draws)}"
+                for r in records
+            ]
+            lines.append(f"Stream position: {streams.position(channel_id)} (epoch {streams.epoch(channel_id)})")
+            for chunk in _outbox.split_message("\n".join(lines)):
+                await interaction.followup.send(chunk, ephemeral=True)
+            return
+
+        record = streams.find(channel_id, position)
+        if record is None:
+            await interaction.followup.send(f"No logged roll at position {position} in this channel.", ephemeral=True)
+            return
+        # 重建流需要生成 position 之前的全部块，放到线程中避免阻塞事件循环
+        epoch = streams.epoch(channel_id)
+        replayed = await asyncio.to_thread(streams.replay, channel_id, record, epoch)
+        verdict = "match" if replayed == record else "MISMATCH"
+        text = (
+            f"#{record.position}..{record.end} <t:{int(record.at)}:T> <@{record.user_id}> {record.label} (epoch {epoch})\n"
+            f"logged:   {_streams.format_draws(record.draws)}\n"
+            f"replayed: {_streams.format_draws(replayed.draws)} (end {replayed.end})\n"
+            f"-> {verdict}"
+        )
+        if verdict != "match":
+            logger.warning("Replay mismatch in channel %s at position %s", channel_id, position)
+        for chunk in _outbox.split_message(text):
+            await interaction.followup.send(chunk, ephemeral=True)
+
     @admin.command(name="sync", description="Sync app commands (global/guild/clear_global/clear_guild)")
+    @app_commands.describe(force="Sync even if the command tree is unchanged since the last sync")
     @owner_or_admin()
-    async def admin_sync(self, interaction: discord.Interaction, scope: str = "global") -> None:
-        await interaction.response.defer(ephemeral=True)
+    async def admin_sync(self, interaction: discord.Interaction, scope: str = "global", force: bool = False) -> None:
+        await _metrics.defer(interaction, ephemeral=True)
         try:
             scope = scope.lower().strip()
             if scope == "guild" and interaction.guild:
                 self.bot.tree.copy_global_to(guild=interaction.guild)
-                synced = await self.bot.tree.sync(guild=interaction.guild)
-                await interaction.followup.send(
-                    f"Synced {len(synced)} commands to guild {interaction.guild.id}", ephemeral=True
-                )
+                count, synced = await sync_tree(self.bot, interaction.guild, force=force)
+                if synced:
+                    msg = f"Synced {count} commands to guild {interaction.guild.id}"
+                else:
+                    msg = f"Commands unchanged for guild {interaction.guild.id} ({count}); use force to sync anyway"
+                await interaction.followup.send(msg, ephemeral=True)
                 return
 
+            # 清空后远端状态与指纹不再对应，清除指纹以便下次同步必定执行
             if scope == "clear_global":
                 self.bot.tree.clear_commands(guild=None)
+                forget_fingerprint(self.bot, None)
                 synced = await self.bot.tree.sync()
                 await interaction.followup.send(
                     f"Cleared global commands. Remaining: {len(synced)}", ephemeral=True
@@ -145,6 +265,7 @@ class Manager(commands.Cog):
 
             if scope == "clear_guild" and interaction.guild:
                 self.bot.tree.clear_commands(guild=interaction.guild)
+                forget_fingerprint(self.bot, interaction.guild)
                 synced = await self.bot.tree.sync(guild=interaction.guild)
                 await interaction.followup.send(
                     f"Cleared guild {interaction.guild.id} commands. Remaining: {len(synced)}", ephemeral=True
@@ -152,7 +273,7 @@ class Manager(commands.Cog):
                 return
 
             # default: global or fallback to helper util
-            s_scope, s_count = await sync_app_commands(self.bot)
+            s_scope, s_count = await sync_app_commands(self.bot, force=force)
             await interaction.followup.send(
                 f"Synced {s_count} ({s_scope})", ephemeral=True
             )
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import logging
+import discord
+from discord import app_commands
+from discord.ext import commands
+from . import _metrics
+from ._utils import env_number
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+# 读取请求行与请求头的超时（秒）
+REQUEST_TIMEOUT = 5.0
+
+
+class Metrics(commands.Cog):
+    """命令耗时 / 次数 / 错误 / 并发指标，并在本地 HTTP 端口以 Prometheus 文本格式提供（GET /metrics）。
+
+    计时起点：Slash 命令为命令树的 `interaction_check`，文本命令为一次性的全局检查，二者都在命令执行前同步调用；
+    终点为 `on_app_command_completion` / `on_command_completion` 与对应的错误处理。
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.registry = _metrics.get_registry(bot)
+        self._server: asyncio.AbstractServer | None = None
+        self._prev_interaction_check = None
+        self._prev_tree_error = None
+
+    # ---------------- Lifecycle ----------------
+    async def cog_load(self) -> None:
+        tree = self.bot.tree
+        # 只保存实例上的覆盖（不存在时卸载后删除即可恢复类方法）
+        self._prev_interaction_check = vars(tree).get("interaction_check")
+        self._prev_tree_error = tree.on_error
+        tree.interaction_check = self._interaction_check  # type: ignore[method-assign]
+        tree.error(self._on_tree_error)
+        self.bot.add_check(self._stamp_text, call_once=True)
+        self._register_gauges()
+
+        port = env_number("METRICS_PORT", DEFAULT_PORT, int)
+        if not (0 <= port <= 65535):
+            logger.warning("METRICS_PORT out of range. Falling back to %s.", DEFAULT_PORT)
+            port = DEFAULT_PORT
+        if port:
+            host = os.getenv("METRICS_HOST", DEFAULT_HOST)
+            try:
+                self._server = await asyncio.start_server(self._handle, host, port)
+                logger.info("Metrics endpoint listening on http://%s:%d/metrics", host, port)
+            except OSError as exc:
+                logger.warning("Failed to start metrics endpoint on %s:%d: %s", host, port, exc)
+
+    async def cog_unload(self) -> None:
+        tree = self.bot.tree
+        if self._prev_interaction_check is not None:
+            tree.interaction_check = self._prev_interaction_check  # type: ignore[method-assign]
+        else:
+            vars(tree).pop("interaction_check", None)
+        tree.on_error = self._prev_tree_error  # type: ignore[method-assign]
+        self.bot.remove_check(self._stamp_text, call_once=True)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _register_gauges(self) -> None:
+        bot = self.bot
+        gauge = self.registry.gauge
+        # 对象不存在时回调抛出异常，该指标在本次抓取中省略
+        gauge("gateway_latency_seconds", "Gateway heartbeat round trip.", lambda: bot.latency)
+        gauge("outbox_pending", "Queued outbound text messages.", lambda: bot._coc_outbox.stats()["pending"])
+        gauge("outbox_max_depth", "Deepest per-channel outbound queue seen.", lambda: bot._coc_outbox.stats()["max_depth"])
+        gauge("outbox_avg_delay_seconds", "Mean queueing delay of outbound messages.", lambda: bot._coc_outbox.stats()["avg_delay_ms"] / 1000)
+        gauge("store_resident_channels", "Channels cached in the attribute store.", lambda: bot._coc_store.stats()["resident_channels"])
+        gauge("store_pending_events", "Attribute changes waiting to be flushed.", lambda: bot._coc_store.stats()["pending_events"])
+        gauge("store_dropped_events", "Attribute changes the backend could not write.", lambda: bot._coc_store.stats()["dropped_events"])
+        gauge("store_hit_ratio", "Attribute store cache hit ratio.", lambda: bot._coc_store.stats()["hit_ratio"])
+        gauge("sheet_locks_contended", "Sheet lock acquisitions that had to wait.", lambda: bot._coc_locks.contended)
+
+    # ---------------- Slash commands ----------------
+    async def _interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 自动补全同样经过该检查，但没有完成事件，不计入
+        if interaction.type is discord.InteractionType.application_command:
+            interaction.extras[_metrics.START_KEY] = self.registry.begin("slash")
+        if self._prev_interaction_check is not None:
+            return await self._prev_interaction_check(interaction)
+        return True
+
+    def _finish_slash(self, interaction: discord.Interaction, name: str, error: bool) -> None:
+        start = interaction.extras.pop(_metrics.START_KEY, None)
+        if start is None:
+            self.registry.count_error("slash", name)
+            return
+        self.registry.finish("slash", name, start, error=error, defer=interaction.extras.get(_metrics.DEFER_KEY))
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command | app_commands.ContextMenu) -> None:
+        self._finish_slash(interaction, command.qualified_name, error=False)
+
+    async def _on_tree_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
+        command = interaction.command
+        self._finish_slash(interaction, command.qualified_name if command is not None else "<unknown>", error=True)
+        await self._prev_tree_error(interaction, error)
+
+    # ---------------- Text commands ----------------
+    def _stamp_text(self, ctx: commands.Context) -> bool:
+        # 懒加载占位命令会重新分发给真实命令，只统计真实命令
+        if not ctx.command.extras.get("lazy_stub"):
+            ctx.metrics_start = self.registry.begin("text")  # type: ignore[attr-defined]
+        return True
+
+    def _finish_text(self, ctx: commands.Context, error: bool) -> None:
+        start = getattr(ctx, "metrics_start", None)
+        if start is None:
+            if ctx.command is not None and not ctx.command.extras.get("lazy_stub"):
+                self.registry.count_error("text", ctx.command.qualified_name)
+            return
+        ctx.metrics_start = None  # type: ignore[attr-defined]
+        self.registry.finish("text", ctx.command.qualified_name, start, error=error)
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context) -> None:
+        self._finish_text(ctx, error=False)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx: commands.Context, error: commands.CommandError) -> None:
+        if not isinstance(error, commands.CommandNotFound):
+            self._finish_text(ctx, error=True)
+        # 注册了 on_command_error 监听器后 discord.py 不再输出默认错误日志，这里按默认行为补上
+        command = ctx.command
+        if command is not None and command.has_error_handler():
+            return
+        if ctx.cog is not None and ctx.cog.has_error_handler():
+            return
+        logger.error("Ignoring exception in command %s", command, exc_info=error)
+
+    # ---------------- HTTP endpoint ----------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            # 丢弃请求头
+            while True:
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?", 1)[0] in (b"/", b"/metrics"):
+                start = time.perf_counter()
+                body = self.registry.render().encode()
+                logger.debug("Rendered metrics in %.2fms", (time.perf_counter() - start) * 1000)
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body = b"not found\n"
+                status, content_type = "404 Not Found", "text/plain; charset=utf-8"
+            head = (
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            )
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Metrics(bot))
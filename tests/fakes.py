@@ -0,0 +1,153 @@
+"""测试用替身：离线构建 bot，并以替身 Interaction / Context 直接调用 Slash、文本命令与 SC 按钮。
+
+每次 defer / 发送可让出 `latency` 秒，使并发命令在事件循环中交错；最后一次附带的 view 会被保留，供点击 SC 按钮。
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+
+_ids = itertools.count(10_000)
+
+
+class Message:
+    def __init__(self, content: str | None = None, mentions: list | None = None) -> None:
+        self.id = next(_ids)
+        self.content = content or ""
+        self.mentions = mentions or []
+
+
+class Sink:
+    """收集所有发出的消息。"""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.sent: list[str] = []
+        self.last_view = None
+
+    async def deliver(self, content=None, *, view=None, **_kwargs) -> Message:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append(content or "")
+        if view is not None:
+            self.last_view = view
+        return Message(content)
+
+
+class User:
+    def __init__(self, sink: Sink, name: str | None = None) -> None:
+        self.id = next(_ids)
+        self.name = self.display_name = name or f"user{self.id}"
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> Message:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class Channel:
+    def __init__(self, sink: Sink) -> None:
+        self.id = next(_ids)
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> Message:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class _Response:
+    def __init__(self, sink: Sink) -> None:
+        self._sink = sink
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **_kwargs) -> None:
+        if self._sink.latency:
+            await asyncio.sleep(self._sink.latency)
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs) -> None:
+        self._done = True
+        await self._sink.deliver(content, **kwargs)
+
+
+class _Followup:
+    def __init__(self, sink: Sink) -> None:
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> Message:
+        return await self._sink.deliver(content, **kwargs)
+
+
+class Interaction:
+    def __init__(self, client, user: User, channel: Channel, sink: Sink) -> None:
+        self.id = next(_ids)
+        self.client = client
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = None
+        self.guild_id = None
+        self.command = None
+        self.extras: dict = {}
+        self.response = _Response(sink)
+        self.followup = _Followup(sink)
+
+
+class Context:
+    def __init__(self, bot, author: User, channel: Channel, sink: Sink, content: str = "", mentions: list | None = None) -> None:
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.guild = None
+        self.message = Message(content, mentions)
+        self._sink = sink
+
+    async def send(self, content=None, **kwargs) -> Message:
+        return await self._sink.deliver(content, **kwargs)
+
+
+async def build_bot():
+    """加载 `cogs/` 下全部扩展：属性只存内存、不启动指标端口、不懒加载。"""
+    os.environ["COC_DB_PATH"] = ""
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["COGS_LAZY"] = "0"
+    from bot import RngHelperBot
+    from cogs import _extensions
+
+    logging.getLogger().setLevel(logging.WARNING)
+    bot = RngHelperBot()
+    failed = [r for r in await _extensions.load_all(bot, "cogs") if r.error is not None]
+    if failed:
+        raise RuntimeError(", ".join(f"{r.name}: {r.error}" for r in failed))
+    return bot
+
+
+async def unload(bot) -> None:
+    for ext in list(bot.extensions):
+        await bot.unload_extension(ext)
+
+
+class Driver:
+    """按命令名调用 bot 上注册的 Slash / 文本命令回调。"""
+
+    def __init__(self, bot, latency: float = 0.0) -> None:
+        self.bot = bot
+        self.sink = Sink(latency)
+        self.slash = {cmd.name: cmd for cmd in bot.tree.get_commands()}
+        self.text = {cmd.name: cmd for cmd in bot.commands}
+
+    async def call_slash(self, name: str, channel: Channel, user: User, **kwargs) -> None:
+        cmd = self.slash[name]
+        await cmd.callback(cmd.binding, Interaction(self.bot, user, channel, self.sink), **kwargs)
+
+    async def call_text(self, name: str, channel: Channel, user: User, content: str = "", mentions: list | None = None, **kwargs) -> None:
+        cmd = self.text[name]
+        ctx = Context(self.bot, user, channel, self.sink, content, mentions)
+        await cmd.callback(cmd.cog, ctx, **kwargs)
+
+    async def click(self, view, channel: Channel, user: User) -> None:
+        await view.sc_button.callback(Interaction(self.bot, user, channel, self.sink))
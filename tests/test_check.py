@@ -0,0 +1,45 @@
+"""`_check` 预建结果表与原 `CoC._coc_check` 分支规则逐项一致。"""
+
+import math
+
+from cogs import _check
+
+
+def _legacy_check(target: int, roll: int) -> str:
+    """原 `CoC._coc_check` 的分支链（保留作对照，勿改）。"""
+    half = target // 2
+    fifth = target // 5
+
+    if roll <= target:
+        if 1 <= roll <= 5:
+            return "critical success"
+        if roll <= fifth:
+            return "extreme success"
+        if roll <= half:
+            return "hard success"
+        return "success"
+
+    # roll > target
+    if 96 <= roll <= 100:
+        return "critical failure"
+    return "failure"
+
+
+def test_table_matches_legacy_rules():
+    for target in range(1, 101):
+        for roll in range(1, 101):
+            expected = _legacy_check(target, roll)
+            assert _check.OUTCOME_TEXT[_check.outcome_level(target, roll)] == expected, (target, roll)
+            assert _check.outcome_text(target, roll) == expected, (target, roll)
+
+
+def test_probabilities_sum_to_one():
+    for target in range(1, 101):
+        assert math.isclose(sum(_check.PROBABILITIES[target]), 1.0), target
+
+
+def test_probabilities_match_table_counts():
+    for target in range(1, 101):
+        for level, p in enumerate(_check.PROBABILITIES[target]):
+            count = sum(1 for roll in range(1, 101) if _legacy_check(target, roll) == _check.OUTCOME_TEXT[level])
+            assert math.isclose(p, count / 100), (target, level)
@@ -0,0 +1,25 @@
+"""生成的帮助：文本命令显示 help 中手写的用法并列出别名，而不是 `cmd.signature` 的 `[arg]`。"""
+
+import asyncio
+
+from cogs import _help
+from fakes import build_bot, unload
+
+
+def test_help_shows_usage_and_aliases(monkeypatch):
+    monkeypatch.setenv("COC_OUTBOX", "0")
+
+    async def run() -> str:
+        bot = await build_bot()
+        text = "\n".join(field.value for field in _help.build_help_embed(bot).fields)
+        await unload(bot)
+        return text
+
+    text = asyncio.run(run())
+    assert "`.rm <count> <expr>` (alias `.rm`)" in text
+    assert "`.prob <expr> [>= k]`" in text
+    assert "`.kp` -" in text
+    assert "`.ra <number|attr name>` (alias `.ra`)" in text
+    assert "(alias `.r`)" in text
+    assert "(alias `.gc`)" in text
+    assert "[arg]" not in text and "[expr]" not in text
@@ -0,0 +1,75 @@
+"""事件日志：换代后旧日志按代数有界归档，/history 跨当前日志与归档读出审计记录。"""
+
+import asyncio
+
+from cogs import _core, _fair, _locks, _store, _streams
+from cogs._journal import JournalBackend
+from fakes import Sink, User
+
+CHANNEL = 1
+OTHER = 2
+
+
+def _set(channel_id: int, user_id: int, value: int, actor_id: int) -> _store.Event:
+    return _store.Event(_store.OP_SET, channel_id, user_id, (("hp", "HP", value),), "add", actor_id, float(value))
+
+
+def test_archives_are_bounded_and_history_spans_generations(tmp_path):
+    backend = JournalBackend(tmp_path, snapshot_every=10, history=2)
+    for value in range(50):
+        backend.write([_set(CHANNEL, 7, value, 9), _set(OTHER, 7, value, 9)])
+    # 每 10 个事件换代一次：第 10 代为当前日志，只保留第 8、9 代归档
+    assert backend.generation == 10
+    assert sorted(p.name for p in tmp_path.glob("journal*")) == [
+        "journal.10.jsonl", "journal.8.archive.jsonl", "journal.9.archive.jsonl",
+    ]
+
+    events = backend.history(CHANNEL, 100)
+    # 第 8、9 代各含本频道 5 个事件，当前日志为空
+    assert [ev.payload[0][2] for ev in events] == list(range(49, 39, -1))
+    assert all(ev.channel_id == CHANNEL and ev.actor_id == 9 and ev.cmd == "add" for ev in events)
+    assert len(backend.history(CHANNEL, 3)) == 3
+    backend.close()
+
+    # 重启后状态来自快照，归档不受影响
+    backend = JournalBackend(tmp_path, snapshot_every=10, history=2)
+    users, _kp = backend.load_channel(CHANNEL)
+    assert users[7]["hp"].value == 49
+    assert len(backend.history(CHANNEL, 100)) == 10
+    backend.close()
+
+
+def test_kp_history_includes_unflushed_changes(tmp_path):
+    async def run() -> None:
+        store = _store.AttrStore(JournalBackend(tmp_path, snapshot_every=0))
+        core = _core.CommandCore(store, _locks.KeyedLocks(), _streams.StreamService("test"), _fair.FairDice())
+        sink = Sink()
+        kp, player = User(sink), User(sink)
+        store.set_kp(CHANNEL, kp.id, actor_id=kp.id)
+        store.set_attrs(CHANNEL, player.id, [("hp", "HP", 12), ("str", "STR", 60)], cmd="set", actor_id=player.id)
+        await store.flush()
+        await core.add_attrs(CHANNEL, [player], "HP -3", actor_id=kp.id)
+
+        denied = await core.history(CHANNEL, player)
+        assert denied.error
+        reply = await core.history(CHANNEL, kp, "hp", targets=[player])
+        lines = reply.text.splitlines()[1:]
+        # 最新的 add（仍在写队列中）在前，其后是已落盘的 set
+        assert len(lines) == 2
+        assert f"add by <@{kp.id}> -> <@{player.id}>: HP=9" in lines[0]
+        assert "set by" in lines[1] and "HP=12, STR=60" in lines[1]
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_history_requires_journal():
+    async def run() -> None:
+        store = _store.AttrStore()
+        core = _core.CommandCore(store, _locks.KeyedLocks(), _streams.StreamService("test"), _fair.FairDice())
+        kp = User(Sink())
+        store.set_kp(CHANNEL, kp.id)
+        reply = await core.history(CHANNEL, kp)
+        assert reply.error and "journal" in reply.text
+
+    asyncio.run(run())
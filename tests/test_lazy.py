@@ -0,0 +1,42 @@
+"""懒加载：首次调用时扩展加载失败，占位命令保留并告知用户，下次调用时重试成功。"""
+
+import asyncio
+
+from cogs import _lazy
+from fakes import Channel, Interaction, Sink, User, unload
+
+MODULE = "cogs.coin"
+
+
+def test_failed_materialize_keeps_stubs_and_retries(monkeypatch):
+    monkeypatch.setenv("METRICS_PORT", "0")
+
+    async def run() -> None:
+        from bot import RngHelperBot
+
+        bot = RngHelperBot()
+        assert _lazy.register(bot, MODULE)
+        sink = Sink()
+        channel, user = Channel(sink), User(sink)
+
+        real_load = bot.load_extension
+
+        async def broken_load(name: str, **kwargs) -> None:
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(bot, "load_extension", broken_load)
+        stub = bot.tree.get_command("flip")
+        await stub.callback(Interaction(bot, user, channel, sink), coins=1)
+        assert sink.sent == [_lazy.LOAD_FAILED]
+        assert _lazy.is_pending(bot, MODULE)
+        assert bot.tree.get_command("flip") is stub
+        assert bot.get_command("flip") is not None
+
+        monkeypatch.setattr(bot, "load_extension", real_load)
+        await stub.callback(Interaction(bot, user, channel, sink), coins=1)
+        assert not _lazy.is_pending(bot, MODULE)
+        assert sink.sent[-1].startswith("Flip 1: ")
+        assert bot.tree.get_command("flip") is not stub
+        await unload(bot)
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+"""出站队列：合并不同用户的结果时保留归属，合并后的消息不超过长度上限。"""
+
+import asyncio
+
+from cogs import _outbox
+from fakes import Channel, Sink
+
+
+def _send_all(outbox: _outbox.Outbox, payloads: list[tuple[str, str]]) -> list[str]:
+    async def run() -> list[str]:
+        sink = Sink()
+        channel = Channel(sink)
+        await asyncio.gather(*(outbox.send(channel, text, author) for text, author in payloads))
+        return sink.sent
+
+    return asyncio.run(run())
+
+
+def test_merged_results_name_each_author():
+    outbox = _outbox.Outbox(window=0.01)
+    sent = _send_all(outbox, [
+        ("Roll: 1d100 -> 1", "Alice"),
+        ("Roll: 1d100 -> 42", "Alice"),
+        ("Roll: 1d100 -> 7", "Bob"),
+        ("Roll: 1d100 -> 99", "Bob"),
+    ])
+    # 同时入队的结果合并为一条，每条结果标明触发者
+    assert sent == ["Alice: Roll: 1d100 -> 1\nAlice: Roll: 1d100 -> 42\nBob: Roll: 1d100 -> 7\nBob: Roll: 1d100 -> 99"]
+
+
+def test_single_author_batches_are_unchanged():
+    outbox = _outbox.Outbox(window=0.01)
+    sent = _send_all(outbox, [("a", "Alice"), ("b", "Alice"), ("c", "Alice")])
+    assert sent == ["a\nb\nc"]
+
+
+def test_author_prefixes_fit_the_limit():
+    outbox = _outbox.Outbox(window=0.01, limit=100, burst=100)
+    payloads = [("x" * 30, name) for name in ("Alice", "Bob") * 10]
+    sent = _send_all(outbox, payloads)
+    assert all(len(message) <= 100 for message in sent)
+    assert sum(message.count("x" * 30) for message in sent) == 20
@@ -0,0 +1,35 @@
+"""批量掷骰可复核：/rollmany 从频道流抽取子流种子并记一条日志，replay 校验种子后可用同一种子重算整批结果。"""
+
+import asyncio
+
+from cogs import _batch, _core, _fair, _locks, _store, _streams
+from fakes import Sink, User
+
+CHANNEL = 1
+
+
+def test_rollmany_is_logged_and_reproducible():
+    async def run() -> None:
+        streams = _streams.StreamService("test")
+        core = _core.CommandCore(_store.AttrStore(), _locks.KeyedLocks(), streams, _fair.FairDice())
+        user = User(Sink())
+        core.roll(CHANNEL, user, "1d100")
+        before = streams.position(CHANNEL)
+
+        reply = await core.roll_many(CHANNEL, user, 500, "3d6*5")
+        assert not reply.error and reply.text.startswith("Roll many: 3d6*5 x500")
+        # 整批只记一条日志，只占用种子所需的流位置
+        record = streams.recent(CHANNEL, 1)[0]
+        assert (record.position, record.end) == (before, streams.position(CHANNEL))
+        assert record.user_id == user.id and record.label == "rollmany 500 3d6*5"
+        assert streams.replay(CHANNEL, record) == record
+
+        seed = record.draws[0].values[0]
+        assert _batch.roll_many("3d6*5", 500, _streams.Stream(seed)) == reply.text
+
+        # 参数无效时不消耗频道流
+        assert (await core.roll_many(CHANNEL, user, 0, "1d6")).error
+        assert (await core.roll_many(CHANNEL, user, 5, "1d")).error
+        assert streams.position(CHANNEL) == record.end
+
+    asyncio.run(run())